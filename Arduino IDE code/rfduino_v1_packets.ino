@@ -15,12 +15,31 @@ int16_t ax, ay, az;
 int16_t gx, gy, gz;
 int16_t mx, my, mz;
 
-// Scaled sensor values
-float ax_s, ay_s, az_s;
-float gx_s, gy_s, gz_s;
-float mx_s, my_s, mz_s;
-
-float heading;
+// Sample packet protocol v2 (decoded by packetProtocol.py on the host):
+//   byte 0     bits 5-7 protocol version, bit 4 has-timestamp flag, bits 0-3 sample count
+//   byte 1     sequence number (wraps at 256), lets the host count lost packets
+//   [4 bytes]  millis() of the first sample, only if SEND_TIMESTAMP is 1
+//   N x 18     raw samples: ax ay az gx gy gz mx my mz as int16
+// RFduinoBLE.send is limited to 20 bytes, which fits one sample without a timestamp.
+// On a stack with a larger payload raise MAX_PAYLOAD to pack several samples per notification.
+#define PROTOCOL_VERSION 2
+#define MAX_PAYLOAD 20
+#define SEND_TIMESTAMP 0
+#define SAMPLE_BYTES 18
+#define HEADER_BYTES (2 + (SEND_TIMESTAMP ? 4 : 0))
+#define SAMPLES_PER_PACKET ((MAX_PAYLOAD - HEADER_BYTES) / SAMPLE_BYTES)
+#define COUNT_MASK 0x0F  // Sample count bits of the header byte
+
+#if SAMPLES_PER_PACKET < 1
+#error "MAX_PAYLOAD does not fit the header and one sample"
+#elif SAMPLES_PER_PACKET > COUNT_MASK
+#error "SAMPLES_PER_PACKET does not fit the 4-bit sample count of the header; lower MAX_PAYLOAD"
+#endif
+
+uint8_t packet[MAX_PAYLOAD];
+uint8_t sequence = 0;          // Sequence number of the next packet
+uint8_t packed = 0;            // Samples in the packet being filled
+uint32_t firstSampleTime = 0;  // millis() of the first sample in the packet
 
 void setup() {
   // Initialize I2C communication
@@ -153,16 +172,33 @@ void calibrate_magnetometer() {
   Serial.println(mag_z_scale);
   
 }
-// BLE data structure for transmission
-struct CompactSensorData {
-  float ax, ay, az;
-  float gx, gy, gz;
-  float mx, my, mz;
-};
+// Sends the packet being filled and starts the next one
+void sendPacket() {
+  packet[0] = (PROTOCOL_VERSION << 5) | (SEND_TIMESTAMP << 4) | packed;
+  packet[1] = sequence++;
+  if (SEND_TIMESTAMP) {
+    memcpy(packet + 2, &firstSampleTime, 4);  // Little-endian, like the host expects
+  }
+  RFduinoBLE.send((const char*)packet, HEADER_BYTES + packed * SAMPLE_BYTES);
+  packed = 0;
+}
+
+// Appends one raw sample; the packet is sent once it holds SAMPLES_PER_PACKET samples
+void addSample(unsigned long sampleTime) {
+  if (packed == 0) {
+    firstSampleTime = sampleTime;
+  }
+  int16_t values[9] = {ax, ay, az, gx, gy, gz, mx, my, mz};
+  memcpy(packet + HEADER_BYTES + packed * SAMPLE_BYTES, values, SAMPLE_BYTES);
+  packed++;
+  if (packed == SAMPLES_PER_PACKET) {
+    sendPacket();
+  }
+}
 
 // Timing variables
 unsigned long previousMillis = 0;
-const unsigned long interval = 25; // 25ms interval
+const unsigned long interval = 20; // 20ms interval (50 Hz, the rate the host aligns to)
 
 void loop() {
   unsigned long currentMillis = millis();
@@ -174,23 +210,9 @@ void loop() {
     mag.getHeading(&mx, &my, &mz);
     accelgyro.getMotion6(&ax, &ay, &az, &gx, &gy, &gz);
 
-    // Apply accelerometer scaling
-    ax_s = (ax - base_x_accel) / 16384.0;
-    ay_s = (ay - base_y_accel) / 16384.0;
-    az_s = (az - base_z_accel) / 16384.0;
-    // Apply gyroscope scaling
-    gx_s = (gx - base_x_gyro) / 131.0;
-    gy_s = (gy - base_y_gyro) / 131.0;
-    gz_s = (gz - base_z_gyro) / 131.0;
-
-    // Apply magnetometer calibration
-    mx_s = (mx - mag_x_offset) / mag_x_scale;
-    my_s = (my - mag_y_offset) / mag_y_scale;
-    mz_s = (mz - mag_z_offset) / mag_z_scale;
-
-    // Send scaled data over BLE
-    CompactSensorData data = {ax_s, ay_s, az_s, gx_s, gy_s, gz_s, mx_s, my_s, mz_s};
-    RFduinoBLE.send((const char*)&data, sizeof(data));
+    // Raw values are sent; the host converts them with the calibration printed on connect
+    // (see calibration.json)
+    addSample(currentMillis);
   }
 }
 
@@ -198,4 +220,6 @@ void loop() {
 void RFduinoBLE_onConnect() {
   calibrate_sensors();
   calibrate_magnetometer();
+  sequence = 0;
+  packed = 0;
 }
@@ -1,6 +1,8 @@
 import customtkinter as ctk
 from mainFrame import MainFrame
 
+WARM_UP_DELAY_MS = 250  # Heavy modules load in the background once the window has been drawn
+
 
 class App(ctk.CTk):
     def __init__(self):
@@ -23,4 +25,14 @@ class App(ctk.CTk):
         self.main_frame = MainFrame(self)
         self.main_frame.pack(fill="both", expand=True)
 
+        # Disconnect the sensors and stop the BLE service thread when the window closes
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # after() only fires once mainloop runs, i.e. after the window is shown
+        self.after(WARM_UP_DELAY_MS, self.main_frame.start_warm_up)
+
+    def on_close(self):
+        self.main_frame.ble.shutdown()
+        self.destroy()
+
 
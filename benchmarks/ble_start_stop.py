@@ -0,0 +1,122 @@
+"""
+Start/stop latency of BLE streaming sessions: the shared service loop (BLE.submit +
+asyncio.Event stop) against the previous thread-per-session loop that polled a flag
+once per second.
+
+Uses in-process fake clients, so no sensors are needed (bleak must still be importable).
+
+Run from the repository root:
+    python -m benchmarks.ble_start_stop --cycles 20 --sensors 6
+"""
+import argparse
+import asyncio
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from bleConnection import BLE
+
+
+class FakeStatus:
+    def set(self, value):
+        pass
+
+
+class FakeClient:
+    """Stands in for a connected BleakClient; notifications are never delivered."""
+
+    def __init__(self, address):
+        self.address = address
+        self.is_connected = True
+        self.notifying = threading.Event()
+
+    async def start_notify(self, uuid, handler):
+        await asyncio.sleep(0)
+        self.notifying.set()
+
+    async def stop_notify(self, uuid):
+        await asyncio.sleep(0)
+        self.notifying.clear()
+
+    async def disconnect(self):
+        self.is_connected = False
+
+
+def make_ble(sensors, recordings_dir):
+    ble = BLE(FakeStatus())
+    ble.recordings_dir = recordings_dir
+    names = list(ble.RFDUINO_NAME_TO_UUID)
+    for i in range(sensors):
+        client = FakeClient(f"00:00:00:00:00:{i:02x}")
+        ble.connected_devices.append(client)
+        ble.RFDUINO_ADDRESS_TO_UUID[client.address] = ble.RFDUINO_NAME_TO_UUID[names[i % len(names)]]
+    ble.connect_time = time.time() * 1000
+    return ble
+
+
+def service_loop_cycle(ble, hold):
+    """One session on the shared loop; returns (start latency, stop latency) in seconds."""
+    t0 = time.perf_counter()
+    ble.start_streaming()
+    for client in ble.connected_devices:
+        client.notifying.wait()
+    started = time.perf_counter()
+    time.sleep(hold)
+    stopping = time.perf_counter()
+    ble.stop_streaming()
+    ble.stream_future.result()
+    return started - t0, time.perf_counter() - stopping
+
+
+def polling_cycle(ble, hold):
+    """One session the way it used to run: a new thread and event loop, stop polled every second."""
+    state = {"streaming": True}
+
+    async def stream():
+        await asyncio.gather(*[client.start_notify(None, None) for client in ble.connected_devices])
+        while state["streaming"]:
+            await asyncio.sleep(1)
+        await asyncio.gather(*[client.stop_notify(None) for client in ble.connected_devices])
+
+    t0 = time.perf_counter()
+    thread = threading.Thread(target=lambda: asyncio.run(stream()), daemon=True)
+    thread.start()
+    for client in ble.connected_devices:
+        client.notifying.wait()
+    started = time.perf_counter()
+    time.sleep(hold)
+    stopping = time.perf_counter()
+    state["streaming"] = False
+    thread.join()
+    return started - t0, time.perf_counter() - stopping
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--sensors", type=int, default=6)
+    parser.add_argument("--polling-cycles", type=int, default=5, help="Cycles of the (slow) polling variant")
+    parser.add_argument("--max-hold", type=float, default=1.0, help="Sessions stream for a random 0..max-hold s")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as recordings_dir:
+        ble = make_ble(args.sensors, recordings_dir)
+        results = {
+            "service loop": [service_loop_cycle(ble, rng.uniform(0, args.max_hold)) for _ in range(args.cycles)],
+            "thread + polling": [polling_cycle(ble, rng.uniform(0, args.max_hold))
+                                 for _ in range(args.polling_cycles)],
+        }
+        ble.shutdown()
+
+    for name, cycles in results.items():
+        start, stop = (np.array(values) * 1000 for values in zip(*cycles))
+        print(f"{name:>16}: start {start.mean():7.2f} ms, stop mean {stop.mean():7.2f} ms "
+              f"(max {stop.max():7.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Frame cost of the live dashboard (dashboardPlot.DashboardPlot) with simulated sensor
+buffers, rendered off-screen with the Agg canvas. Compares a short and a long session to
+show that the per-frame cost does not grow with the session length.
+
+The Tk blit of the final image is not included (it is a single image copy per frame).
+
+Run from the repository root:
+    python -m benchmarks.dashboard_render --sensors 6 --rate 50 --frames 200
+"""
+import argparse
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from dashboardPlot import DashboardPlot
+from sensorBuffer import SensorBuffer
+
+SENSOR_NAMES = ["RArm", "RShank", "LShank", "Back", "RThigh", "LArm", "Head", "LThigh", "Chest"]
+
+
+def fill_buffers(sensors, rate_hz, minutes, rng):
+    """Buffers holding `minutes` of random-walk samples per sensor with jittered receive times."""
+    n = int(minutes * 60 * rate_hz)
+    buffers = {}
+    for name in SENSOR_NAMES[:sensors]:
+        buffer = SensorBuffer(capacity=n)
+        samples = np.cumsum(rng.integers(-50, 51, (n, 9)), axis=0).clip(-32768, 32767).astype("<i2")
+        times = np.arange(n) * 1000 / rate_hz + rng.uniform(0, 8, n)
+        buffer.extend(samples, np.sort(times))
+        buffers[name] = buffer
+    return buffers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sensors", type=int, default=6)
+    parser.add_argument("--rate", type=float, default=50)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 60])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for minutes in args.minutes:
+        buffers = fill_buffers(args.sensors, args.rate, minutes, rng)
+        figure = Figure(figsize=(8, 6.5), dpi=100)
+        FigureCanvasAgg(figure)
+        plot = DashboardPlot(figure, list(buffers), nominal_interval_ms=1000 / args.rate)
+        plot.update(buffers)  # First frame renders the static background
+
+        per_sample = 1000 / args.rate
+        frame_times = []
+        for _ in range(args.frames):
+            # Samples keep arriving between frames (one 40 ms frame at 25 fps)
+            for buffer in buffers.values():
+                last = float(buffer.times[len(buffer) - 1])
+                new = max(int(40 / per_sample), 1)
+                buffer.extend(rng.integers(-500, 500, (new, 9)).astype("<i2"),
+                              last + per_sample * np.arange(1, new + 1))
+            t0 = time.perf_counter()
+            plot.update(buffers)
+            frame_times.append(time.perf_counter() - t0)
+
+        frame_times = np.array(frame_times) * 1000
+        print(f"{minutes:6.0f} min session ({args.sensors} sensors at {args.rate:g} Hz): "
+              f"frame mean {frame_times.mean():.2f} ms, p95 {np.percentile(frame_times, 95):.2f} ms "
+              f"-> up to {1000 / frame_times.mean():.0f} fps")
+
+
+if __name__ == "__main__":
+    main()
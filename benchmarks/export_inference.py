@@ -0,0 +1,99 @@
+"""
+CPU latency, throughput and load time of the ConvLSTM export formats
+(eager checkpoint, TorchScript, TorchScript int8, ONNX) for batch sizes 1 to 256.
+
+Without --checkpoint a randomly initialised 54-channel model is exported first.
+
+Run from the repository root:
+    python -m benchmarks.export_inference --checkpoint models/DCL-3L_Framewise_54_96.pth --threads 2
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from convLSTM import ConvLSTM
+from exportModel import (build_model, export_onnx, export_torchscript, load_inference_model, quantize,
+                         strip_checkpoint)
+
+
+def export_all(checkpoint, out_dir, channels):
+    """Writes every artifact into out_dir; returns name -> path."""
+    if checkpoint is None:
+        torch.manual_seed(0)
+        checkpoint = os.path.join(out_dir, "random.pth")
+        model = ConvLSTM(channels, num_classes=33, cnn_channel=256)
+        optimizer = torch.optim.Adam(model.parameters())
+        model(torch.zeros(1, 64, channels)).sum().backward()
+        optimizer.step()  # Populate the optimizer state like a training checkpoint
+        torch.save({"model_state_dict": model.state_dict(), "optimizer_state_dict": optimizer.state_dict()},
+                   checkpoint)
+
+    artifacts = {"checkpoint": checkpoint}
+    config = strip_checkpoint(checkpoint, os.path.join(out_dir, "stripped.pth"))
+    artifacts["stripped"] = os.path.join(out_dir, "stripped.pth")
+    model = build_model(artifacts["stripped"])
+    export_torchscript(model, os.path.join(out_dir, "model.pt"), config)
+    artifacts["torchscript"] = os.path.join(out_dir, "model.pt")
+    export_torchscript(quantize(model), os.path.join(out_dir, "model_int8.pt"), config)
+    artifacts["torchscript int8"] = os.path.join(out_dir, "model_int8.pt")
+    try:
+        artifacts["onnx"] = export_onnx(model, os.path.join(out_dir, "model.onnx"), config)
+        import onnxruntime  # noqa: F401
+    except Exception as e:
+        artifacts.pop("onnx", None)
+        print(f"Skipping ONNX ({e})")
+    return artifacts, config
+
+
+def time_call(model, batch, min_seconds):
+    """Mean seconds per call, repeating until min_seconds have elapsed."""
+    with torch.inference_mode():
+        model(batch)  # Warm-up
+        calls, t0 = 0, time.perf_counter()
+        while time.perf_counter() - t0 < min_seconds or calls < 3:
+            model(batch)
+            calls += 1
+    return (time.perf_counter() - t0) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoint", help="Training checkpoint (random weights otherwise)")
+    parser.add_argument("--channels", type=int, default=54)
+    parser.add_argument("--window", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64, 128, 256])
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=0.5, help="Minimum timing per measurement")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    with tempfile.TemporaryDirectory() as out_dir:
+        artifacts, config = export_all(args.checkpoint, out_dir, args.channels)
+
+        print(f"{'format':>17} {'size':>8} {'load':>9}")
+        models = {}
+        for name, path in artifacts.items():
+            t0 = time.perf_counter()
+            models[name] = load_inference_model(path)
+            load_ms = (time.perf_counter() - t0) * 1000
+            print(f"{name:>17} {os.path.getsize(path) / 1e6:6.1f}MB {load_ms:7.1f}ms")
+        models.pop("stripped")  # Same eager model as the checkpoint
+
+        rng = np.random.default_rng(0)
+        print(f"\n{'batch':>5} " + " ".join(f"{name:>25}" for name in models))
+        for batch_size in args.batch_sizes:
+            batch = torch.from_numpy(rng.standard_normal(
+                (batch_size, args.window, config["input_channel"])).astype(np.float32))
+            cells = []
+            for model in models.values():
+                seconds = time_call(model, batch, args.seconds)
+                cells.append(f"{seconds * 1000:8.2f} ms {batch_size / seconds:8.0f} win/s")
+            print(f"{batch_size:>5} " + " ".join(f"{cell:>25}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
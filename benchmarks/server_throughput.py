@@ -0,0 +1,87 @@
+"""
+Aggregate throughput of the headless capture service (server.CaptureServer) against the
+number of concurrent sessions. Every session streams six simulated sensors (simulatedSensors)
+through its own BLE instance into its own recording; the sessions share the service loop(s),
+the chunk writer and one batched inference worker running a randomly initialised ConvLSTM.
+
+Reports per session count the aggregate packets/s, predictions/s, mean inference batch,
+mean prediction latency and the process CPU load.
+
+Run from the repository root:
+    python -m benchmarks.server_throughput --sessions 1 2 4 8 --seconds 10
+    python -m benchmarks.server_throughput --speed 0   # capacity: stream as fast as possible
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from convLSTM import ConvLSTM
+from liveInference import LIVE_SENSOR_ORDER
+from server import CaptureServer
+
+
+def write_model(directory, channels):
+    """Random ConvLSTM weights and an identity normalization (only the cost matters here)."""
+    model_path = os.path.join(directory, "model.pth")
+    normalization_path = os.path.join(directory, "normalization.npz")
+    torch.save(ConvLSTM(channels, num_classes=33, cnn_channel=256).state_dict(), model_path)
+    np.savez(normalization_path, mean=np.zeros(channels), std=np.ones(channels))
+    return model_path, normalization_path
+
+
+def run(count, args, directory, model_path, normalization_path):
+    server = CaptureServer(os.path.join(directory, f"recordings_{count}"), loops=args.loops,
+                           model_path=None if args.no_inference else model_path,
+                           normalization_path=normalization_path, max_batch=args.max_batch)
+    sessions = [server.create_session({
+        "id": f"subject{i}",
+        "transport": {"type": "simulated", "sensors": LIVE_SENSOR_ORDER, "speed": args.speed or None,
+                      "loss": args.loss, "seed": i},
+    }) for i in range(count)]
+    for session in sessions:
+        session.ble.submit(session.ble.main()).result()
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    for session in sessions:
+        session.start()
+    time.sleep(args.seconds)
+    elapsed, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    packets = sum(session.ble.transport.packets_sent for session in sessions)
+    predictions = sum(session.predictions for session in sessions)
+    batch = server.pool.mean_batch if server.pool is not None else 0
+    latency = sum(session.latency_ms_total for session in sessions) / max(predictions, 1)
+    server.close()
+
+    return {
+        "packets/s": packets / elapsed,
+        "predictions/s": predictions / elapsed,
+        "mean batch": batch,
+        "latency ms": latency,
+        "CPU %": cpu / elapsed * 100,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--speed", type=float, default=1.0, help="0: as fast as possible")
+    parser.add_argument("--loss", type=float, default=0.01)
+    parser.add_argument("--loops", type=int, default=1)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--no-inference", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        model_path, normalization_path = write_model(directory, len(LIVE_SENSOR_ORDER) * 9)
+        for count in args.sessions:
+            result = run(count, args, directory, model_path, normalization_path)
+            print(f"{count:2d} sessions: " + ", ".join(f"{key} {value:.1f}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Load test of the full BLE capture path with simulated sensors (simulatedSensors.py): scan,
+connect, stream through the real notify handlers into the buffers, packet metrics and
+session recorder, then stop. Reports per fleet size the sustained packet rate, the CPU
+time spent in the handlers, the CPU load of the whole process and the memory growth.
+
+--speed 1 streams in real time (the load of a live session), --speed 0 as fast as the
+handlers can take it (the capacity of the capture path).
+
+Run from the repository root:
+    python -m benchmarks.simulated_fleet --sensors 6 9 32 --seconds 10
+    python -m benchmarks.simulated_fleet --speed 0 --protocol 1
+"""
+import argparse
+import os
+import resource
+import tempfile
+import threading
+import time
+
+from bleConnection import BLE
+from simulatedSensors import SimulatedTransport, SyntheticSource
+
+
+class FakeStatus:
+    def set(self, value):
+        pass
+
+
+def rss_bytes():
+    """Current resident set size (peak size where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_fleet(sensors, seconds, args, recordings_dir):
+    transport = SimulatedTransport(SyntheticSource(sensors), rate_hz=args.rate, jitter_ms=args.jitter,
+                                   loss=args.loss, samples_per_packet=args.samples_per_packet,
+                                   protocol=args.protocol, speed=args.speed or None)
+    ble = BLE(FakeStatus(), name_to_uuid=transport.name_to_uuid, transport=transport)
+    ble.recordings_dir = recordings_dir
+    ble.packet_protocol = args.protocol
+    ble.submit(ble.main()).result()
+    if len(ble.connected_devices) != sensors:
+        raise RuntimeError(f"Only {len(ble.connected_devices)} of {sensors} sensors connected")
+
+    # Sample the memory while streaming (the first second is the warm-up: buffers, chunks)
+    memory = []
+    done = threading.Event()
+
+    def sample_memory():
+        while not done.wait(0.5):
+            memory.append(rss_bytes())
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    ble.start_streaming()
+    sampler.start()
+    time.sleep(seconds)
+    recorder = ble.recorder  # Created by the stream once it starts; cleared when it stops
+    ble.stop_streaming()
+    ble.stream_future.result()
+    recorder.join()
+    elapsed, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    done.set()
+    sampler.join()
+    ble.shutdown()
+
+    steady = memory[2:] or memory
+    lost = sum(s["lost"] for s in ble.metrics.summary().values())
+    return {
+        "packets/s": transport.packets_sent / elapsed,
+        "handler us/packet": transport.handler_time / max(transport.packets_sent, 1) * 1e6,
+        "handler load %": transport.handler_time / elapsed * 100,
+        "process CPU %": cpu / elapsed * 100,
+        "memory growth MB": (steady[-1] - steady[0]) / 1e6 if steady else float("nan"),
+        "lost (sent/detected)": f"{transport.packets_lost}/{lost}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sensors", type=int, nargs="+", default=[6, 9, 32])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rate", type=float, default=50)
+    parser.add_argument("--speed", type=float, default=1.0, help="0: as fast as possible")
+    parser.add_argument("--jitter", type=float, default=2.0, help="Mean delivery jitter in ms")
+    parser.add_argument("--loss", type=float, default=0.01)
+    parser.add_argument("--samples-per-packet", type=int, default=1)
+    parser.add_argument("--protocol", type=int, default=2, choices=[1, 2])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as recordings_dir:
+        for sensors in args.sensors:
+            result = run_fleet(sensors, args.seconds, args, os.path.join(recordings_dir, str(sensors)))
+            print(f"{sensors:3d} sensors: " + ", ".join(
+                f"{key} {value:.1f}" if isinstance(value, float) else f"{key} {value}"
+                for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
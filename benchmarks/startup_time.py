@@ -0,0 +1,134 @@
+"""
+Startup cost of the GUI: import-time breakdown of the modules loaded before the window
+appears, and time-to-first-frame (interpreter start until the main window is mapped).
+Every measurement runs in a fresh interpreter.
+
+Also lists which heavy modules (plotting, pandas, torch, bleak) were already loaded when
+the first frame was shown; with --check the run fails if any of them was, so a regression
+in the lazy imports is caught.
+
+Time-to-first-frame needs a display; without one only the import breakdown is reported.
+
+Run from the repository root:
+    python -m benchmarks.startup_time --runs 5
+    python -m benchmarks.startup_time --check
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+HEAVY_MODULES = ["matplotlib", "pandas", "torch", "bleak", "scipy"]
+
+FIRST_FRAME = """
+import json, sys, time
+from app import App
+app = App()
+while not app.winfo_ismapped():
+    app.update()
+app.update()
+print(json.dumps({"first_frame": time.time(), "loaded": sorted(m for m in %r if m in sys.modules)}))
+app.destroy()
+""" % HEAVY_MODULES
+
+
+def run_python(code, *options):
+    """Runs code in a fresh interpreter; returns (stdout, stderr, wall time since launch)."""
+    launched = time.time()
+    result = subprocess.run([sys.executable, *options, "-c", code], capture_output=True, text=True,
+                            cwd=os.getcwd())
+    return result, launched
+
+
+def import_breakdown(module):
+    """
+    Cumulative import time per top-level package imported (directly or indirectly) by `module`.
+
+    Returns:
+        tuple: (total import time in ms, {package: ms})
+    """
+    result, _ = run_python(f"import {module}", "-X", "importtime")
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    packages = defaultdict(float)
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1000
+        total += int(self_us) / 1000
+    return total, dict(packages)
+
+
+def import_time(module, runs):
+    """Median wall time of `import module` in fresh interpreters (ms), minus an empty run."""
+    def wall(code):
+        times = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            run_python(code)
+            times.append((time.perf_counter() - t0) * 1000)
+        return float(np.median(times))
+
+    return wall(f"import {module}") - wall("pass")
+
+
+def time_to_first_frame(runs):
+    """Median ms from process launch until the main window is mapped, plus the heavy modules loaded by then."""
+    times, loaded = [], None
+    for _ in range(runs):
+        result, launched = run_python(FIRST_FRAME)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        frame = json.loads(result.stdout.strip().splitlines()[-1])
+        times.append((frame["first_frame"] - launched) * 1000)
+        loaded = frame["loaded"]
+    return float(np.median(times)), loaded
+
+
+def loaded_after_import(module):
+    result, _ = run_python(f"import sys, {module}; print(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    return result.stdout.strip() if result.returncode == 0 else result.stderr.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=["bleConnection", "mainFrame", "app"])
+    parser.add_argument("--top", type=int, default=8, help="Packages shown in the breakdown")
+    parser.add_argument("--check", action="store_true", help="Fail if a heavy module loads before the first frame")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        try:
+            total, packages = import_breakdown(module)
+        except RuntimeError as e:
+            print(f"{module}: cannot import ({e})")
+            continue
+        print(f"import {module}: {import_time(module, args.runs):.0f} ms wall, {total:.0f} ms in imports, "
+              f"heavy modules loaded: {loaded_after_import(module)}")
+        for package, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {package:<20} {ms:8.1f} ms")
+        if module == "bleConnection" and any(package in packages for package in HEAVY_MODULES[:3]):
+            failed = True
+
+    ttff, loaded = time_to_first_frame(args.runs)
+    if ttff is None:
+        print(f"time to first frame: not measured ({loaded})")
+    else:
+        print(f"time to first frame: {ttff:.0f} ms, heavy modules loaded by then: {loaded}")
+        failed = failed or bool(loaded)
+
+    if args.check and failed:
+        sys.exit("Heavy modules are imported before the first frame")
+
+
+if __name__ == "__main__":
+    main()
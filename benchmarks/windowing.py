@@ -0,0 +1,193 @@
+"""
+Compares the notebooks' windowing loops against windowing.py on a REALDISP-sized frame
+matrix: run segmentation + group_activity_chunks, create_variable_size_windows,
+sliding_window/data_sliding_window, per-window majority labels and the per-sensor label
+vote of misalignment.apply_scenario. Every pair is checked for identical results (the
+variable-size windows for a valid shuffled tiling, as the random sizes are drawn differently).
+
+data_sliding_window is timed twice: as returned (windowing.windowed gives views) and with
+the windows copied out, like the float32 copy the notebook makes. The evaluators' batch
+fetch (WindowedDataset.__getitems__) compares the index gather with the view slice it
+now uses for consecutive windows.
+
+The synthetic recording has 81 channels (9 sensors x 9) and activity runs of a few
+hundred to a few thousand frames; --log-dir uses the real subjects (datasetBuilder cache).
+
+Run from the repository root:
+    python -m benchmarks.windowing --frames 1200000
+    python -m benchmarks.windowing --log-dir data/realdisp --cache-dir data/cache
+"""
+import argparse
+import time
+from collections import defaultdict
+
+import numpy as np
+
+import windowing
+from windowedDataset import WindowedDataset
+
+LABEL_ORDER = [4, 21, 10, 22, 19]
+
+
+def synthetic_recording(frames, channels=81, num_classes=34, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(200, 3000, size=frames // 200 + 1)
+    labels = np.repeat(rng.integers(0, num_classes, size=len(lengths)), lengths)[:frames]
+    features = rng.standard_normal((frames, channels), dtype=np.float32)
+    return features, labels.astype(np.int64)
+
+
+# Loops as they are in the notebooks / the previous implementations
+
+def loop_group_activity_chunks(X, y, label_order):
+    chunks_by_label = defaultdict(list)
+    start = 0
+    for i in range(1, len(y) + 1):
+        if i == len(y) or y[i] != y[i - 1]:
+            chunks_by_label[y[start]].append((X[start:i], y[start:i]))
+            start = i
+    X_grouped, y_grouped = [], []
+    for label in label_order:
+        for x_chunk, y_chunk in chunks_by_label.get(label, []):
+            X_grouped.append(x_chunk)
+            y_grouped.append(y_chunk)
+    return np.concatenate(X_grouped, axis=0), np.concatenate(y_grouped, axis=0)
+
+
+def loop_variable_size_windows(features, labels, min_size, max_size, rng):
+    n_samples = len(features)
+    windows, label_windows = [], []
+    i = 0
+    while i < n_samples - min_size:
+        window_size = rng.integers(min_size, max_size + 1)
+        if i + window_size > n_samples:
+            break
+        windows.append(features[i:i + window_size])
+        label_windows.append(labels[i:i + window_size])
+        i += window_size
+    permutation = rng.permutation(len(windows))
+    return (np.vstack([windows[j] for j in permutation]),
+            np.concatenate([label_windows[j] for j in permutation]))
+
+
+def loop_sliding_windows(features, labels, ws, ss):
+    data_x = np.lib.stride_tricks.as_strided(
+        features, shape=((len(features) - ws) // ss + 1, ws, features.shape[1]),
+        strides=(features.strides[0] * ss,) + features.strides).reshape(-1, ws, features.shape[1])
+    label_windows = np.lib.stride_tricks.as_strided(
+        labels, shape=((len(labels) - ws) // ss + 1, ws), strides=(labels.strides[0] * ss, labels.strides[0]))
+    data_y = np.asarray([[w[-1]] for w in label_windows])
+    return data_x.astype(np.float32), data_y.reshape(len(data_y))
+
+
+def loop_window_modes(label_windows):
+    return np.array([np.bincount(row).argmax() for row in label_windows])
+
+
+def loop_sensor_vote(sensor_labels):
+    length = sensor_labels.shape[1]
+    counts = np.zeros((length, sensor_labels.max() + 1), dtype=np.int32)
+    frame_index = np.arange(length)
+    for s in range(len(sensor_labels)):
+        counts[frame_index, sensor_labels[s]] += 1
+    return counts.argmax(axis=1)
+
+
+def valid_variable_order(order, n_frames, min_size=96, max_size=128):
+    """Whether `order` is a permutation of consecutive windows of min_size..max_size frames."""
+    breaks = np.flatnonzero(np.diff(order) != 1) + 1
+    sizes = np.diff(np.concatenate(([0], breaks, [len(order)])))
+    # Adjacent windows that stay in order merge into one run; each run is 1+ whole windows
+    return (np.array_equal(np.sort(order), np.arange(len(order))) and len(order) > n_frames - min_size - max_size
+            and bool((sizes >= min_size).all()))
+
+
+def timed(function, *args, repeat=1):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def report(name, loop_time, vectorized_time, same):
+    print(f"{name:<28} loop {loop_time * 1000:9.1f} ms   vectorized {vectorized_time * 1000:8.1f} ms   "
+          f"speedup {loop_time / vectorized_time:7.1f}x   {'' if same is None else 'ok' if same else 'MISMATCH'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=1_200_000)
+    parser.add_argument("--log-dir", help="Directory with subjectN_ideal.log files (synthetic data otherwise)")
+    parser.add_argument("--cache-dir", default="cache", help="datasetBuilder cache for --log-dir")
+    parser.add_argument("--window", type=int, default=64)
+    parser.add_argument("--step", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.log_dir:
+        from datasetBuilder import load_subjects
+
+        subjects = load_subjects(args.log_dir, args.cache_dir)
+        features = np.concatenate([np.asarray(x) for x, _ in subjects.values()])
+        labels = np.concatenate([np.asarray(y) for _, y in subjects.values()]).astype(np.int64)
+    else:
+        features, labels = synthetic_recording(args.frames)
+    runs = len(windowing.segment_runs(labels)[0])
+    print(f"{len(features)} frames x {features.shape[1]} channels, {runs} activity runs\n")
+
+    # Run segmentation + grouping by activity
+    loop_time, (x_loop, y_loop) = timed(loop_group_activity_chunks, features, labels, LABEL_ORDER)
+    vectorized_time, (x_vec, y_vec) = timed(
+        lambda: (lambda order: (features[order], labels[order]))(windowing.activity_order(labels, LABEL_ORDER)),
+        repeat=args.repeat)
+    report("group_activity_chunks", loop_time, vectorized_time,
+           np.array_equal(x_loop, x_vec) and np.array_equal(y_loop, y_vec))
+    order_time, _ = timed(windowing.activity_order, labels, LABEL_ORDER, repeat=args.repeat)
+    report("  (frame order only)", loop_time, order_time, None)
+
+    # Variable-size windows, shuffled (random sizes are drawn differently, so check the
+    # structure instead: a shuffled tiling of the frames with windows of 96-128 frames)
+    loop_time, _ = timed(loop_variable_size_windows, features, labels, 96, 128, np.random.default_rng(1))
+    vectorized_time, (x_vec, order) = timed(
+        lambda: (lambda order: (features[order], order))(
+            windowing.variable_size_order(len(features), 96, 128, np.random.default_rng(1))))
+    report("create_variable_size_windows", loop_time, vectorized_time, valid_variable_order(order, len(features)))
+    order_time, _ = timed(windowing.variable_size_order, len(features), 96, 128, np.random.default_rng(1))
+    report("  (frame order only)", loop_time, order_time, None)
+
+    # Fixed windows with last-frame labels
+    loop_time, (x_loop, y_loop) = timed(loop_sliding_windows, features, labels, args.window, args.step)
+    vectorized_time, (x_vec, y_vec) = timed(windowing.windowed, features, labels, args.window, args.step,
+                                            repeat=args.repeat)
+    report("data_sliding_window", loop_time, vectorized_time,
+           np.array_equal(x_loop, x_vec) and np.array_equal(y_loop, y_vec))
+    copy_time, x_copy = timed(lambda: np.array(windowing.windowed(features, labels, args.window, args.step)[0]),
+                              repeat=args.repeat)
+    report("  (windows copied)", loop_time, copy_time, np.array_equal(x_loop, x_copy))
+
+    # Evaluation batches: index gather (shuffled/tiled datasets) vs slice of the window view
+    dataset = WindowedDataset(features, labels, args.window, args.step)
+    batches = [range(start, min(start + 256, len(dataset))) for start in range(0, len(dataset), 256)]
+    gather_time, gathered = timed(lambda: [dataset.__getitems__(list(b)) for b in batches], repeat=args.repeat)
+    view_time, sliced = timed(lambda: [dataset.__getitems__(b) for b in batches], repeat=args.repeat)
+    report("WindowedDataset batches", gather_time, view_time,
+           all(np.array_equal(g[0], v[0]) and np.array_equal(g[1], v[1]) for g, v in zip(gathered, sliced)))
+
+    # Majority label of every window
+    label_windows = windowing.sliding_windows(labels, args.window, args.step)
+    loop_time, loop_modes = timed(loop_window_modes, label_windows)
+    vectorized_time, modes = timed(windowing.window_labels, label_windows, "mode", repeat=args.repeat)
+    report("window majority labels", loop_time, vectorized_time, np.array_equal(loop_modes, modes))
+
+    # Per-frame vote across 9 sensors (misalignment.apply_scenario)
+    rng = np.random.default_rng(2)
+    sensor_labels = labels[np.clip(np.arange(len(labels)) + rng.integers(-3, 4, size=(9, 1)), 0, len(labels) - 1)]
+    loop_time, loop_votes = timed(loop_sensor_vote, sensor_labels, repeat=args.repeat)
+    vectorized_time, votes = timed(windowing.majority_labels, sensor_labels.T, repeat=args.repeat)
+    report("sensor label vote", loop_time, vectorized_time, np.array_equal(loop_votes, votes))
+
+
+if __name__ == "__main__":
+    main()
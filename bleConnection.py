@@ -1,17 +1,36 @@
 import asyncio
+import json
+import logging
+import os
 import struct
 import numpy as np
-from bleak import BleakScanner, BleakClient
 import threading
-import matplotlib.pyplot as plt
-from collections import Counter
 import time
-import csv
-import pandas as pd
+from sensorBuffer import SensorBuffer
+from sessionCatalog import SessionCatalog
+from sessionRecorder import SessionRecorder
+from packetProtocol import PacketDecoder
+from packetMetrics import PacketMetrics
+from connectionManager import ConnectionManager
+from bleTransport import BleakTransport
+
+logger = logging.getLogger(__name__)
 
 
 class BLE:
-    def __init__(self, status_var):
+    def __init__(self, status_var, name_to_uuid=None, transport=None, loop=None):
+        """
+        Args:
+            status_var: Receiver of status messages with a set(text) method. Handlers run in
+                the BLE service thread, so this should be thread-safe (statusChannel.StatusChannel);
+                the GUI displays it from its own thread.
+            name_to_uuid (dict | None): Sensor name -> characteristic UUID of the sensors to
+                connect; defaults to the six RFduinos below.
+            transport: Backend creating scanners and clients (default bleTransport.BleakTransport;
+                simulatedSensors.SimulatedTransport runs without hardware).
+            loop (asyncio.AbstractEventLoop | None): Running service loop shared with other BLE
+                instances (see server.py); by default each instance starts its own on first use.
+        """
         self.connected_devices = []           # List to store connected RFduino devices
         self.connected_devices_names = []     # Record names of connected devices
         self.RFDUINO_NAMES = ["Head", "RArm", "RShank", "RThigh", "Back", "LShank", "LArm"]  # List of all RFduino names
@@ -31,6 +50,11 @@ class BLE:
             "12340015-cbed-76db-9423-74ce6ab51dee": "RThigh",
             "12340015-cbed-76db-9423-74ce6ab53dee": "LArm"
         }
+        if name_to_uuid is not None:
+            self.RFDUINO_NAMES = list(name_to_uuid)
+            self.RFDUINO_NAME_TO_UUID = dict(name_to_uuid)
+            self.RFDUINO_UUID_TO_NAME = {uuid: name for name, uuid in name_to_uuid.items()}
+        self.transport = transport if transport is not None else BleakTransport()
         self.RFDUINO_ADDRESS_TO_UUID = {}     # Get uuid by BleakClient address
         self.is_running = False               # Flag for running function
         self.is_streaming = False
@@ -41,9 +65,30 @@ class BLE:
         self.stop_time = None
         self.time_synced = False
         self.syncing_intervals = {}
-        self.receive_times = {}
         self.sensor_intervals = {}  # Intervals between AccelGyro and Mag extraction intervals
-        self.sensor_readings = {}
+        self.sensor_readings = {}  # SensorBuffer of raw samples + receive times per sensor name
+        self.recordings_dir = "recordings"  # Sessions are streamed to disk here while recording
+        self.live_capacity = 3000           # Samples kept in memory per sensor while recording (~1 min at 50 Hz)
+        self.recorder = None
+        self.session_id = None              # Catalog id of the current/last recording (see sessionCatalog)
+        self.session_label = None           # Label stored with the recordings in the catalog
+        self.chunk_writer = None            # Shared sessionRecorder.ChunkWriter (None: one per recording)
+        self.sample_rate_hz = 50            # Nominal sensor rate and rate of the aligned export grid
+        self.live_inference = None          # Optional liveInference.LiveInference fed from the notify handler
+        self.packet_protocol = 2            # 2: multi-sample packets with sequence numbers, 1: legacy <9h packets
+        self.packet_decoder = PacketDecoder(period_ms=1000 / self.sample_rate_hz)
+        self.metrics = PacketMetrics(nominal_interval_ms=1000 / self.sample_rate_hz)  # Per-sensor packet timing, loss and clock fit
+        self.loop = loop                    # Event loop of the BLE service thread (owns every BleakClient)
+        self.owns_loop = loop is None       # Shared loops are stopped by their owner
+        self.loop_thread = None
+        self.stop_event = None              # Set to end the current stream
+        self.stream_future = None           # concurrent.futures.Future of the running stream()
+        self.connection_manager = None      # Scans, connects and reconnects the sensors (see connectionManager.py)
+
+    @property
+    def clock_fits(self):
+        """Online device->host clock fit (ClockFit) of every sensor with timestamped packets."""
+        return self.metrics.clock_fits
 
     # 1. Full 9-axis sensor data handler (accelerometer, gyroscope, magnetometer)
     def data_handler_for_sensor_readings(self, sender, data):
@@ -53,11 +98,52 @@ class BLE:
         Format: <hhhhhhhhh
         """
         try:
-            ax, ay, az, gx, gy, gz, mx, my, mz = struct.unpack("<hhhhhhhhh", data)
+            t_received = time.time() * 1000 - self.connect_time
             sensor_name = self.RFDUINO_UUID_TO_NAME[sender.uuid]
-            self.sensor_readings.setdefault(sensor_name, []).append([ax, ay, az, gx, gy, gz, mx, my, mz])
-        except struct.error as e:
-            print(f"Error unpacking 9-axis sensor data: {e}")
+            buffer = self.sensor_readings.get(sensor_name)
+            if buffer is None:
+                # While recording to disk only a fixed live window is kept in memory
+                buffer = self.sensor_readings[sensor_name] = SensorBuffer(
+                    width=9, dtype="<i2", capacity=self.live_capacity, ring=self.recorder is not None)
+            buffer.append_packet(data, t_received)
+            self.metrics.record(sensor_name, t_received)
+            if self.recorder is not None:
+                self.recorder.append_packet(sensor_name, data, t_received)
+            if self.live_inference is not None:
+                self.live_inference.observe(sensor_name, data, t_received)
+        except ValueError as e:
+            logger.warning(f"Error unpacking 9-axis sensor data: {e}")
+
+    # 1b. Multi-sample 9-axis packets (protocol v2, see packetProtocol.py)
+    def data_handler_for_sample_packets(self, sender, data):
+        """
+        Handles protocol v2 packets: a 2-byte header (version/flags/count, sequence number),
+        an optional uint32 device timestamp and N x 9 int16 samples.
+        The samples are decoded as one NumPy view and copied into the buffers as a block;
+        sequence gaps (cross-checked against the receive times) are counted as lost packets.
+        """
+        try:
+            t_received = time.time() * 1000 - self.connect_time
+            sensor_name = self.RFDUINO_UUID_TO_NAME[sender.uuid]
+            samples, device_times = self.packet_decoder.decode(sensor_name, data, t_received)
+
+            # The last sample was just received; earlier samples of the packet are one period apart
+            times = t_received - (len(samples) - 1 - np.arange(len(samples))) * self.packet_decoder.period_ms
+            buffer = self.sensor_readings.get(sensor_name)
+            if buffer is None:
+                buffer = self.sensor_readings[sensor_name] = SensorBuffer(
+                    width=9, dtype="<i2", capacity=self.live_capacity, ring=self.recorder is not None)
+            buffer.extend(samples, times)
+
+            metrics = self.metrics.sensor(sensor_name)
+            metrics.record(t_received, len(samples), self.packet_decoder.lost(sensor_name))
+            metrics.clock.update_batch(device_times, times)
+            if self.recorder is not None:
+                self.recorder.append_samples(sensor_name, samples, times, device_times)
+            if self.live_inference is not None:
+                self.live_inference.observe(sensor_name, samples, times, device_times)
+        except (ValueError, struct.error) as e:
+            logger.warning(f"Error decoding sample packet: {e}")
 
     # 2. Short version (float values): used in testing/simplified packets
     def data_handler_for_sensor_readings_short(self, sender, data):
@@ -67,12 +153,14 @@ class BLE:
         Format: <fff
         """
         try:
-            print("hey")
-            ax, gx, mx = struct.unpack("<fff", data)
+            t_received = time.time() * 1000 - self.connect_time
             sensor_name = self.RFDUINO_UUID_TO_NAME[sender.uuid]
-            self.sensor_readings.setdefault(sensor_name, []).append([ax, gx, mx])
-        except struct.error as e:
-            print(f"Error unpacking short float sensor data: {e}")
+            buffer = self.sensor_readings.get(sensor_name)
+            if buffer is None:
+                buffer = self.sensor_readings[sensor_name] = SensorBuffer(width=3, dtype="<f4")
+            buffer.append_packet(data, t_received)
+        except ValueError as e:
+            logger.warning(f"Error unpacking short float sensor data: {e}")
 
     # 3. Timestamping for drift/misalignment experiments
     async def data_handler_for_timestamping(self, sender, data):
@@ -84,7 +172,6 @@ class BLE:
         try:
             ax, ay, az, gx, gy, gz, timestamp = struct.unpack("<hhhhhhI", data)
             t_received = time.time() * 1000 - self.connect_time
-            self.receive_times.setdefault(sender.uuid, []).append(t_received)
 
             if not self.time_synced:
                 if len(self.device_data) > 5:
@@ -93,9 +180,14 @@ class BLE:
 
             adjusted_timestamp = timestamp - self.syncing_intervals[sender.uuid]
             sensor_name = self.RFDUINO_UUID_TO_NAME[sender.uuid]
+
+            # Track packet timing plus clock offset and drift of this sensor against the host
+            metrics = self.metrics.sensor(sensor_name)
+            metrics.record(t_received)
+            metrics.clock.update(timestamp, t_received)
             self.device_data.setdefault(sensor_name, []).append(adjusted_timestamp)
         except struct.error as e:
-            print(f"Error unpacking timestamped data: {e}")
+            logger.warning(f"Error unpacking timestamped data: {e}")
 
     # 4. Extraction intervals for AccelGyro and Magnetometer separately
     def data_handler_for_sensor_interval_data(self, sender, data):
@@ -110,7 +202,7 @@ class BLE:
             sensor_name = self.RFDUINO_UUID_TO_NAME[sender.uuid]
             self.sensor_intervals.setdefault(sensor_name, []).append([accel_gyro_interval, mag_interval])
         except struct.error as e:
-            print(f"Error unpacking interval data: {e}")
+            logger.warning(f"Error unpacking interval data: {e}")
 
     # 5. Extraction interval for grouped sensors (used when only one interval per cycle is sent)
     def data_handler_for_sensor_interval_data_grouped(self, sender, data):
@@ -124,7 +216,7 @@ class BLE:
             sensor_name = self.RFDUINO_UUID_TO_NAME[sender.uuid]
             self.sensor_intervals.setdefault(sensor_name, []).append(group_interval)
         except struct.error as e:
-            print(f"Error unpacking grouped interval data: {e}")
+            logger.warning(f"Error unpacking grouped interval data: {e}")
 
     # 6. Euler angles handler (formatted as a decoded UTF-8 string)
     def data_handler_for_euler_angles(self, sender, data):
@@ -134,343 +226,278 @@ class BLE:
         """
         try:
             decoded_data = data.decode('utf-8')
-            print(decoded_data)
+            logger.debug(decoded_data)
             parts = decoded_data.split()
             self.status_var.set(f"x: {parts[1]}   y: {parts[3]}")  # Adjust index if format differs
             self.device_data.setdefault(sender.uuid, []).append(parts)
         except Exception as e:
-            print(f"Error decoding euler angles: {e}")
+            logger.warning(f"Error decoding euler angles: {e}")
 
-    async def connect_to_rfduino(self, device):
-        """Function to connect to a single RFduino device and set up notifications."""
-        try:
-            client = BleakClient(device)  # Create persistent BleakClient instance
-            await client.connect()  # Explicitly connect
+    def register_client(self, client, name):
+        """Records a newly connected sensor (called by the ConnectionManager)."""
+        self.connected_devices.append(client)  # Store the connected client
+        self.connected_devices_names.append(name)
+        self.status_var.set(f"Connected to {name} ({client.address})")
+        logger.info(f"Connected to {name} ({client.address})")
 
-            if client.is_connected:
-                self.connected_devices.append(client)  # Store the connected client
-                self.connected_devices_names.append(device.name)
-                self.status_var.set(f"Connected to {device.name} ({device.address})")
-                print(f"Connected to {device.name} ({device.address})")
+        # Map device address to characteristic UUID
+        self.RFDUINO_ADDRESS_TO_UUID[client.address] = self.RFDUINO_NAME_TO_UUID[name]
 
-                # Map device address to characteristic UUID
-                self.RFDUINO_ADDRESS_TO_UUID[device.address] = self.RFDUINO_NAME_TO_UUID[device.name]
+    def on_reconnected(self, name, gap_start, gap_end):
+        """
+        Called by the ConnectionManager once a dropped sensor is back; the missing span is
+        stored with the recording so the export can mark it.
+        """
+        if self.recorder is not None:
+            self.recorder.record_gap(name, gap_start, gap_end)
+        self.packet_decoder.resync(name, gap_end - gap_start)
 
-            else:
-                print(f"Failed to connect to {device.name} ({device.address})")
-                self.status_var.set(f"Failed to connect to {device.name}")
-        except Exception as e:
-            self.status_var.set(f"Failed to connect to {device.name}: {e}")
-            print(f"Failed to connect to {device.name}: {e}")
+    def notification_handler(self):
+        """Notify handler of the configured packet protocol."""
+        if self.packet_protocol == 2:
+            return self.data_handler_for_sample_packets
+        return self.data_handler_for_sensor_readings
 
     async def main(self):
-        # Discover BLE devices
-        devices = await BleakScanner.discover(timeout=5)  # Searches devices for 5 seconds
-        #[print(d.name) for d in devices if d.name]
-        print(len(devices))
-        rfduino_devices = [d for d in devices if d.name in self.RFDUINO_NAMES]
+        # Connect each sensor as soon as it is discovered; the manager also reconnects dropped sensors
+        if self.connection_manager is None:
+            self.connection_manager = ConnectionManager(self)
+        names = await self.connection_manager.connect_all()
 
-        if not rfduino_devices:
+        if not names:
             self.status_var.set("No RFduinos detected")
             return
 
-        self.status_var.set(f"Found {len(rfduino_devices)} RFduino devices")
-
-        # Connect to each RFduino simultaneously
-        tasks = [self.connect_to_rfduino(device) for device in rfduino_devices]
-        await asyncio.gather(*tasks)  # Connect to all devices concurrently
-        self.connect_time = time.time() * 1000  # Convert seconds to milliseconds
-
         # Print final connected devices
         connected_devices = "\nConnected RFduino devices:"
         for name in self.connected_devices_names:
             connected_devices += "\n" + name
         self.status_var.set(connected_devices)
 
+    def _ensure_loop(self):
+        """Starts the BLE service thread and its event loop on first use."""
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            self.loop_thread = threading.Thread(target=self.loop.run_forever, name="ble-service", daemon=True)
+            self.loop_thread.start()
+        return self.loop
+
+    def submit(self, coroutine):
+        """
+        Schedules a coroutine on the BLE service loop from any thread (e.g. the GUI).
+
+        Returns:
+            concurrent.futures.Future: Resolves with the coroutine's result.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+
     def run(self):
         if self.is_running:
             self.status_var.set("Connection is already running")
             return  # Exit if already running
 
         self.is_running = True  # Set the flag to indicate that scanning has started
+        self.status_var.set("Connecting...")
 
-        # Run the asyncio event loop in a separate thread
-        def run_main():
-            self.status_var.set("Connecting...")
-            try:
-                asyncio.run(self.main())
-            finally:
-                self.is_running = False  # Reset flag
+        def finished(future):
+            self.is_running = False  # Reset flag
+            if future.exception() is not None:
+                logger.error(f"Error while connecting: {future.exception()}")
 
-        threading.Thread(target=run_main).start()
+        # Connect on the service loop, which also runs the streams of these clients
+        self.submit(self.main()).add_done_callback(finished)
 
     async def stream(self):
         """Keep the streaming active for all connected devices."""
         try:
+            # The catalog (SQLite) and session files are created on an executor thread, so
+            # neither this loop nor the Tk thread waits on the disk
+            try:
+                self.session_id, self.recorder = await asyncio.get_running_loop().run_in_executor(
+                    None, self._create_recording)
+            except Exception as e:
+                logger.error(f"Error creating the session, streaming without recording: {e}")
+
             t_now = time.time() * 1000
             self.checkpoint = int(t_now - self.connect_time)
+            if self.connection_manager is not None:
+                self.connection_manager.start_session()
 
             # Start streaming each RFduino simultaneously
-            tasks = [client.start_notify(self.RFDUINO_ADDRESS_TO_UUID[client.address], self.data_handler_for_sensor_readings) for
+            # (a sensor that is reconnecting gets subscribed by the ConnectionManager)
+            handler = self.notification_handler()
+            tasks = [client.start_notify(self.RFDUINO_ADDRESS_TO_UUID[client.address], handler) for
                      client in self.connected_devices]
-            await asyncio.gather(*tasks)
+            await asyncio.gather(*tasks, return_exceptions=True)
 
-            # Ensure the streaming loop remains active
-            while self.is_streaming:
-                await asyncio.sleep(1)
+            # Stream until stop_streaming sets the event
+            await self.stop_event.wait()
         except Exception as e:
-            print(f"Error during streaming: {e}")
+            logger.error(f"Error during streaming: {e}")
         finally:
             # Stop streaming each RFduino simultaneously
             tasks = [client.stop_notify(self.RFDUINO_ADDRESS_TO_UUID[client.address]) for client in
                      self.connected_devices]
-            await asyncio.gather(*tasks)
+            await asyncio.gather(*tasks, return_exceptions=True)  # Disconnected sensors cannot stop
             self.stop_time = int(time.time() * 1000) - self.connect_time
+            logger.info(self.metrics.report())
+            if self.connection_manager is not None:
+                logger.info(f"Reconnects: {self.connection_manager.reconnects}")
+                if self.recorder is not None:
+                    for name, gap_start in self.connection_manager.open_gaps().items():
+                        self.recorder.record_gap(name, gap_start, None)
+            if self.recorder is not None:
+                # Hand the last partial chunks to the writer thread (no blocking on disk I/O here);
+                # metrics.json and the catalog are written there once the chunks are on disk
+                session_dir, session_id, metrics = self.recorder.session_dir, self.session_id, self.metrics.to_dict()
+                self.recorder.close(on_done=lambda: self._finish_recording(session_dir, session_id, metrics))
+                logger.info(f"Session recorded to {self.recorder.session_dir}")
+                self.recorder = None
         self.device_data = {}
 
-    def _run_streaming_loop(self):
-        """Run the asyncio event loop for the stream method."""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    def _finish_recording(self, session_dir, session_id, metrics):
+        """
+        Writes metrics.json and marks the session complete in the catalog. Runs on the
+        recorder's writer thread after the last chunk, so the SQLite update never stalls
+        the BLE service loop and a 'complete' session is always fully on disk.
+        """
+        with open(os.path.join(session_dir, "metrics.json"), "w") as f:
+            json.dump(metrics, f, indent=2)
         try:
-            loop.run_until_complete(self.stream())
+            SessionCatalog(self.recordings_dir).finish(session_id, metrics["sensors"])
         except Exception as e:
-            print(f"Error in streaming loop: {e}")
-        finally:
-            loop.close()
+            logger.error(f"Error updating the session catalog: {e}")
+
+    def _create_recording(self):
+        """Registers a new session in the catalog and opens its recorder (blocking I/O)."""
+        session_id, session_dir = SessionCatalog(self.recordings_dir).create_session(self.session_label,
+                                                                                     self.connect_time)
+        return session_id, SessionRecorder(session_dir, writer=self.chunk_writer)
 
     def start_streaming(self):
+        if self.stream_future is not None and not self.stream_future.done():
+            self.status_var.set("Already streaming")
+            return
         self.is_streaming = True
         print("Streaming Started . . .")
         if self.connected_devices:
-            # Start the streaming loop in a new thread
-            threading.Thread(target=self._run_streaming_loop, daemon=True).start()
+            self.session_id = None  # Set by stream() once the recording is created
+            self.sensor_readings = {}
+            self.metrics.reset()
+            self.packet_decoder.reset()
+            if self.live_inference is not None:
+                self.live_inference.reset()
+
+            # Stream on the service loop that connected the clients
+            self.stop_event = asyncio.Event()
+            self.stream_future = self.submit(self.stream())
         else:
             self.status_var.set("Connect to devices first")
 
     def stop_streaming(self):
+        # The recorder is flushed and closed by the streaming loop; CSV export is an offline step
+        # (see sessionRecorder.export_session_csv)
         self.is_streaming = False
         self.stop_time = int(time.time() * 1000 - self.connect_time)
-        self.save_sensor_readings_as_csv()
-
+        if self.stop_event is not None:
+            self.loop.call_soon_threadsafe(self.stop_event.set)
+
+    async def disconnect(self):
+        """Disconnects every connected client."""
+        if self.connection_manager is not None:
+            await self.connection_manager.close()
+        await asyncio.gather(*[client.disconnect() for client in self.connected_devices], return_exceptions=True)
+        self.connected_devices = []
+        self.connected_devices_names = []
+
+    def shutdown(self, timeout=5):
+        """Stops streaming, disconnects the sensors and ends the BLE service thread."""
+        if self.loop is None:
+            return
+        if self.is_streaming:
+            self.stop_streaming()
+        try:
+            self.submit(self.disconnect()).result(timeout)
+        except Exception as e:
+            logger.error(f"Error while disconnecting: {e}")
+        if self.owns_loop:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.loop_thread.join(timeout)
+            self.loop = None
+
+    # Post-session analysis and export live in sessionAnalysis, so matplotlib and pandas are
+    # only imported on first use
     def plot_data(self):
-        """
-        Plots X, Y, and Z Euler angles over time for all connected sensors.
-        Each sensor's data is extracted from `self.device_data`, which stores
-        timestamped angle readings per UUID.
-        """
-        plt.figure(figsize=(12, 8))
-
-        for uuid, values in self.device_data.items():
-            name = self.RFDUINO_UUID_TO_NAME[uuid]
-
-            # Extract timestamps and convert to seconds (relative to first reading)
-            timestamps = [int(item[0]) for item in values]
-            min_time = min(timestamps)
-            timestamps_in_seconds = [(t - min_time) / 1000 for t in timestamps]
-
-            # Extract X, Y, Z angles from data
-            x_angles = [int(item[1]) for item in values]
-            y_angles = [int(item[2]) for item in values]
-            z_angles = [int(item[3]) for item in values]
-
-            # Plot all three axes
-            plt.plot(timestamps_in_seconds, x_angles, label=f"{name} - X Angle")
-            plt.plot(timestamps_in_seconds, y_angles, label=f"{name} - Y Angle")
-            plt.plot(timestamps_in_seconds, z_angles, label=f"{name} - Z Angle")
+        """Plots X, Y and Z Euler angles over time for all connected sensors (see sessionAnalysis.plot_data)."""
+        import sessionAnalysis
 
-        plt.legend()
-        plt.title("Comparison of Device Euler Angles (X, Y, Z)")
-        plt.xlabel("Time (seconds)")
-        plt.ylabel("Angle (degrees)")
-        plt.grid(True)
-        plt.show()
+        sessionAnalysis.plot_data(self)
 
     def plot_data2(self):
-        """
-        Plots only the Y Euler angle over time for all connected sensors.
-        This is useful for focused analysis of a single axis, such as trunk rotation.
-        """
-        plt.figure(figsize=(12, 8))
-
-        for uuid, values in self.device_data.items():
-            name = self.RFDUINO_UUID_TO_NAME[uuid]
+        """Plots the Y Euler angle over time for all connected sensors (see sessionAnalysis.plot_data2)."""
+        import sessionAnalysis
 
-            # Time normalization
-            timestamps = [int(item[0]) for item in values]
-            min_time = min(timestamps)
-            timestamps_in_seconds = [(t - min_time) / 1000 for t in timestamps]
+        sessionAnalysis.plot_data2(self)
 
-            # Only plot Y angle
-            y_angles = [int(item[2]) for item in values]
-            plt.plot(timestamps_in_seconds, y_angles, label=f"{name} - Y Angle")
+    def plot_sensor_readings(self, axis=2):
+        """Plots one raw axis over host receive time for every sensor (see sessionAnalysis.plot_sensor_readings)."""
+        import sessionAnalysis
 
-        plt.legend()
-        plt.title("Y Angle Over Time")
-        plt.xlabel("Time (seconds)")
-        plt.ylabel("Y Angle (degrees)")
-        plt.grid(True)
-        plt.show()
-        plt.savefig("_plot.png", dpi=300)
+        sessionAnalysis.plot_sensor_readings(self, axis)
 
-    def plot_data4(self):
-        """
-        Analyzes timing intervals between consecutive sensor data packets for each device.
-        Useful for identifying sampling jitter and evaluating synchronization stability.
-        Outputs:
-            - Start and end times
-            - Number of frames received
-            - Max/min interval between packets
-            - Frequency count of interval durations
-        """
-        for uuid, values in self.device_data.items():
-            print("\n" + "=" * 60)
-            print(f"Device: {uuid} ({self.RFDUINO_UUID_TO_NAME[uuid]})")
+    def plot_recording(self, session_id=None, axis=2, start_ms=None, end_ms=None):
+        """Plots one raw axis of a recorded session from its downsampled levels (see sessionAnalysis.plot_recording)."""
+        import sessionAnalysis
 
-            # Extract timestamps from sensor data (assumes index 0 contains time)
-            timestamps = [int(item[0]) for item in values]
+        sessionAnalysis.plot_recording(self, session_id, axis, start_ms, end_ms)
 
-            print(f"Starting time Sensor / Host: {timestamps[0]} / {int(self.checkpoint)}")
-            print(f"Ending time   Sensor / Host: {timestamps[-1]} / {self.stop_time}")
-            print(f"Number of frames received: {len(timestamps)}")
-
-            # Compute time intervals between consecutive packets
-            intervals = [timestamps[i + 1] - timestamps[i] for i in range(len(timestamps) - 1)]
+    def plot_data4(self):
+        """Prints the timing intervals between consecutive packets of each device (see sessionAnalysis.plot_data4)."""
+        import sessionAnalysis
 
-            print(f"Max interval: {max(intervals)} ms")
-            print(f"Min interval: {min(intervals)} ms")
-            print(f"Interval distribution: {Counter(intervals)}")
+        sessionAnalysis.plot_data4(self)
 
     def save_sensor_timestamps_as_csv(self, filename="sensor_timestamps_9.csv"):
-        """
-        Saves the collected timestamp data from all sensors into a CSV file.
-
-        Args:
-            filename (str): Name of the output CSV file.
+        """Saves the collected timestamps of all sensors to a CSV file (see sessionAnalysis.save_sensor_timestamps_as_csv)."""
+        import sessionAnalysis
 
-        Output:
-            CSV file where each column contains timestamps from one sensor.
-        """
-        # Get list of sensor UUIDs (keys in the device_data dictionary)
-        sensor_names = list(self.device_data.keys())
-
-        # Prepare column headers (human-readable sensor names)
-        header = [f"{sensor}" for sensor in sensor_names]
-
-        # Align data by transposing rows: zip() groups data from each sensor by index
-        rows = zip(*[self.device_data[sensor] for sensor in sensor_names])
-
-        # Write data to CSV
-        with open(filename, "w", newline="") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(header)  # Write the header row
-            writer.writerows(rows)  # Write each row of aligned sensor timestamps
-
-        print(f"CSV file saved: {filename}")
+        sessionAnalysis.save_sensor_timestamps_as_csv(self, filename)
 
     def save_sensor_intervals_as_csv(self, filename="sensor_intervals_morning.csv"):
-        """
-        Saves sensor interval data (e.g., time between AccelGyro and Magnetometer readings)
-        into a CSV file, aligning all sensors by the shortest list length.
+        """Saves the AccelGyro/Magnetometer extraction intervals to a CSV file (see sessionAnalysis.save_sensor_intervals_as_csv)."""
+        import sessionAnalysis
 
-        Args:
-            filename (str): Output CSV file name.
-        """
-
-        #  Determine the shortest interval list length across all sensors
-        min_len = min(len(values) for values in self.sensor_intervals.values())
-        print(f"Minimum common length: {min_len}")
-
-        #  Trim each sensor's interval list to match the shortest length
-        trimmed_intervals = {
-            sensor: values[:min_len] for sensor, values in self.sensor_intervals.items()
-        }
-
-        #  Prepare the CSV header with sensor names
-        sensor_names = list(trimmed_intervals.keys())
-        header = [f"{sensor}" for sensor in sensor_names]
-
-        # Transpose data — each row represents one aligned time step across all sensors
-        rows = zip(*[trimmed_intervals[sensor] for sensor in sensor_names])
-
-        # Write to CSV
-        with open(filename, "w", newline="") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(header)  # Column names
-            writer.writerows(rows)  # Sensor interval values
-
-        print(f"CSV file saved: {filename}")
+        sessionAnalysis.save_sensor_intervals_as_csv(self, filename)
 
     def save_sensor_intervals_grouped_as_csv(self, filename="sensor_intervals_grouped.csv"):
-        """
-        Saves grouped sensor interval data (e.g., one interval per read cycle) to a CSV file.
-        Trims all sensors' data to the shortest length for alignment.
-
-        Args:
-            filename (str): Desired output CSV filename.
-        """
-
-        # Find the shortest interval list across all sensors
-        min_len = min(len(values) for values in self.sensor_intervals.values())
-        print(f"Min Len: {min_len}")
-
-        # Trim each sensor's interval list to this minimum length for alignment
-        trimmed_intervals = {
-            sensor: values[:min_len] for sensor, values in self.sensor_intervals.items()
-        }
+        """Saves the grouped extraction intervals to a CSV file (see sessionAnalysis.save_sensor_intervals_grouped_as_csv)."""
+        import sessionAnalysis
 
-        #  Generate CSV headers using sensor names
-        sensor_names = list(trimmed_intervals.keys())
-        header = [f"{sensor}" for sensor in sensor_names]
+        sessionAnalysis.save_sensor_intervals_grouped_as_csv(self, filename)
 
-        #  Prepare aligned rows (each row is one timestamped interval per sensor)
-        rows = zip(*[trimmed_intervals[sensor] for sensor in sensor_names])
-
-        #  Save to CSV
-        with open(filename, "w", newline="") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(header)  # Write header row
-            writer.writerows(rows)  # Write data rows
+    def save_sensor_readings_as_csv(self, filename="sensor_data2.csv"):
+        """Saves the time-aligned 9-axis readings of all sensors to a CSV file (see sessionAnalysis.save_sensor_readings_as_csv)."""
+        import sessionAnalysis
 
-        print(f"CSV file saved: {filename}")
+        sessionAnalysis.save_sensor_readings_as_csv(self, filename)
 
-    def save_sensor_readings_as_csv(self, filename="sensor_data2.csv"):
+    def save_packet_metrics(self, filename="packet_metrics.json"):
         """
-        Saves synchronized 9-axis IMU data (Accel, Gyro, Mag) from multiple sensors into a CSV file.
-        Ensures that all sensors contribute equally by trimming to the shortest length.
+        Saves the packet statistics of the last stream (rate, inter-arrival histogram, max gap,
+        loss, clock offset/drift per sensor) as JSON, or the histograms as a Parquet table if
+        the file name ends in .parquet.
 
         Args:
             filename (str): Output file name.
         """
-
-        # Define the expected order of sensors (must match self.sensor_readings structure)
-        sensor_order = ["RArm", "RShank", "LShank", "Back", "RThigh", "LArm"]
-
-        # Create column headers for each sensor (9 axes per sensor)
-        column_names = []
-        for sensor in sensor_order:
-            column_names.extend([
-                f"{sensor}_ax", f"{sensor}_ay", f"{sensor}_az",
-                f"{sensor}_gx", f"{sensor}_gy", f"{sensor}_gz",
-                f"{sensor}_mx", f"{sensor}_my", f"{sensor}_mz"
-            ])
-
-        #  Find the smallest number of samples to ensure synchronization
-        num_samples = min(len(self.sensor_readings[sensor]) for sensor in sensor_order)
-
-        #  Build the data row-by-row in sensor order
-        data = []
-        for i in range(num_samples):
-            row = []
-            for sensor in sensor_order:
-                row.extend(self.sensor_readings[sensor][i])  # Append all 9 values from this sensor
-            data.append(row)
-
-        #  Create and export DataFrame
-        df = pd.DataFrame(data, columns=column_names)
-        df.to_csv(filename, index=False)
-
-        print(f"Sensor data saved to {filename}")
+        if filename.endswith(".parquet"):
+            self.metrics.to_parquet(filename)
+        else:
+            self.metrics.to_json(filename)
+        logger.info(f"Packet metrics saved to {filename}")
 
     def print_out_sensor_data(self):
-        print(self.sensor_readings)
\ No newline at end of file
+        for sensor_name, buffer in self.sensor_readings.items():
+            samples, _ = buffer.view()
+            print(f"{sensor_name}: {len(buffer)} samples ({buffer.nbytes} bytes)")
+            print(samples)
\ No newline at end of file
@@ -0,0 +1,21 @@
+class BleakTransport:
+    """
+    Creates the scanners and clients the ConnectionManager talks to. This is the real
+    Bluetooth backend; simulatedSensors.SimulatedTransport provides the same two methods
+    with in-process sensors, so the rest of the stack runs unchanged without hardware.
+
+    A scanner needs async start()/stop(); a client needs `address`, async connect(),
+    disconnect(), start_notify(uuid, handler) and stop_notify(uuid), and has to call
+    `disconnected_callback(client)` when the link drops. Notify handlers are called as
+    handler(characteristic, data) with `characteristic.uuid` set (as bleak does).
+    """
+
+    def scanner(self, detection_callback):
+        from bleak import BleakScanner
+
+        return BleakScanner(detection_callback=detection_callback)
+
+    def client(self, device, disconnected_callback):
+        from bleak import BleakClient
+
+        return BleakClient(device, disconnected_callback=disconnected_callback)
@@ -0,0 +1,169 @@
+import json
+import os
+
+import numpy as np
+
+AXES = ["ax", "ay", "az", "gx", "gy", "gz", "mx", "my", "mz"]
+ACCEL_SCALE = 16384  # LSB per g (MPU6050, +-2 g)
+GYRO_SCALE = 131     # LSB per deg/s (MPU6050, +-250 deg/s)
+
+# Calibration of the self-made prototypes (offsets and scales per sensor and axis)
+DEFAULT_CALIBRATION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration.json")
+
+
+class Calibration:
+    def __init__(self, sensor_order, offsets, scales):
+        """
+        Per-device conversion of raw int16 readings to physical units:
+
+            real = (raw - offsets) / scales
+
+        Offsets and scales are (sensors x 9) arrays, so a whole (frames x sensors * 9)
+        block is converted in a single broadcast operation.
+
+        Args:
+            sensor_order (list): Sensor names, in the column order of the blocks to convert.
+            offsets (array-like): Raw offsets, shape (len(sensor_order), 9).
+            scales (array-like): Raw units per physical unit, shape (len(sensor_order), 9).
+        """
+        self.sensor_order = list(sensor_order)
+        self.offsets = np.asarray(offsets, dtype=np.float32).reshape(len(self.sensor_order), 9)
+        self.scales = np.asarray(scales, dtype=np.float32).reshape(len(self.sensor_order), 9)
+        self.inverse_scales = 1.0 / self.scales
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_CALIBRATION_PATH, sensor_order=None):
+        """
+        Loads a calibration config (see calibration.json).
+
+        Args:
+            path (str): JSON file with {"sensors": {name: {"offsets": [9], "scales": [9]}}}.
+            sensor_order (list | None): Sensors to load, in column order (default: file order).
+        """
+        with open(path) as f:
+            sensors = json.load(f)["sensors"]
+        sensor_order = sensor_order or list(sensors.keys())
+        return cls(sensor_order,
+                   [sensors[sensor]["offsets"] for sensor in sensor_order],
+                   [sensors[sensor]["scales"] for sensor in sensor_order])
+
+    def to_file(self, path):
+        """Writes the calibration in the config format read by from_file."""
+        config = {"axes": AXES, "sensors": {
+            sensor: {"offsets": np.round(self.offsets[i], 3).tolist(), "scales": np.round(self.scales[i], 3).tolist()}
+            for i, sensor in enumerate(self.sensor_order)
+        }}
+        with open(path, "w") as f:
+            json.dump(config, f, indent=2)
+
+    def select(self, sensor_order):
+        """Returns the calibration for a subset / different order of sensors."""
+        rows = [self.sensor_order.index(sensor) for sensor in sensor_order]
+        return Calibration(sensor_order, self.offsets[rows], self.scales[rows])
+
+    def normalized(self, mean, std):
+        """
+        Returns a calibration that also applies the model normalization (x - mean) / std,
+        so conversion and normalization of a block are one fused operation.
+
+        Args:
+            mean (array-like): Per-channel mean of the calibrated training data (sensors * 9).
+            std (array-like): Per-channel standard deviation of the calibrated training data.
+        """
+        mean = np.asarray(mean, dtype=np.float32).reshape(self.offsets.shape)
+        std = np.asarray(std, dtype=np.float32).reshape(self.offsets.shape)
+        return Calibration(self.sensor_order, self.offsets + mean * self.scales, self.scales * std)
+
+    def apply(self, block, out=None):
+        """
+        Converts a (frames x sensors * 9) block of raw readings.
+
+        Args:
+            block (np.ndarray): Raw readings in `sensor_order` column order.
+            out (np.ndarray | None): Float output array of the same shape; pass `block`
+                itself to convert a float buffer in place (e.g. the live window).
+
+        Returns:
+            np.ndarray: The converted float32 block (`out` if given).
+        """
+        frames = np.asarray(block).reshape(len(block), len(self.sensor_order), 9)
+        if out is None:
+            out = np.empty((len(block), len(self.sensor_order) * 9), dtype=np.float32)
+        result = out.reshape(len(block), len(self.sensor_order), 9)
+        np.subtract(frames, self.offsets, out=result, casting="unsafe")
+        np.multiply(result, self.inverse_scales, out=result)
+        return out
+
+    def apply_sensor(self, sensor_name, samples, out=None):
+        """
+        Converts the (n x 9) samples of a single sensor, e.g. a SensorBuffer view.
+
+        Args:
+            sensor_name (str): Sensor the samples belong to.
+            samples (np.ndarray): Raw samples, shape (n, 9).
+            out (np.ndarray | None): Float output array; may be `samples` for float buffers.
+        """
+        i = self.sensor_order.index(sensor_name)
+        if out is None:
+            out = np.empty(samples.shape, dtype=np.float32)
+        np.subtract(samples, self.offsets[i], out=out, casting="unsafe")
+        np.multiply(out, self.inverse_scales[i], out=out)
+        return out
+
+
+def fit_calibration(still_recordings, rotation_recordings=None):
+    """
+    Fits a calibration from recordings of each sensor, mirroring the on-device routines
+    of the RFduino sketches.
+
+    - Accel/gyro offsets: mean of a still period (the sensor lying flat and motionless).
+    - Mag offsets/scales: hard-iron centre and half-range of a recording in which the
+      sensor is rotated in all directions. Without one, the magnetometer is left
+      uncalibrated (offset 0, scale 1).
+
+    Args:
+        still_recordings (dict): Sensor name -> raw samples (n, 9) of the still period.
+        rotation_recordings (dict | None): Sensor name -> raw samples (n, 9) while rotating.
+
+    Returns:
+        Calibration: Calibration for the sensors in `still_recordings`.
+    """
+    sensor_order = list(still_recordings.keys())
+    offsets = np.zeros((len(sensor_order), 9), dtype=np.float32)
+    scales = np.ones((len(sensor_order), 9), dtype=np.float32)
+    scales[:, 0:3] = ACCEL_SCALE
+    scales[:, 3:6] = GYRO_SCALE
+
+    for i, sensor in enumerate(sensor_order):
+        still = np.asarray(still_recordings[sensor], dtype=np.float64)
+        offsets[i, :6] = still[:, :6].mean(axis=0)
+
+        if rotation_recordings is not None and sensor in rotation_recordings:
+            mag = np.asarray(rotation_recordings[sensor], dtype=np.float64)[:, 6:9]
+            mag_min, mag_max = mag.min(axis=0), mag.max(axis=0)
+            offsets[i, 6:9] = (mag_max + mag_min) / 2
+            half_range = (mag_max - mag_min) / 2
+            scales[i, 6:9] = np.where(half_range == 0, 1, half_range)  # Avoid division by zero
+
+    return Calibration(sensor_order, offsets, scales)
+
+
+_default_calibration = None
+
+
+def convert_raw_to_real(sensor_order, block):
+    """
+    Converts raw int16 readings of several sensors with the default calibration file.
+
+    Args:
+        sensor_order (list): Sensor names in the column order of `block`.
+        block (np.ndarray): Raw readings, shape (frames, len(sensor_order) * 9).
+
+    Returns:
+        np.ndarray: float32 array of the same shape (accel in g, gyro in deg/s,
+        magnetometer normalised by its calibration scale).
+    """
+    global _default_calibration
+    if _default_calibration is None:
+        _default_calibration = Calibration.from_file()
+    return _default_calibration.select(sensor_order).apply(block)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionManager:
+    def __init__(self, ble, scan_timeout=15, initial_backoff=0.5, max_backoff=8):
+        """
+        Connects the RFduinos while scanning and keeps them connected.
+
+        Every known sensor is connected as soon as its advertisement is seen (instead of
+        after a fixed-length scan) and scanning stops once all expected sensors are
+        connected. A sensor that drops is reconnected with exponential backoff and its
+        notifications are re-subscribed if a stream is running. The time each sensor was
+        missing is kept in `gaps` (host ms since connection, like the sample receive times)
+        so the alignment and export can mark those spans; start_session clears them for
+        every new recording.
+
+        All coroutines and callbacks run on the BLE service loop. Scanners and clients come
+        from `ble.transport` (bleTransport.BleakTransport, or a simulated backend).
+
+        Args:
+            ble (BLE): Owner of the handlers, name/UUID maps and connected clients.
+            scan_timeout (float): Seconds to scan before giving up on missing sensors.
+            initial_backoff (float): First delay between reconnection attempts, in seconds.
+            max_backoff (float): Upper bound of the reconnection delay, in seconds.
+        """
+        self.ble = ble
+        self.transport = ble.transport
+        self.scan_timeout = scan_timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        # Sensors that can stream (known name with a characteristic UUID)
+        self.expected = [name for name in ble.RFDUINO_NAMES if name in ble.RFDUINO_NAME_TO_UUID]
+        self.clients = {}        # Sensor name -> client (BleakClient)
+        self.connecting = set()  # Names with a connection attempt in flight
+        self.reconnects = {}     # Sensor name -> successful reconnections
+        self.gaps = {}           # Sensor name -> [[start, end], ...]; end is None while still missing
+        self.time_to_all_connected = None
+        self.closing = False
+        self.all_connected = None
+        self.tasks = set()
+
+    def _spawn(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def _now(self):
+        """Host time in ms on the clock of the sample receive times."""
+        return time.time() * 1000 - self.ble.connect_time
+
+    async def connect_all(self):
+        """
+        Scans and connects until every expected sensor is connected or the scan times out.
+        The first call sets `ble.connect_time`, the origin of the receive times; later calls
+        keep it so the buffers, gaps and recordings of connected sensors stay on one clock.
+
+        Returns:
+            list: Names of the connected sensors.
+        """
+        if self.ble.connect_time is None:
+            self.ble.connect_time = time.time() * 1000
+        if all(name in self.clients for name in self.expected):
+            return list(self.clients)  # Nothing to scan for
+
+        self.closing = False
+        self.all_connected = asyncio.Event()
+        t0 = time.perf_counter()
+
+        def detected(device, advertisement_data):
+            name = advertisement_data.local_name or device.name
+            if name in self.expected and name not in self.clients and name not in self.connecting:
+                self.connecting.add(name)
+                self._spawn(self._connect(name, device))
+
+        scanner = self.transport.scanner(detected)
+        await scanner.start()
+        try:
+            await asyncio.wait_for(self.all_connected.wait(), self.scan_timeout)
+            self.time_to_all_connected = time.perf_counter() - t0
+            logger.info(f"All {len(self.expected)} sensors connected in {self.time_to_all_connected:.2f} s")
+        except asyncio.TimeoutError:
+            missing = [name for name in self.expected if name not in self.clients]
+            logger.warning(f"Scan timed out, missing sensors: {missing}")
+        finally:
+            await scanner.stop()
+
+        # Let connections that started just before the timeout finish
+        pending = [task for task in self.tasks if not task.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=self.scan_timeout)
+        return list(self.clients)
+
+    async def _connect(self, name, device):
+        try:
+            client = self.transport.client(device, lambda c: self._on_disconnect(name, c))
+            await client.connect()
+            self.clients[name] = client
+            self.reconnects.setdefault(name, 0)
+            self.ble.register_client(client, name)
+            if all(sensor in self.clients for sensor in self.expected):
+                self.all_connected.set()
+        except Exception as e:
+            self.ble.status_var.set(f"Failed to connect to {name}: {e}")
+            logger.warning(f"Failed to connect to {name}: {e}")
+        finally:
+            self.connecting.discard(name)
+
+    def _on_disconnect(self, name, client):
+        if self.closing or name in self.connecting:
+            return
+        self.ble.status_var.set(f"{name} disconnected, reconnecting")
+        logger.warning(f"{name} disconnected, reconnecting")
+        self.gaps.setdefault(name, []).append([self._now(), None])
+        self.connecting.add(name)
+        self._spawn(self._reconnect(name, client))
+
+    async def _reconnect(self, name, client):
+        backoff = self.initial_backoff
+        try:
+            while not self.closing:
+                try:
+                    await client.connect()
+                    if self.ble.is_streaming:
+                        await client.start_notify(self.ble.RFDUINO_NAME_TO_UUID[name], self.ble.notification_handler())
+                    break
+                except Exception as e:
+                    logger.info(f"Reconnecting {name} failed ({e}), retrying in {backoff:.1f} s")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+            else:
+                return
+
+            gap = self.gaps[name][-1]
+            gap[1] = self._now()
+            self.reconnects[name] = self.reconnects.get(name, 0) + 1
+            self.ble.on_reconnected(name, gap[0], gap[1])
+            self.ble.status_var.set(f"{name} reconnected")
+            logger.info(f"{name} reconnected after {(gap[1] - gap[0]) / 1000:.1f} s")
+        finally:
+            self.connecting.discard(name)
+
+    async def close(self):
+        """Disconnects every sensor without triggering reconnection."""
+        self.closing = True
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*[client.disconnect() for client in self.clients.values()], return_exceptions=True)
+        self.clients = {}
+
+    def start_session(self):
+        """
+        Starts the gap and reconnect bookkeeping of a new recording. Sensors that are still
+        missing keep an open gap, starting now.
+        """
+        now = self._now()
+        self.gaps = {name: [[now, None]] for name in self.open_gaps()}
+        self.reconnects = {name: 0 for name in self.reconnects}
+
+    def open_gaps(self):
+        """Gaps of sensors that are still disconnected, as {name: start}."""
+        return {name: gaps[-1][0] for name, gaps in self.gaps.items() if gaps and gaps[-1][1] is None}
+
+    def report(self):
+        """Summary of the connection quality of the session."""
+        return {
+            "time_to_all_connected_s": self.time_to_all_connected,
+            "reconnects": dict(self.reconnects),
+            "gaps": {name: [list(gap) for gap in gaps] for name, gaps in self.gaps.items()},
+        }
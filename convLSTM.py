@@ -0,0 +1,291 @@
+import torch
+import torch.nn as nn
+
+# REALDISP activity names, indexed by (label - 1)
+ACTIVITY_NAMES = [
+    "Walking", "Jogging", "Running", "Jump up", "Jump front & back", "Jump sideways",
+    "Jump leg/arms open/closed", "Jump rope", "Trunk twist (arms outstretched)",
+    "Trunk twist (elbows bent)", "Waist bends forward", "Waist rotation",
+    "Waist bends (reach foot with opposite hand)", "Reach heels backwards", "Lateral bend",
+    "Lateral bend with arm up", "Repetitive forward stretching", "Upper trunk and lower body opposite twist",
+    "Lateral elevation of arms", "Frontal elevation of arms", "Frontal hand claps",
+    "Frontal crossing of arms", "Shoulders high-amplitude rotation", "Shoulders low-amplitude rotation",
+    "Arms inner rotation", "Knees (alternating) to the breast", "Heels (alternating) to the backside",
+    "Knees bending (crouching)", "Knees (alternating) bending forward", "Rotation on the knees",
+    "Rowing", "Elliptical bike", "Cycling",
+]
+
+
+class ConvLSTM(nn.Module):
+    """Model for human-activity-recognition."""
+
+    def __init__(self, input_channel, num_classes, cnn_channel):
+        super().__init__()
+        self.n_layers = 2
+        self.num_classes = num_classes
+        self.n_hidden = 128
+
+        kernal = (5, 1)
+
+        self.features = nn.Sequential(
+            nn.Conv2d(input_channel, cnn_channel, kernel_size=kernal),
+            nn.GroupNorm(4, cnn_channel),
+            nn.MaxPool2d((2, 1)),
+            nn.ReLU(),
+            nn.Conv2d(cnn_channel, cnn_channel, kernel_size=kernal),
+            nn.GroupNorm(4, cnn_channel),
+            nn.MaxPool2d((2, 1)),
+            nn.ReLU(),
+            nn.Conv2d(cnn_channel, cnn_channel, kernel_size=kernal),
+            nn.GroupNorm(4, cnn_channel),
+            nn.ReLU(),
+        )
+
+        self.lstm1 = nn.LSTM(cnn_channel, hidden_size=self.n_hidden, num_layers=self.n_layers)
+        self.fc = nn.Linear(self.n_hidden, self.num_classes)
+        self.dropout = nn.Dropout()
+
+    def forward(self, x):
+        x = x.unsqueeze(1)
+        x = x.permute(0, 3, 2, 1)
+        x = self.features(x)
+
+        x = x.permute(2, 0, 3, 1)
+        x = x.reshape(x.shape[0], x.shape[1], -1)
+
+        x = self.dropout(x)
+        x, _ = self.lstm1(x)
+        x = x[-1, :, :]
+        out = self.fc(x)
+
+        return out
+
+
+def framewise_norm(norm, x):
+    """Applies a GroupNorm to every frame of x (batch, channels, frames, 1) on its own."""
+    n, c, t, w = x.shape
+    y = norm(x.permute(0, 2, 1, 3).reshape(n * t, c, 1, w))
+    return y.reshape(n, t, c, w).permute(0, 2, 1, 3)
+
+
+class StreamingConvLSTM(ConvLSTM):
+    """
+    Causal ConvLSTM for streaming inference (see StreamingInference).
+
+    Same layers and parameters as ConvLSTM, but every GroupNorm normalizes each frame on
+    its own instead of over the whole window. A feature frame then never changes once its
+    input frames have arrived, so the features of past frames and the LSTM state can be
+    carried forward instead of recomputing a window per prediction. forward() runs the
+    whole input from a zero LSTM state and returns the logits of its last frame; training
+    on long sequences (or fine-tuning ConvLSTM weights, which load with strict=False)
+    makes the state useful across windows.
+
+    The `streaming` buffer marks the state dict, so load_model and exportModel.build_model
+    rebuild the right class from a checkpoint.
+    """
+
+    def __init__(self, input_channel, num_classes, cnn_channel):
+        super().__init__(input_channel, num_classes, cnn_channel)
+        self.register_buffer("streaming", torch.ones(()))
+
+    def forward(self, x):
+        x = x.unsqueeze(1).permute(0, 3, 2, 1)
+        for layer in self.features:
+            x = framewise_norm(layer, x) if isinstance(layer, nn.GroupNorm) else layer(x)
+
+        x = x.permute(2, 0, 3, 1)
+        x = x.reshape(x.shape[0], x.shape[1], -1)
+        x, _ = self.lstm1(self.dropout(x))
+        return self.fc(x[-1, :, :])
+
+
+def load_model(model_path, input_channel=54, num_classes=33, cnn_channel=256):
+    """
+    Loads a trained ConvLSTM (or StreamingConvLSTM) checkpoint for inference (CPU, eval mode).
+    Only 'model_state_dict' is used; the stored optimizer state is ignored.
+
+    Args:
+        model_path (str): Path to the .pth checkpoint.
+        input_channel (int): Number of input features (9 per sensor, e.g. 81 or 54).
+        num_classes (int): Number of activity classes.
+        cnn_channel (int): Width of the convolutional layers.
+
+    Returns:
+        ConvLSTM: The model in evaluation mode.
+    """
+    checkpoint = torch.load(model_path, map_location=torch.device("cpu"))
+    model_class = StreamingConvLSTM if "streaming" in checkpoint["model_state_dict"] else ConvLSTM
+    model = model_class(input_channel, num_classes=num_classes, cnn_channel=cnn_channel)
+    model.load_state_dict(checkpoint["model_state_dict"])
+    model.eval()
+    return model
+
+
+def activity_name(label):
+    """Returns the REALDISP activity name of a 1-based label."""
+    return ACTIVITY_NAMES[label - 1]
+
+
+class IncrementalConvLSTM:
+    def __init__(self, model, window_size=64):
+        """
+        Sliding-window inference that only computes the first convolution for new frames.
+
+        The first Conv2d is local in time (each output frame depends on `kernel` input
+        frames), so its outputs are cached across overlapping windows and only the new
+        positions are computed per step. Everything after it is recomputed per window:
+        GroupNorm statistics span the whole window and the LSTM starts from a zero state
+        for every window, so reusing deeper activations (or carrying the LSTM state
+        forward) would change the model's outputs. Results match model(window) up to
+        floating point rounding.
+
+        Args:
+            model (ConvLSTM): Trained model in eval mode.
+            window_size (int): Frames per window.
+        """
+        self.model = model
+        self.window_size = window_size
+        self.conv1 = model.features[0]
+        self.rest = model.features[1:]
+        self.kernel = self.conv1.kernel_size[0]
+        self.positions = window_size - self.kernel + 1  # Conv outputs per window
+        self.reset()
+
+    def reset(self):
+        self.tail = None  # Last (kernel - 1) input frames, shape (1, C, k-1, 1)
+        self.cache = torch.zeros(1, self.conv1.out_channels, self.positions, 1)
+        self.filled = 0   # Valid cached positions
+
+    @torch.inference_mode()
+    def push(self, frames):
+        """
+        Adds normalized frames of shape (n, channels) to the window.
+        """
+        x = torch.as_tensor(frames, dtype=torch.float32).T[None, :, :, None]
+        if self.tail is not None:
+            x = torch.cat([self.tail, x], dim=2)
+        self.tail = x[:, :, -(self.kernel - 1):]
+        if x.shape[2] < self.kernel:
+            return
+
+        new = self.conv1(x[:, :, -(self.positions + self.kernel - 1):])
+        n = new.shape[2]
+        self.cache = torch.cat([self.cache[:, :, n:], new], dim=2)
+        self.filled = min(self.filled + n, self.positions)
+
+    @property
+    def ready(self):
+        return self.filled == self.positions
+
+    @torch.inference_mode()
+    def predict_logits(self):
+        """Runs the remaining layers on the cached window; returns logits of shape (1, classes)."""
+        x = self.rest(self.cache)
+        x = x.permute(2, 0, 3, 1)
+        x = x.reshape(x.shape[0], x.shape[1], -1)
+        x, _ = self.model.lstm1(x)
+        return self.model.fc(x[-1, :, :])
+
+
+class StreamingInference:
+    def __init__(self, model, window_size=64):
+        """
+        Incremental inference for a StreamingConvLSTM: every new frame goes through the
+        network once. Each convolution keeps its last (kernel - 1) input frames and each
+        pooling layer its unpaired frame, so only the feature frames of new input are
+        computed, and the LSTM hidden state is carried forward instead of replaying a
+        window. After any sequence of push() calls, predict_logits() matches
+        model(all frames pushed since reset) up to floating point rounding.
+
+        Args:
+            model (StreamingConvLSTM): Trained model in eval mode.
+            window_size (int): Frames to see before the first prediction (the warm-up
+                that matches the sliding-window engines).
+        """
+        self.model = model
+        self.window_size = window_size
+        self.reset()
+
+    def reset(self):
+        self.pending = [None] * len(self.model.features)  # Per layer: input frames kept for the next push
+        self.state = None   # LSTM (h, c)
+        self.output = None  # Top LSTM layer output of the last feature frame, shape (1, hidden)
+        self.filled = 0     # Frames pushed, capped at window_size
+
+    @torch.inference_mode()
+    def push(self, frames):
+        """
+        Adds normalized frames of shape (n, channels) to the stream.
+        """
+        x = torch.as_tensor(frames, dtype=torch.float32).T[None, :, :, None]
+        self.filled = min(self.filled + x.shape[2], self.window_size)
+        for i, layer in enumerate(self.model.features):
+            if isinstance(layer, (nn.Conv2d, nn.MaxPool2d)):
+                if self.pending[i] is not None:
+                    x = torch.cat([self.pending[i], x], dim=2)
+                if isinstance(layer, nn.Conv2d):
+                    keep = layer.kernel_size[0] - 1
+                    usable = x.shape[2] if x.shape[2] > keep else 0
+                    self.pending[i] = x[:, :, max(x.shape[2] - keep, 0):]
+                else:  # Pool whole pairs, keep an unpaired last frame
+                    usable = x.shape[2] // layer.kernel_size[0] * layer.kernel_size[0]
+                    self.pending[i] = x[:, :, usable:]
+                if usable == 0:
+                    return  # Not enough frames for a new output yet
+                x = layer(x[:, :, :usable])
+            elif isinstance(layer, nn.GroupNorm):
+                x = framewise_norm(layer, x)
+            else:
+                x = layer(x)
+
+        x = x.permute(2, 0, 3, 1)
+        x, self.state = self.model.lstm1(x.reshape(x.shape[0], x.shape[1], -1), self.state)
+        self.output = x[-1]
+
+    @property
+    def ready(self):
+        return self.filled == self.window_size and self.output is not None
+
+    @torch.inference_mode()
+    def predict_logits(self):
+        """Logits of the newest feature frame, shape (1, classes)."""
+        return self.model.fc(self.output)
+
+
+class SlidingWindowModel:
+    def __init__(self, model, window_size=64, channels=54):
+        """
+        Sliding-window inference for exported models (TorchScript / ONNX), which do not
+        expose their layers to IncrementalConvLSTM. Same interface, but every prediction
+        runs the whole window through the model.
+
+        Args:
+            model (callable): Maps (1, window_size, channels) windows to logits.
+            window_size (int): Frames per window.
+            channels (int): Input channels.
+        """
+        self.model = model
+        self.window_size = window_size
+        self.channels = channels
+        self.reset()
+
+    def reset(self):
+        self.window = torch.zeros(1, self.window_size, self.channels)
+        self.filled = 0
+
+    def push(self, frames):
+        """
+        Adds normalized frames of shape (n, channels) to the window.
+        """
+        x = torch.as_tensor(frames, dtype=torch.float32)[-self.window_size:]
+        n = x.shape[0]
+        self.window = torch.cat([self.window[:, n:], x[None]], dim=1)
+        self.filled = min(self.filled + n, self.window_size)
+
+    @property
+    def ready(self):
+        return self.filled == self.window_size
+
+    @torch.inference_mode()
+    def predict_logits(self):
+        return self.model(self.window)
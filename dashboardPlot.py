@@ -0,0 +1,191 @@
+import time
+
+import numpy as np
+
+AXIS_NAMES = ["ax", "ay", "az", "gx", "gy", "gz", "mx", "my", "mz"]
+
+
+def decimate_minmax(times, values, max_points):
+    """
+    Reduces a trace to at most `max_points` points while keeping its peaks: samples are
+    grouped into buckets and every bucket contributes its minimum and maximum.
+
+    Args:
+        times (np.ndarray): Sample times, shape (n,).
+        values (np.ndarray): Sample values, shape (n,).
+        max_points (int): Upper bound of the returned points.
+
+    Returns:
+        tuple: (times, values) of the decimated trace.
+    """
+    n = len(values)
+    if n <= max_points:
+        return times, values
+    step = -(-n // (max_points // 2))  # Ceil division
+    m = n // step * step
+    t = times[n - m:].reshape(-1, step)
+    v = values[n - m:].reshape(-1, step)
+    return (np.column_stack([t[:, 0], t[:, -1]]).ravel(),
+            np.column_stack([v.min(axis=1), v.max(axis=1)]).ravel())
+
+
+def interval_stats(times):
+    """
+    Packet interval statistics of a window of receive times (ms).
+
+    Returns:
+        tuple: (mean interval, jitter (std), max interval) in ms, or None for < 2 samples.
+    """
+    if len(times) < 2:
+        return None
+    intervals = np.diff(times.astype(np.float64))
+    return intervals.mean(), intervals.std(), intervals.max()
+
+
+class DashboardPlot:
+    def __init__(self, figure, sensor_names, seconds=10, axis=2, max_points=400, max_rate_hz=100,
+                 nominal_interval_ms=20, stats_interval=0.5):
+        """
+        Per-sensor traces of the last `seconds` plus rolling packet interval / jitter bars,
+        redrawn with blitting: the axes, ticks and legend are rendered once into a cached
+        background and only the animated artists are drawn per frame. Text rendering is
+        the most expensive part, so the interval bars and labels are only refreshed every
+        `stats_interval` seconds (in their own blit region).
+
+        The work per frame only depends on the window length and `max_points`, never on
+        the session length, because only the newest samples of each buffer are read.
+
+        Args:
+            figure (matplotlib.figure.Figure): Figure attached to a canvas.
+            sensor_names (list): Sensors to show.
+            seconds (float): Length of the visible window.
+            axis (int): Column of the 9-axis sample to plot (0-2 accel, 3-5 gyro, 6-8 mag).
+            max_points (int): Points per trace after min/max decimation.
+            max_rate_hz (float): Highest expected sensor rate (bounds the samples read).
+            nominal_interval_ms (float): Expected packet interval (scale of the interval bars).
+            stats_interval (float): Seconds between refreshes of the interval statistics.
+        """
+        self.figure = figure
+        self.canvas = figure.canvas
+        self.sensor_names = list(sensor_names)
+        self.seconds = seconds
+        self.axis = axis
+        self.max_points = max_points
+        self.max_samples = int(seconds * max_rate_hz)
+        self.stats_interval = stats_interval
+        self.last_stats = 0
+
+        self.ax_trace, self.ax_stats = figure.subplots(2, 1, gridspec_kw={"height_ratios": [3, 2]})
+        self.lines = {name: self.ax_trace.plot([], [], label=name, linewidth=1, animated=True)[0]
+                      for name in self.sensor_names}
+        self.ax_trace.set_xlim(-seconds, 0)
+        self.ax_trace.set_ylim(-1000, 1000)
+        self.ax_trace.set_xlabel("Time (seconds)")
+        self.ax_trace.set_ylabel(f"Raw {AXIS_NAMES[axis]}")
+        self.ax_trace.legend(loc="upper left", fontsize="small", ncol=3)
+        self.ax_trace.grid(True)
+
+        positions = np.arange(len(self.sensor_names))
+        self.bars = self.ax_stats.barh(positions, np.zeros(len(positions)), animated=True)
+        self.labels = [self.ax_stats.text(nominal_interval_ms * 0.05, y, "", va="center", fontsize="small",
+                                          animated=True) for y in positions]
+        self.ax_stats.set_yticks(positions, self.sensor_names)
+        self.ax_stats.set_xlim(0, nominal_interval_ms * 3)
+        self.ax_stats.set_xlabel("Packet interval (ms)")
+        self.ax_stats.axvline(nominal_interval_ms, color="gray", linestyle="--")
+        figure.tight_layout()
+
+        self.background = None  # Cached (trace, stats) regions without the animated artists
+        self.last_rescale = 0
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        self.background = (self.canvas.copy_from_bbox(self.ax_trace.bbox),
+                           self.canvas.copy_from_bbox(self.ax_stats.bbox))
+        self.last_stats = 0  # The full redraw dropped the bars and labels
+
+    def _rescale(self, low, high):
+        """Adapts the y range (at most once per second); needs a full redraw."""
+        now = time.perf_counter()
+        y_low, y_high = self.ax_trace.get_ylim()
+        outside = low < y_low or high > y_high
+        too_loose = (high - low) < (y_high - y_low) / 4
+        if (outside or too_loose) and now - self.last_rescale > 1:
+            margin = max((high - low) * 0.1, 1)
+            self.ax_trace.set_ylim(low - margin, high + margin)
+            self.last_rescale = now
+            self.background = None
+
+    def _show_metrics(self, i, summary):
+        rate = summary["recent_rate_hz"]
+        if rate is None:
+            return
+        p99 = summary["interval_percentiles_ms"]["p99"]
+        self.bars[i].set_width(1000 / rate)
+        self.labels[i].set_text(f"{rate:.1f} Hz, ± {summary['interval_jitter_ms']:.1f} ms, p99 {p99:.0f} ms, "
+                                f"max {summary['max_gap_ms']:.0f} ms, {summary['lost']} lost")
+
+    def update(self, buffers, metrics=None):
+        """
+        Redraws the traces and interval bars from the newest samples.
+
+        Args:
+            buffers (dict): Sensor name -> SensorBuffer (e.g. BLE.sensor_readings).
+            metrics (PacketMetrics | None): Stream statistics (e.g. BLE.metrics); when given,
+                the bars show the recent packet interval and the labels rate, jitter, p99,
+                max gap and loss of the whole stream instead of statistics of the visible window.
+        """
+        windows = {}
+        for name in self.sensor_names:
+            buffer = buffers.get(name)
+            if buffer is not None and len(buffer):
+                windows[name] = buffer.latest(self.max_samples)
+        now = max((float(times[-1]) for _, times in windows.values()), default=0.0)
+
+        now_s = time.perf_counter()
+        update_stats = now_s - self.last_stats >= self.stats_interval
+        low, high = np.inf, -np.inf
+        for i, name in enumerate(self.sensor_names):
+            if name not in windows:
+                self.lines[name].set_data([], [])
+                if update_stats:
+                    self.bars[i].set_width(0)
+                    self.labels[i].set_text("no data")
+                continue
+            samples, times = windows[name]
+            visible = times >= now - self.seconds * 1000
+            times = times[visible]
+            values = samples[visible, self.axis]
+            if len(values):
+                low, high = min(low, values.min()), max(high, values.max())
+            t, v = decimate_minmax((times.astype(np.float64) - now) / 1000, values, self.max_points)
+            self.lines[name].set_data(t, v)
+
+            if not update_stats:
+                continue
+            if metrics is not None and name in metrics.sensors:
+                self._show_metrics(i, metrics.sensors[name].summary())
+                continue
+            stats = interval_stats(times)
+            if stats is None:
+                continue
+            mean, jitter, longest = stats
+            self.bars[i].set_width(mean)
+            self.labels[i].set_text(f"{mean:.1f} ms ± {jitter:.1f}, max {longest:.0f} ms, {1000 / mean:.1f} Hz")
+
+        if np.isfinite(low):
+            self._rescale(low, high)
+        if self.background is None:
+            self.canvas.draw()  # Renders the static parts; _on_draw caches them
+
+        self.canvas.restore_region(self.background[0])
+        for line in self.lines.values():
+            self.ax_trace.draw_artist(line)
+        self.canvas.blit(self.ax_trace.bbox)
+
+        if update_stats or self.last_stats == 0:
+            self.last_stats = now_s
+            self.canvas.restore_region(self.background[1])
+            for artist in list(self.bars) + self.labels:
+                self.ax_stats.draw_artist(artist)
+            self.canvas.blit(self.ax_stats.bbox)
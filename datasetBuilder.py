@@ -0,0 +1,188 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from windowing import activity_order, variable_size_order
+
+# REALDISP log layout: 2 timestamp columns, 9 sensors x 13 values, 1 label column.
+# Each sensor block is acc(3) gyr(3) mag(3) quaternion(4); quaternions are not used.
+NUM_SUBJECTS = 17
+NUM_SENSORS = 9
+SENSOR_BLOCK = 13
+SENSOR_LENGTH = 9
+LABEL_COLUMN = 2 + NUM_SENSORS * SENSOR_BLOCK
+FEATURE_COLUMNS = [2 + j for j in range(NUM_SENSORS * SENSOR_BLOCK) if j % SENSOR_BLOCK < SENSOR_LENGTH]
+
+# Subject-wise split used by the dataset makers
+SPLITS = {"train": range(1, 12), "valid": range(12, 15), "test": range(15, 18)}
+
+# Sensors (1-based) removed for the reduced-sensor datasets
+DATASET_SENSORS_TO_REMOVE = {
+    1: [2, 7, 9],           # Right and Left Upper Arms, Left Thigh
+    2: [3, 6, 8],           # Right and Left Lower Arms, Right Calf
+    3: [1, 3, 4, 5, 6, 8],  # Opposite to dataset 1
+    4: [1, 2, 4, 5, 7, 9],  # Opposite to dataset 2
+}
+
+PARSER_VERSION = "1"  # Bump to invalidate cached subjects when the parsing rules change
+
+
+def file_key(path):
+    """Cache key of a log file: its path, size and mtime plus the parser version."""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{PARSER_VERSION}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def parse_log(path, dtype=np.float32):
+    """
+    Parses one subjectN_ideal.log with the vectorized pandas C parser.
+
+    Only the 81 acc/gyr/mag columns and the label are read; rows labelled 0
+    (no activity) are dropped.
+
+    Args:
+        path (str): Path to the log file.
+        dtype: dtype of the returned features.
+
+    Returns:
+        features (np.ndarray): (frames, 81) array.
+        labels (np.ndarray): (frames,) uint8 activity labels.
+    """
+    import pandas as pd
+
+    columns = FEATURE_COLUMNS + [LABEL_COLUMN]
+    df = pd.read_csv(path, sep=r"\s+", header=None, usecols=columns, dtype=np.float64, engine="c")
+    data = df[columns].to_numpy()
+    keep = data[:, -1] != 0
+    return data[keep, :-1].astype(dtype), data[keep, -1].astype(np.uint8)
+
+
+def subject_cache_paths(log_dir, cache_dir, subject):
+    log_path = os.path.join(log_dir, f"subject{subject}_ideal.log")
+    key = f"subject{subject}_{file_key(log_path)}"
+    return log_path, os.path.join(cache_dir, key + "_X.npy"), os.path.join(cache_dir, key + "_y.npy")
+
+
+def build_subject(log_path, x_path, y_path):
+    """
+    Parses one subject's log into its cache entry.
+
+    Returns:
+        tuple: (features .npy path, labels .npy path)
+    """
+    features, labels = parse_log(log_path)
+    # Write to temporary names first so an interrupted build never leaves a valid-looking entry
+    np.save(x_path + ".tmp.npy", features)
+    np.save(y_path + ".tmp.npy", labels)
+    os.replace(x_path + ".tmp.npy", x_path)
+    os.replace(y_path + ".tmp.npy", y_path)
+    return x_path, y_path
+
+
+def load_subjects(log_dir, cache_dir, subjects=range(1, NUM_SUBJECTS + 1), workers=None):
+    """
+    Returns every subject as memory-mapped (features, labels), building missing cache
+    entries in parallel (one process per subject). Entries are keyed on the size and
+    mtime of the log, so a rebuild with everything cached only stats the files.
+
+    Args:
+        log_dir (str): Directory containing subjectN_ideal.log files.
+        cache_dir (str): Directory for the cached .npy files.
+        subjects (iterable): Subject numbers to load.
+        workers (int | None): Number of parser processes (default: CPU count).
+
+    Returns:
+        dict: Subject number -> (features memmap (frames, 81), labels memmap (frames,)).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = {subject: subject_cache_paths(log_dir, cache_dir, subject) for subject in subjects}
+    stale = [entry for entry in paths.values() if not (os.path.exists(entry[1]) and os.path.exists(entry[2]))]
+    if len(stale) == 1:
+        build_subject(*stale[0])
+    elif stale:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(build_subject, *zip(*stale)))
+
+    return {subject: (np.load(x_path, mmap_mode="r"), np.load(y_path, mmap_mode="r"))
+            for subject, (_, x_path, y_path) in paths.items()}
+
+
+def sensor_columns(remove_sensors=None):
+    """
+    Feature columns left after removing whole sensors.
+
+    Args:
+        remove_sensors (list | None): 1-based sensor indices to remove (see DATASET_SENSORS_TO_REMOVE).
+    """
+    remove_sensors = set(remove_sensors or [])
+    return np.array([col for col in range(NUM_SENSORS * SENSOR_LENGTH)
+                     if col // SENSOR_LENGTH + 1 not in remove_sensors])
+
+
+def build_splits(log_dir, cache_dir, remove_sensors=None, splits=SPLITS, workers=None, label_order=None,
+                 shuffle_windows=None, seed=None):
+    """
+    Builds the train/valid/test splits from the cached subjects.
+
+    The optional reordering is computed as one frame index array per split (windowing)
+    and applied with a single gather, instead of slicing and stacking every run/window.
+
+    Args:
+        log_dir (str): Directory containing subjectN_ideal.log files.
+        cache_dir (str): Directory for the cached .npy files.
+        remove_sensors (list | None): 1-based sensor indices to drop.
+        splits (dict): Split name -> subject numbers.
+        workers (int | None): Number of parser processes for missing cache entries.
+        label_order (list | None): Keep only the activity runs of these labels, grouped in
+            this order (the notebooks' group_activity_chunks).
+        shuffle_windows (tuple | None): (min_size, max_size): cut every split into windows
+            of random length and shuffle them (the notebooks' create_variable_size_windows).
+        seed (int | None): Seed of the window shuffle.
+
+    Returns:
+        dict: Split name -> (features (frames, 9 * kept sensors), labels (frames,)).
+    """
+    subjects = sorted({subject for members in splits.values() for subject in members})
+    cached = load_subjects(log_dir, cache_dir, subjects, workers=workers)
+    columns = sensor_columns(remove_sensors)
+    keep_all = len(columns) == NUM_SENSORS * SENSOR_LENGTH
+
+    rng = np.random.default_rng(seed)
+    result = {}
+    for name, members in splits.items():
+        features = np.concatenate([cached[s][0] if keep_all else cached[s][0][:, columns] for s in members])
+        labels = np.concatenate([cached[s][1] for s in members])
+        order = None if label_order is None else activity_order(labels, label_order)
+        if shuffle_windows is not None:
+            shuffled = variable_size_order(len(labels) if order is None else len(order), *shuffle_windows, rng=rng)
+            order = shuffled if order is None else order[shuffled]
+        result[name] = (features, labels) if order is None else (features[order], labels[order])
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build (or refresh) the cached REALDISP splits.")
+    parser.add_argument("log_dir")
+    parser.add_argument("--cache-dir", default="realdisp_cache")
+    parser.add_argument("--dataset", type=int, choices=sorted(DATASET_SENSORS_TO_REMOVE),
+                        help="Reduced-sensor dataset to build (default: all 9 sensors)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--label-order", type=int, nargs="+", help="Keep and group the runs of these labels")
+    parser.add_argument("--shuffle-windows", type=int, nargs=2, metavar=("MIN", "MAX"),
+                        help="Shuffle windows of MIN..MAX frames (the dataset makers use 96 128)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    built = build_splits(args.log_dir, args.cache_dir, DATASET_SENSORS_TO_REMOVE.get(args.dataset),
+                         workers=args.workers, label_order=args.label_order, shuffle_windows=args.shuffle_windows,
+                         seed=args.seed)
+    for split, (features, labels) in built.items():
+        print(f"{split}: features {features.shape}, labels {labels.shape}")
+    print(f"Built in {time.perf_counter() - t0:.1f} s")
@@ -0,0 +1,200 @@
+"""
+Resumable evaluation harness for the ConvLSTM checkpoints.
+
+Takes a JSON manifest of jobs, runs them across a process pool and writes one
+consolidated metrics table. Predictions of finished jobs are cached on disk, so a
+rerun (or a run interrupted half-way) only computes what is missing.
+
+Manifest format (see evaluation_manifest.example.json):
+    {
+      "defaults": {"window_size": 64, "step": 32, "repeats": 9},
+      "jobs": [
+        {"name": "set1_split1000",
+         "frames": "data/SET_1/testData.npy", "labels": "data/SET_1/testLabels.npy",
+         "train_frames": "data/SET_1/trainData.npy",
+         "checkpoint": "models/DCL-3L_Framewise_54_96.pth",
+         "remove_sensors": [],
+         "label_order": [4, 21, 10, 22, 19],
+         "scenario": {"type": "split", "misaligning_row": 1000, "seed": 0}},
+        ...
+      ]
+    }
+
+Scenarios are either {"type": "split", "misaligning_row": N, "seed": S} (the notebooks'
+misalign_test_set), {"type": "aligned"}, or explicit distortions
+{"name": ..., "distortions": {"1": [["drop", 1000]], "4": [["drift", 0.001]]}}.
+
+The optional "label_order" keeps only the activity runs of these labels, grouped in
+this order (the notebooks' group_activity_chunks, see windowing.activity_order).
+
+Usage:
+    python evaluate.py manifest.json --workers 4 --output metrics.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from misalignment import Scenario, classification_metrics, random_split_scenario
+from windowing import activity_order
+
+SENSOR_LENGTH = 9
+
+
+def job_key(job):
+    """Cache key of a job: its parameters plus the size and mtime of every input file."""
+    digest = hashlib.sha1(json.dumps(job, sort_keys=True).encode())
+    for field in ("frames", "labels", "train_frames", "checkpoint"):
+        stat = os.stat(job[field])
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:20]
+
+
+def make_scenario(spec, num_sensors):
+    spec = spec or {"type": "aligned"}
+    if spec.get("type") == "aligned":
+        return Scenario("aligned", {})
+    if spec.get("type") == "split":
+        return random_split_scenario(num_sensors, spec["misaligning_row"], np.random.default_rng(spec.get("seed", 0)))
+    distortions = {int(sensor): [tuple(d) for d in ops] for sensor, ops in spec["distortions"].items()}
+    return Scenario(spec.get("name", "custom"), distortions)
+
+
+def keep_columns(num_columns, remove_sensors):
+    remove_sensors = set(remove_sensors or [])
+    return np.array([col for col in range(num_columns) if col // SENSOR_LENGTH + 1 not in remove_sensors])
+
+
+# Per-process caches (models and normalization stats are reused across jobs)
+_models = {}
+_normalization = {}
+
+
+def _init_worker(threads):
+    import torch
+
+    torch.set_num_threads(threads)
+    torch.set_grad_enabled(False)
+
+
+def _normalization_for(path, columns, cache_dir):
+    from windowedDataset import compute_normalization
+
+    key = (path, tuple(columns))
+    if key not in _normalization:
+        stat = os.stat(path)
+        name = hashlib.sha1(f"{path}:{stat.st_size}:{stat.st_mtime_ns}:{list(columns)}".encode()).hexdigest()[:20]
+        stats_path = os.path.join(cache_dir, f"norm_{name}.npz")
+        if os.path.exists(stats_path):
+            stats = np.load(stats_path)
+            _normalization[key] = (stats["mean"], stats["std"])
+        else:
+            mean, std = compute_normalization(np.load(path, mmap_mode="r"))
+            mean, std = mean[columns], std[columns]
+            np.savez(f"{stats_path}.{os.getpid()}.tmp.npz", mean=mean, std=std)
+            os.replace(f"{stats_path}.{os.getpid()}.tmp.npz", stats_path)  # Workers may race on the same stats
+            _normalization[key] = (mean, std)
+    return _normalization[key]
+
+
+def run_job(job, key, cache_dir):
+    """Evaluates one job (in a worker process) and caches its predictions under `key`."""
+    from convLSTM import load_model
+    from misalignment import scenario_predictions
+
+    t0 = time.perf_counter()
+    frames = np.load(job["frames"], mmap_mode="r")
+    labels = np.load(job["labels"], mmap_mode="r").reshape(-1)
+    columns = keep_columns(frames.shape[1], job.get("remove_sensors"))
+    mean, std = _normalization_for(job["train_frames"], columns, cache_dir)
+
+    features = frames[:, columns] if len(columns) < frames.shape[1] else frames
+    scenario = make_scenario(job.get("scenario"), len(columns) // SENSOR_LENGTH)
+    order = activity_order(labels, job["label_order"]) if job.get("label_order") else None
+    if job["checkpoint"] not in _models:
+        _models[job["checkpoint"]] = load_model(job["checkpoint"], input_channel=len(columns))
+    predictions, true_labels, _ = scenario_predictions(
+        _models[job["checkpoint"]], features, labels, scenario, mean, std, job.get("window_size", 64),
+        job.get("step", 32), job.get("repeats", 1), batch_size=job.get("batch_size", 256), order=order)
+
+    path = os.path.join(cache_dir, f"{key}.npz")
+    np.savez(path + ".tmp.npz", predictions=predictions, true_labels=true_labels)
+    os.replace(path + ".tmp.npz", path)
+    return path, time.perf_counter() - t0
+
+
+def load_manifest(path):
+    with open(path) as f:
+        manifest = json.load(f)
+    defaults = manifest.get("defaults", {})
+    jobs = [{**defaults, **job} for job in manifest["jobs"]]
+    for i, job in enumerate(jobs):
+        job.setdefault("name", f"job{i}")
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest")
+    parser.add_argument("--cache-dir", default="evaluation_cache")
+    parser.add_argument("--output", default="metrics.csv")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Torch threads per process (default: CPU count / workers)")
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    jobs = load_manifest(args.manifest)
+    workers = args.workers or os.cpu_count() or 1
+    threads = args.threads or max((os.cpu_count() or 1) // workers, 1)
+
+    keys, failed = [], []
+    for job in jobs:
+        try:
+            keys.append(job_key(job))
+        except (OSError, KeyError) as e:  # Missing input file or field: only this job fails
+            print(f"Job {job['name']} failed: {e}")
+            keys.append(None)
+            failed.append(job["name"])
+    pending = [(job, key) for job, key in zip(jobs, keys)
+               if key is not None and not os.path.exists(os.path.join(args.cache_dir, f"{key}.npz"))]
+    print(f"{len(jobs)} jobs, {len(jobs) - len(failed) - len(pending)} cached, running {len(pending)} "
+          f"on {workers} processes x {threads} threads")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads,)) as pool:
+        futures = {pool.submit(run_job, job, key, args.cache_dir): job for job, key in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                _, seconds = future.result()
+                print(f"Finished {job['name']} in {seconds:.1f} s")
+            except Exception as e:
+                print(f"Job {job['name']} failed: {e}")
+                failed.append(job["name"])
+
+    rows = []
+    for job, key in zip(jobs, keys):
+        path = os.path.join(args.cache_dir, f"{key}.npz")
+        if key is None or not os.path.exists(path):
+            continue
+        result = np.load(path)
+        scenario = job.get("scenario") or {"type": "aligned"}
+        rows.append({"name": job["name"], "checkpoint": os.path.basename(job["checkpoint"]),
+                     "frames": job["frames"], "remove_sensors": job.get("remove_sensors", []),
+                     "scenario": json.dumps(scenario, sort_keys=True), "windows": len(result["predictions"]),
+                     **classification_metrics(result["true_labels"], result["predictions"])})
+
+    pd.DataFrame(rows).to_csv(args.output, index=False)
+    print(f"Metrics for {len(rows)} jobs saved to {args.output}")
+    if failed:
+        print(f"{len(failed)} jobs failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Exports ConvLSTM checkpoints for CPU inference.
+
+A training checkpoint holds the model weights plus the Adam optimizer state (about
+twice the size of the weights), which inference never uses. This tool:
+    - strips a checkpoint down to the weights and the model configuration,
+    - exports a TorchScript (.pt) and/or ONNX (.onnx) artifact,
+    - optionally applies dynamic int8 quantization to the LSTM and linear layers,
+    - reports the accuracy of every artifact against the float model on a test set.
+
+The artifacts are loaded with load_inference_model (used by the live app). An int8
+artifact is only picked by select_model_path once --test has recorded a passing
+accuracy check next to it (<artifact>.check.json).
+
+Usage:
+    python exportModel.py models/DCL-3L_Framewise_54_96.pth --format torchscript onnx --quantize \\
+        --test data/REALDISP_54.mat
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from convLSTM import ConvLSTM, StreamingConvLSTM
+
+WINDOW_SIZE = 64  # Window length used to trace the exported graphs
+
+# An int8 artifact passes its check if it agrees with the float model on at least
+# MIN_INT8_AGREEMENT of the test windows and loses at most MAX_INT8_ACCURACY_DROP accuracy
+MIN_INT8_AGREEMENT = 0.98
+MAX_INT8_ACCURACY_DROP = 0.005
+
+
+def model_config(state_dict):
+    """Infers the ConvLSTM constructor arguments from its weights."""
+    conv = state_dict["features.0.weight"]  # (cnn_channel, input_channel, k, 1)
+    return {
+        "input_channel": int(conv.shape[1]),
+        "cnn_channel": int(conv.shape[0]),
+        "num_classes": int(state_dict["fc.weight"].shape[0]),
+    }
+
+
+def strip_checkpoint(checkpoint_path, output_path):
+    """
+    Writes an inference-only checkpoint: weights and configuration, no optimizer state.
+    The result can still be read by convLSTM.load_model.
+
+    Returns:
+        dict: The model configuration.
+    """
+    checkpoint = torch.load(checkpoint_path, map_location="cpu")
+    state_dict = checkpoint.get("model_state_dict", checkpoint)
+    config = model_config(state_dict)
+    torch.save({"model_state_dict": state_dict, "config": config}, output_path)
+    return config
+
+
+def build_model(checkpoint_path):
+    """Loads a (full or stripped) checkpoint into an eval-mode ConvLSTM or StreamingConvLSTM."""
+    checkpoint = torch.load(checkpoint_path, map_location="cpu")
+    state_dict = checkpoint.get("model_state_dict", checkpoint)
+    model_class = StreamingConvLSTM if "streaming" in state_dict else ConvLSTM
+    model = model_class(**model_config(state_dict))
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model
+
+
+def quantize(model):
+    """Dynamic int8 quantization of the LSTM and linear layers (convolutions stay float)."""
+    return torch.ao.quantization.quantize_dynamic(model, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+
+def export_torchscript(model, path, config, window_size=WINDOW_SIZE):
+    """
+    Traces and freezes the model into a TorchScript file. The configuration is stored
+    as an extra file so the loader does not need to know the model shape.
+    """
+    example = torch.zeros(1, window_size, config["input_channel"])
+    with torch.inference_mode():
+        traced = torch.jit.freeze(torch.jit.trace(model, example).eval())
+    torch.jit.save(traced, path, _extra_files={"config.json": json.dumps(config)})
+
+
+def export_onnx(model, path, config, window_size=WINDOW_SIZE):
+    """
+    Exports the float model to ONNX with a dynamic batch dimension.
+
+    Returns:
+        str: Path of the written model.
+    """
+    example = torch.zeros(1, window_size, config["input_channel"])
+    torch.onnx.export(model, (example,), path, input_names=["windows"], output_names=["logits"],
+                      dynamic_axes={"windows": {0: "batch"}, "logits": {0: "batch"}}, dynamo=False)
+    return path
+
+
+def quantize_onnx(path):
+    """
+    Int8 variant of a float ONNX export. Quantized PyTorch modules cannot be exported
+    to ONNX, so the weights are quantized with onnxruntime's own dynamic quantization
+    (requires onnxruntime).
+
+    Returns:
+        str: Path of the int8 model.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = path.replace(".onnx", "_int8.onnx")
+    quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxModel:
+    def __init__(self, path, num_threads=None):
+        """
+        onnxruntime session with the call signature of the PyTorch model:
+        (batch, window, channels) tensor -> (batch, classes) logits tensor.
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, windows):
+        windows = np.ascontiguousarray(torch.as_tensor(windows, dtype=torch.float32).numpy())
+        return torch.from_numpy(self.session.run(None, {"windows": windows})[0])
+
+    def eval(self):
+        return self
+
+
+def load_inference_model(path, num_threads=None):
+    """
+    Loads a model for CPU inference from any of the supported formats:
+        .pth  - training or stripped checkpoint (eager ConvLSTM)
+        .pt   - TorchScript export (float or int8)
+        .onnx - ONNX export (needs onnxruntime)
+
+    Returns:
+        callable: Maps a (batch, window, channels) float tensor to (batch, classes) logits.
+    """
+    if path.endswith(".onnx"):
+        return OnnxModel(path, num_threads)
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if path.endswith(".pt"):
+        return torch.jit.load(path, map_location="cpu").eval()
+    return build_model(path)
+
+
+def load_test_set(path):
+    """
+    Reads train and test data from a REALDISP_*.mat file, or from a directory of .npy
+    files written by windowedDataset.convert_mat.
+
+    Returns:
+        tuple: (train features, test features, test labels)
+    """
+    if os.path.isdir(path):
+        load = lambda key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r")
+        return load("trainData"), load("testData"), load("testLabels").reshape(-1)
+
+    from scipy.io import loadmat
+
+    data = loadmat(path, variable_names=["trainData", "testData", "testLabels"])
+    return data["trainData"], data["testData"], data["testLabels"].reshape(-1)
+
+
+def compare_accuracy(models, test_path, window_size=64, step=32, batch_size=256):
+    """
+    Scores every model on the sliding windows of a test set (normalized with the
+    training mean/std) and compares its predictions with the first (reference) model.
+
+    Args:
+        models (dict): Name -> model callable; the first entry is the reference.
+        test_path (str): .mat file or convert_mat directory (see load_test_set).
+
+    Returns:
+        list: One dict per model with accuracy, F1, deltas and top-1 agreement.
+    """
+    from misalignment import classification_metrics, predict_windows
+    from windowedDataset import WindowedDataset, compute_normalization
+
+    train, test, labels = load_test_set(test_path)
+    mean, std = compute_normalization(train)
+    dataset = WindowedDataset(test, labels, window_size, step, mean=mean, std=std)
+
+    results, reference = [], None
+    for name, model in models.items():
+        predictions, true_labels = predict_windows(model, dataset, batch_size=batch_size)
+        metrics = classification_metrics(true_labels, predictions)
+        if reference is None:
+            reference = (predictions, metrics)
+        results.append({"model": name, **metrics,
+                        "accuracy_delta": metrics["accuracy"] - reference[1]["accuracy"],
+                        "f1_delta": metrics["f1_macro"] - reference[1]["f1_macro"],
+                        "agreement": float((predictions == reference[0]).mean())})
+    return results
+
+
+def check_path(path):
+    """File holding the recorded accuracy check of an exported artifact."""
+    return os.path.splitext(path)[0] + ".check.json"
+
+
+def record_check(path, result):
+    """
+    Stores the compare_accuracy result of an int8 artifact, together with the size and
+    mtime of the artifact so that a later re-export invalidates it.
+
+    Returns:
+        bool: Whether the artifact passed.
+    """
+    stat = os.stat(path)
+    passed = result["agreement"] >= MIN_INT8_AGREEMENT and result["accuracy_delta"] >= -MAX_INT8_ACCURACY_DROP
+    with open(check_path(path), "w") as f:
+        json.dump({**result, "passed": passed, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}, f, indent=2)
+    return passed
+
+
+def check_passed(path):
+    """Whether the current file at `path` has a recorded, passing accuracy check."""
+    try:
+        with open(check_path(path)) as f:
+            check = json.load(f)
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return False
+    return bool(check.get("passed")) and (check.get("size"), check.get("mtime_ns")) == (stat.st_size, stat.st_mtime_ns)
+
+
+def select_model_path(paths):
+    """
+    First existing model of `paths`. Int8 artifacts are skipped unless their accuracy
+    check passed (see record_check), so an unchecked quantized model is never preferred.
+
+    Returns:
+        str | None: The selected path.
+    """
+    for path in paths:
+        if os.path.exists(path) and ("_int8" not in os.path.basename(path) or check_passed(path)):
+            return path
+    return None
+
+
+def file_size(path):
+    return f"{os.path.getsize(path) / 1e6:.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("checkpoint")
+    parser.add_argument("--output-dir", default="models")
+    parser.add_argument("--format", nargs="+", choices=["torchscript", "onnx"], default=["torchscript"])
+    parser.add_argument("--quantize", action="store_true", help="Also write dynamic int8 variants")
+    parser.add_argument("--test", help="REALDISP .mat file (or convert_mat directory) to check accuracy on")
+    parser.add_argument("--window", type=int, default=WINDOW_SIZE)
+    parser.add_argument("--step", type=int, default=32)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = os.path.join(args.output_dir, os.path.splitext(os.path.basename(args.checkpoint))[0])
+
+    config = strip_checkpoint(args.checkpoint, stem + "_inference.pth")
+    print(f"Checkpoint {file_size(args.checkpoint)} -> weights only {file_size(stem + '_inference.pth')}")
+    model = build_model(stem + "_inference.pth")
+
+    artifacts = {"float (eager)": stem + "_inference.pth"}
+    if isinstance(model, StreamingConvLSTM):
+        # An exported graph only runs whole windows; the app would prefer it over the
+        # stateful StreamingInference path of the eager checkpoint
+        print("Streaming checkpoint: keeping the eager model only, no TorchScript/ONNX export")
+        args.format = []
+    if "torchscript" in args.format:
+        export_torchscript(model, stem + ".pt", config, args.window)
+        artifacts["float (TorchScript)"] = stem + ".pt"
+        if args.quantize:
+            export_torchscript(quantize(model), stem + "_int8.pt", config, args.window)
+            artifacts["int8 (TorchScript)"] = stem + "_int8.pt"
+    if "onnx" in args.format:
+        artifacts["float (ONNX)"] = export_onnx(model, stem + ".onnx", config, args.window)
+        if args.quantize:
+            artifacts["int8 (ONNX)"] = quantize_onnx(artifacts["float (ONNX)"])
+
+    for name, path in artifacts.items():
+        print(f"{name:>20}: {path} ({file_size(path)})")
+
+    if args.test:
+        models = {name: load_inference_model(path) for name, path in artifacts.items()}
+        for row in compare_accuracy(models, args.test, args.window, args.step):
+            check = ""
+            if row["model"].startswith("int8"):
+                check = ", check passed" if record_check(artifacts[row["model"]], row) else ", check FAILED"
+            print(f"{row['model']:>20}: accuracy {row['accuracy']:.4f} ({row['accuracy_delta']:+.4f}), "
+                  f"F1 {row['f1_macro']:.4f} ({row['f1_delta']:+.4f}), agreement {row['agreement']:.4f}{check}")
+    elif args.quantize:
+        print("No --test set: the int8 artifacts are not used by the app until their accuracy is checked")
+
+
+if __name__ == "__main__":
+    main()
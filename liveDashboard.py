@@ -0,0 +1,62 @@
+import time
+
+import customtkinter as ctk
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+from dashboardPlot import DashboardPlot
+
+
+class LiveDashboard(ctk.CTkToplevel):
+    def __init__(self, parent, ble, fps=25, seconds=10, axis=2):
+        """
+        Window with live sensor traces and packet timing, fed from the BLE buffers.
+
+        Redraws run on a Tk after() timer in the GUI thread and only read the buffers,
+        so the streaming thread is never blocked.
+
+        Args:
+            parent: Parent window.
+            ble (BLE): Streaming BLE instance whose sensor_readings are shown.
+            fps (int): Target redraw rate.
+            seconds (float): Length of the visible window.
+            axis (int): Column of the 9-axis sample to plot.
+        """
+        super().__init__(parent)
+        self.title("Live Sensor View")
+        self.geometry("800x650")
+        self.ble = ble
+        self.period_ms = int(1000 / fps)
+
+        self.figure = Figure(figsize=(8, 6.5), dpi=100)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.plot = DashboardPlot(self.figure, list(ble.RFDUINO_NAME_TO_UUID), seconds=seconds, axis=axis,
+                                  nominal_interval_ms=1000 / ble.sample_rate_hz)
+        self.canvas.draw()
+
+        self.frame_times = []
+        self.is_open = True
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.after(self.period_ms, self._tick)
+
+    def _tick(self):
+        if not self.is_open:
+            return
+        t0 = time.perf_counter()
+        # Shallow copy: the streaming thread may add sensors while we iterate
+        self.plot.update(dict(self.ble.sensor_readings), self.ble.metrics)
+
+        # Show the achieved frame rate once per second
+        self.frame_times.append(t0)
+        if self.frame_times[-1] - self.frame_times[0] >= 1:
+            fps = (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+            self.title(f"Live Sensor View ({fps:.0f} fps)")
+            self.frame_times = [t0]
+
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        self.after(max(int(self.period_ms - elapsed_ms), 1), self._tick)
+
+    def close(self):
+        self.is_open = False
+        self.destroy()
@@ -0,0 +1,269 @@
+import queue
+import threading
+import time
+
+import numpy as np
+import torch
+
+from calibration import Calibration, DEFAULT_CALIBRATION_PATH
+from convLSTM import ConvLSTM, IncrementalConvLSTM, SlidingWindowModel, StreamingConvLSTM, StreamingInference, activity_name
+from exportModel import load_inference_model
+from sensorAlignment import StreamAligner
+
+# Column order the 54-channel model was evaluated with on self-collected data
+LIVE_SENSOR_ORDER = ["LArm", "Back", "RThigh", "RShank", "LShank", "RArm"]
+
+_NO_ITEM = object()  # Marks a drain that did not start with an already dequeued packet
+
+
+class LiveInference:
+    def __init__(self, model_path, normalization_path, on_prediction, sensor_order=LIVE_SENSOR_ORDER,
+                 window_size=64, step=16, rate_hz=50, num_threads=2,
+                 calibration_path=DEFAULT_CALIBRATION_PATH, pool=None):
+        """
+        Runs the ConvLSTM on the live sensor feed in a worker thread.
+
+        The BLE notify handlers only enqueue raw packets (observe). The worker aligns the
+        sensors on a common grid, calibrates and normalizes the new frames, keeps a sliding
+        window of the last `window_size` frames and runs the model every `step` new frames.
+        Overlapping windows reuse the cached first-layer features (IncrementalConvLSTM). A
+        StreamingConvLSTM checkpoint instead runs every frame through the network once and
+        carries the LSTM state forward (StreamingInference).
+
+        With a shared InferencePool there is no worker thread per instance: the pool
+        aligns the packets of every session and runs the windows of all sessions that are
+        due in one batch (streaming models keep their state per session and step alone).
+
+        Args:
+            model_path (str): ConvLSTM checkpoint (.pth) trained on len(sensor_order) * 9 channels,
+                or an export of it (.pt / .onnx, see exportModel.py).
+            normalization_path (str): .npz with the training 'mean' and 'std' per channel.
+            on_prediction (callable): Called as on_prediction(label, name, latency_ms) from the worker.
+            sensor_order (list): Sensor names in model input order.
+            window_size (int): Frames per model window.
+            step (int): New frames between two predictions.
+            rate_hz (float): Frame rate of the aligned feed.
+            num_threads (int): Torch CPU threads used by the worker.
+            calibration_path (str): Calibration config of the sensors (see calibration.py).
+            pool (InferencePool | None): Shared worker and model; `model_path` and `num_threads`
+                are then taken from the pool.
+        """
+        self.sensor_order = list(sensor_order)
+        self.window_size = window_size
+        self.step = step
+        self.rate_hz = rate_hz
+        self.on_prediction = on_prediction
+
+        self.pool = pool
+        self.model = pool.model if pool is not None else load_inference_model(model_path, num_threads=num_threads)
+        if isinstance(self.model, StreamingConvLSTM):
+            self.engine = StreamingInference(self.model, window_size=window_size)
+        elif pool is not None:  # Only the window is kept here; the pool runs the model on batches
+            self.engine = SlidingWindowModel(None, window_size, len(self.sensor_order) * 9)
+        elif isinstance(self.model, ConvLSTM):
+            self.engine = IncrementalConvLSTM(self.model, window_size=window_size)
+        else:  # Exported graphs do not expose their layers, run whole windows
+            self.engine = SlidingWindowModel(self.model, window_size, len(self.sensor_order) * 9)
+        normalization = np.load(normalization_path)
+
+        # Unit conversion and normalization fused into one (frames x 54) broadcast
+        self.calibration = Calibration.from_file(calibration_path, self.sensor_order).normalized(
+            normalization["mean"], normalization["std"])
+
+        self.packets = queue.Queue()
+        self.is_running = True
+        self.last_latency_ms = None
+        self.scheduled = False  # Waiting in the pool's queue
+        if pool is None:
+            self.worker = threading.Thread(target=self._run, daemon=True)
+            self.worker.start()
+        else:
+            self._reset_state()
+            pool.add(self)
+
+    def reset(self):
+        """Starts a new session: clears the aligner and the sliding window."""
+        self._put(None)
+
+    def _put(self, item):
+        self.packets.put(item)
+        if self.pool is not None and not self.scheduled:
+            self.scheduled = True
+            self.pool.schedule(self)
+
+    def observe(self, sensor_name, samples, t_received, device_times=None):
+        """
+        Queues raw samples of a sensor (cheap, safe to call from the notify handler).
+
+        Args:
+            sensor_name (str): Name of the sending sensor.
+            samples (bytes | bytearray | np.ndarray): A raw `<hhhhhhhhh` payload, or (n, 9)
+                decoded int16 samples of a multi-sample packet.
+            t_received (float | np.ndarray): Host receive time(s) in milliseconds since connection.
+            device_times (np.ndarray | None): Device times of the samples in ms, if known.
+        """
+        if sensor_name in self.sensor_order:
+            if isinstance(samples, (bytes, bytearray)):
+                samples = np.frombuffer(samples, dtype="<i2", count=9)
+            samples = np.array(samples).reshape(-1, 9)  # Copy: the packet buffer may be reused
+            self._put((sensor_name, samples, np.atleast_1d(t_received), device_times, time.perf_counter()))
+
+    def stop(self):
+        self.is_running = False
+        if self.pool is not None:
+            self.pool.remove(self)
+        else:
+            self.packets.put(None)
+
+    def _reset_state(self):
+        self.aligner = StreamAligner(self.sensor_order, rate_hz=self.rate_hz)
+        self.engine.reset()
+        self.new_frames = 0        # Frames added since the last prediction
+
+    def _run(self):
+        self._reset_state()
+        while self.is_running:
+            last_arrival = self._drain(self.packets.get())
+            if self._due():
+                self._deliver(self.predict(), last_arrival)
+
+    def _drain(self, item=_NO_ITEM):
+        """
+        Aligns everything that queued up (e.g. while the model was running) and pushes the
+        new frames into the window.
+
+        Args:
+            item: A packet already taken from the queue (None is a reset request).
+
+        Returns:
+            float | None: Arrival time of the newest packet.
+        """
+        last_arrival = None
+        while True:
+            if item is None:
+                self._reset_state()
+            elif item is not _NO_ITEM:
+                sensor_name, samples, host_times, device_times, last_arrival = item
+                for i in range(len(samples)):
+                    self.aligner.observe(sensor_name, samples[i], host_times[i],
+                                         None if device_times is None else device_times[i])
+            try:
+                item = self.packets.get_nowait()
+            except queue.Empty:
+                break
+
+        aligned = self.aligner.pop_aligned()
+        if aligned is not None:
+            self._push_frames(aligned[1])
+        return last_arrival
+
+    def _due(self):
+        """Whether a full window with `step` new frames is waiting for a prediction."""
+        if self.engine.ready and self.new_frames >= self.step:
+            self.new_frames = 0
+            return True
+        return False
+
+    def _deliver(self, label, last_arrival):
+        if last_arrival is not None:
+            self.last_latency_ms = (time.perf_counter() - last_arrival) * 1000
+        self.on_prediction(label, activity_name(label), self.last_latency_ms)
+
+    def _push_frames(self, raw):
+        frames = self.calibration.apply(raw, out=raw)
+        self.engine.push(frames)
+        self.new_frames += len(frames)
+
+    def predict(self):
+        """Returns the 1-based REALDISP label predicted for the current window."""
+        return int(self.engine.predict_logits().argmax(dim=1)) + 1
+
+
+class InferencePool:
+    def __init__(self, model_path, num_threads=2, max_batch=32):
+        """
+        One model and one worker thread shared by the LiveInference instances of several
+        sessions (pass it as `pool`).
+
+        The notify handlers of every session only queue packets and schedule their session.
+        The worker takes all scheduled sessions at once, aligns their new packets and runs
+        the windows that are due for a prediction as one (batch, window, channels) forward
+        pass, so the model cost per prediction drops as more subjects stream.
+
+        Args:
+            model_path (str): Model for load_inference_model (.pth / .pt / .onnx); every
+                session must use its input layout.
+            num_threads (int): Torch CPU threads of the worker.
+            max_batch (int): Largest number of windows per forward pass.
+        """
+        self.model = load_inference_model(model_path, num_threads=num_threads)
+        self.max_batch = max_batch
+        self.sessions = set()
+        self.scheduled = queue.Queue()  # Sessions (LiveInference) with queued packets
+        self.batches = 0
+        self.windows = 0
+        self.is_running = True
+        self.worker = threading.Thread(target=self._run, name="inference-pool", daemon=True)
+        self.worker.start()
+
+    def add(self, session):
+        self.sessions.add(session)
+
+    def remove(self, session):
+        self.sessions.discard(session)
+
+    def schedule(self, session):
+        """Wakes the worker for a session with new packets (safe to call from any thread)."""
+        self.scheduled.put(session)
+
+    def stop(self):
+        self.is_running = False
+        self.scheduled.put(None)
+
+    @property
+    def mean_batch(self):
+        return self.windows / self.batches if self.batches else 0.0
+
+    def _run(self):
+        while self.is_running:
+            sessions = [self.scheduled.get()]
+            while True:
+                try:
+                    sessions.append(self.scheduled.get_nowait())
+                except queue.Empty:
+                    break
+
+            due = []
+            for session in dict.fromkeys(sessions):
+                if session is None or session not in self.sessions:
+                    continue
+                session.scheduled = False  # Packets queued from now on schedule it again
+                last_arrival = session._drain()
+                if session._due():
+                    due.append((session, last_arrival))
+
+            if isinstance(self.model, StreamingConvLSTM):  # The state is per session, nothing to batch
+                for session, last_arrival in due:
+                    session._deliver(session.predict(), last_arrival)
+                    self.batches += 1
+                    self.windows += 1
+                continue
+            for start in range(0, len(due), self.max_batch):
+                batch = due[start:start + self.max_batch]
+                with torch.inference_mode():
+                    logits = self.model(torch.cat([session.engine.window for session, _ in batch]))
+                self.batches += 1
+                self.windows += len(batch)
+                for (session, last_arrival), label in zip(batch, (logits.argmax(dim=1) + 1).tolist()):
+                    session._deliver(label, last_arrival)
+
+
+def save_normalization(train_data, path):
+    """
+    Stores the per-channel mean/std of the training data used to normalize live windows.
+
+    Args:
+        train_data (np.ndarray): Training features, shape (frames, channels).
+        path (str): Output .npz path.
+    """
+    np.savez(path, mean=np.mean(train_data, axis=0), std=np.std(train_data, axis=0))
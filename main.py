@@ -1,5 +1,11 @@
+import logging
+import sys
+
 from app import App
 
 if __name__ == "__main__":
+    # Per-packet handler output is opt-in: python main.py --debug
+    logging.basicConfig(level=logging.DEBUG if "--debug" in sys.argv else logging.INFO,
+                        format="%(asctime)s %(name)s %(levelname)s: %(message)s")
     app = App()
     app.mainloop()
\ No newline at end of file
@@ -1,7 +1,25 @@
+import importlib
+import logging
+import os
+import threading
+import time
 import customtkinter as ctk
 from bleConnection import BLE
+from statusChannel import StatusChannel
 import tkinter as tk
 
+logger = logging.getLogger(__name__)
+
+# Live activity recognition is enabled when a model and the normalization exist.
+# The first existing model is used (exports from exportModel.py load faster); the int8
+# export only once exportModel.py --test has recorded a passing accuracy check for it.
+MODEL_PATHS = ["models/convlstm_54_int8.pt", "models/convlstm_54.pt", "models/convlstm_54.pth"]
+NORMALIZATION_PATH = "models/normalization_54.npz"
+INFERENCE_STEP = 16  # New frames between two predictions (16 frames = 320 ms at 50 Hz)
+STATUS_INTERVAL_MS = 100  # How often the status label picks up the latest message
+# Loaded in the background after the window is shown (plotting and export pull in matplotlib/pandas)
+WARM_UP_MODULES = ["liveDashboard", "sessionAnalysis"]
+
 class MainFrame(ctk.CTkFrame):
     def __init__(self, parent):
         """
@@ -15,9 +33,15 @@ class MainFrame(ctk.CTkFrame):
         # Shared variable to display status updates (e.g., "Connected", "Streaming...")
         self.connection_status = tk.StringVar(value="Ready to connect")
 
+        # Worker threads publish status messages here; the label polls the latest one
+        self.status_channel = StatusChannel()
+        self.status_channel.bind(self, "status", self.connection_status.set, interval_ms=STATUS_INTERVAL_MS)
+
         # Set up label and BLE instance
         self.make_labels()
-        self.ble = BLE(self.connection_status)
+        self.ble = BLE(self.status_channel)
+        self.live_inference = None  # Loaded by the warm-up thread (see start_warm_up)
+        self.live_dashboard = None
 
         # Add control buttons
         self.make_buttons()
@@ -60,9 +84,73 @@ class MainFrame(ctk.CTkFrame):
         )
         button_connect.pack(pady=(0, 0), padx=20, side="bottom")
 
+        # Button to open the live sensor view
+        button_live_view = ctk.CTkButton(
+            self,
+            text="Live View",
+            width=int(w / 2.8),
+            height=int(h / 15),
+            command=self.open_live_dashboard
+        )
+        button_live_view.pack(pady=(0, 10), padx=20, side="bottom")
+
     def make_labels(self):
         """
         Displays a dynamic label that reflects BLE connection status.
         """
         status_label = ctk.CTkLabel(self, textvariable=self.connection_status)
         status_label.pack(pady=100)
+
+    def make_live_inference(self):
+        """
+        Attaches the ConvLSTM live inference stage to the BLE stream if a trained model
+        and its training normalization are available.
+        """
+        self.live_inference = None
+        if not os.path.exists(NORMALIZATION_PATH):
+            return
+        from exportModel import select_model_path
+
+        model_path = select_model_path(MODEL_PATHS)
+        if model_path is None:
+            return
+
+        from liveInference import LiveInference
+        self.live_inference = LiveInference(model_path, NORMALIZATION_PATH, self.show_prediction,
+                                            step=INFERENCE_STEP)
+        self.ble.live_inference = self.live_inference
+
+    def start_warm_up(self):
+        """
+        Loads the live inference model and the plotting/export modules in a background
+        thread, so the window appears before torch, matplotlib and pandas are imported and
+        the first Live View or export does not stall. Call once the window is shown.
+        """
+        threading.Thread(target=self._warm_up, name="warm-up", daemon=True).start()
+
+    def _warm_up(self):
+        t0 = time.perf_counter()
+        try:
+            for module in WARM_UP_MODULES:
+                importlib.import_module(module)
+            self.make_live_inference()
+        except Exception as e:  # The dashboard and exports still load on first use
+            logger.warning(f"Warm-up failed: {e}")
+        logger.info(f"Warm-up finished in {time.perf_counter() - t0:.1f} s")
+
+    def open_live_dashboard(self):
+        """
+        Opens (or raises) the live sensor view. Plotting modules are loaded on first use.
+        """
+        if self.live_dashboard is not None and self.live_dashboard.is_open:
+            self.live_dashboard.focus()
+            return
+
+        from liveDashboard import LiveDashboard
+        self.live_dashboard = LiveDashboard(self.master, self.ble)
+
+    def show_prediction(self, label, name, latency_ms):
+        """
+        Displays the latest predicted activity in the status label (called from the inference thread).
+        """
+        self.status_channel.set(f"Activity: {name}\n(latency {latency_ms:.0f} ms)")
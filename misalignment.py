@@ -0,0 +1,253 @@
+import itertools
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from windowing import majority_labels
+
+SENSOR_LENGTH = 9  # Features per sensor
+
+# A misalignment scenario: `distortions` maps a 1-based sensor index to a list of
+# (operation, parameter) pairs applied in order. Operations:
+#   ("drop", N)    - drop every N-th row (slower sensor), like the notebooks' drop_rows
+#   ("insert", N)  - insert an interpolated row after every N-th row (faster sensor), like interpolate
+#   ("shift", k)   - delay the sensor by k rows (k < 0: advance it)
+#   ("drift", e)   - resample as if the sensor clock ran (1 + e) times faster
+Scenario = namedtuple("Scenario", ["name", "distortions"])
+
+
+def _positions(n_rows, operation, parameter):
+    """Source row positions (float) produced by one distortion of an n_rows stream."""
+    rows = np.arange(n_rows, dtype=np.float64)
+    if operation == "drop":
+        return rows[rows % parameter != 0]
+    if operation == "insert":
+        inserted = rows[(rows % parameter == 0) & (rows + 1 < n_rows)] + 0.5
+        return np.sort(np.concatenate([rows, inserted]), kind="mergesort")
+    if operation == "shift":
+        return np.clip(rows - parameter, 0, n_rows - 1)
+    if operation == "drift":
+        length = int(np.floor((n_rows - 1) * (1 + parameter))) + 1
+        return np.arange(length) / (1 + parameter)
+    raise ValueError(f"Unknown distortion: {operation}")
+
+
+def sensor_positions(n_rows, distortions):
+    """Composes a list of distortions into one array of source positions."""
+    positions = np.arange(n_rows, dtype=np.float64)
+    for operation, parameter in distortions:
+        step = _positions(len(positions), operation, parameter)
+        positions = np.interp(step, np.arange(len(positions)), positions)
+    return positions
+
+
+def apply_scenario(features, labels, scenario, num_sensors=None, repeats=1):
+    """
+    Applies a misalignment scenario to all sensors at once.
+
+    Every sensor's distortions are reduced to an array of source positions; all
+    sensors are then trimmed to the shortest result and gathered with one
+    interpolating fancy index. Inserted rows take the label of the preceding
+    frame and the final label of each frame is the majority across sensors.
+
+    Args:
+        features (np.ndarray): (frames, num_sensors * 9) feature matrix.
+        labels (np.ndarray): (frames,) integer labels.
+        scenario (Scenario): Distortions to apply.
+        num_sensors (int | None): Number of sensors (default: features.shape[1] // 9).
+        repeats (int): Misalign the frames tiled this many times (like np.tile(features,
+            (repeats, 1))); positions wrap around instead of copying the input.
+
+    Returns:
+        tuple: (misaligned features (frames', num_sensors * 9) float32, labels (frames',))
+    """
+    num_sensors = num_sensors or features.shape[1] // SENSOR_LENGTH
+    n_frames = len(features)
+    n_rows = n_frames * repeats
+    positions = [sensor_positions(n_rows, scenario.distortions.get(s + 1, [])) for s in range(num_sensors)]
+    length = min(len(p) for p in positions)
+    positions = np.stack([p[:length] for p in positions])  # (sensors, frames')
+
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, n_rows - 1)
+    weight = (positions - lower).astype(np.float32)[..., None]
+    lower %= n_frames
+    upper %= n_frames
+
+    frames = np.asarray(features).reshape(n_frames, num_sensors, SENSOR_LENGTH)
+    sensors = np.arange(num_sensors)
+    v0 = frames[lower.T, sensors].astype(np.float32)  # (frames', sensors, 9)
+    v1 = frames[upper.T, sensors].astype(np.float32)
+    misaligned = v0 + (v1 - v0) * weight.transpose(1, 0, 2)
+
+    # Majority vote of the per-sensor labels (ties resolve to the smallest label, like bincount.argmax)
+    sensor_labels = np.asarray(labels)[lower]  # (sensors, frames')
+    return misaligned.reshape(length, -1), majority_labels(sensor_labels.T)
+
+
+def random_split_scenario(num_sensors, misaligning_row, rng=None):
+    """
+    The notebooks' misalign_test_set scenario: a random third of the sensors drops
+    every N-th row, another third gets interpolated rows, the rest is unchanged.
+    """
+    rng = rng or np.random.default_rng()
+    order = rng.permutation(num_sensors) + 1
+    third = num_sensors // 3
+    distortions = {int(s): [("drop", misaligning_row)] for s in order[:third]}
+    distortions.update({int(s): [("insert", misaligning_row)] for s in order[third:2 * third]})
+    return Scenario(f"split_row{misaligning_row}", distortions)
+
+
+def iter_scenarios(num_sensors, misaligning_rows=(), drift_rates=(), shifts=(), seeds=(0,)):
+    """
+    Lazily generates a grid of scenarios (nothing is materialised up front).
+
+    Yields, per seed:
+        - a baseline without distortions,
+        - a drop/insert split for every misaligning row,
+        - for every drift rate: a random third of the sensors drifting +rate, another third -rate,
+        - for every shift: a random third of the sensors delayed by that many rows.
+    """
+    for seed in seeds:
+        yield Scenario(f"aligned_seed{seed}", {})
+        for row in misaligning_rows:
+            scenario = random_split_scenario(num_sensors, row, np.random.default_rng(seed))
+            yield scenario._replace(name=f"{scenario.name}_seed{seed}")
+        for rate, shift in itertools.chain(((r, None) for r in drift_rates), ((None, k) for k in shifts)):
+            order = np.random.default_rng(seed).permutation(num_sensors) + 1
+            third = max(num_sensors // 3, 1)
+            if rate is not None:
+                distortions = {int(s): [("drift", rate)] for s in order[:third]}
+                distortions.update({int(s): [("drift", -rate)] for s in order[third:2 * third]})
+                yield Scenario(f"drift{rate:g}_seed{seed}", distortions)
+            else:
+                yield Scenario(f"shift{shift}_seed{seed}", {int(s): [("shift", shift)] for s in order[:third]})
+
+
+def classification_metrics(true_labels, predictions):
+    """
+    Accuracy, macro F1 and the mean/std of per-class F1 (over classes present in either array).
+    """
+    true_labels = np.asarray(true_labels, dtype=np.int64)
+    predictions = np.asarray(predictions, dtype=np.int64)
+    classes = np.union1d(true_labels, predictions)
+    true_index = np.searchsorted(classes, true_labels)
+    pred_index = np.searchsorted(classes, predictions)
+    confusion = np.bincount(true_index * len(classes) + pred_index,
+                            minlength=len(classes) ** 2).reshape(len(classes), len(classes))
+    tp = np.diag(confusion).astype(np.float64)
+    precision = np.divide(tp, confusion.sum(axis=0), out=np.zeros_like(tp), where=confusion.sum(axis=0) > 0)
+    recall = np.divide(tp, confusion.sum(axis=1), out=np.zeros_like(tp), where=confusion.sum(axis=1) > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros_like(tp), where=precision + recall > 0)
+    return {
+        "accuracy": float(tp.sum() / max(len(true_labels), 1)),
+        "f1_macro": float(f1.mean()),
+        "f1_std": float(f1.std()),
+    }
+
+
+# Per-process state of the sweep workers (loaded once by _init_worker)
+_worker = {}
+
+
+def _init_worker(frames_path, labels_path, checkpoint_path, mean, std, window_size, step, repeats, threads):
+    import torch
+    from convLSTM import load_model
+
+    torch.set_num_threads(threads)
+    features = np.load(frames_path, mmap_mode="r")
+    labels = np.load(labels_path, mmap_mode="r")
+    _worker.update(features=features, labels=labels, mean=mean, std=std, window_size=window_size, step=step,
+                   repeats=repeats, model=load_model(checkpoint_path, input_channel=features.shape[1]))
+
+
+def predict_windows(model, dataset, batch_size=256):
+    """Runs the model over every window of a WindowedDataset; returns 1-based predictions and labels."""
+    import torch
+
+    predictions, true_labels = [], []
+    with torch.inference_mode():
+        for start in range(0, len(dataset), batch_size):
+            inputs, labels = dataset.__getitems__(range(start, min(start + batch_size, len(dataset))))
+            predictions.append(model(inputs).argmax(dim=1).numpy() + 1)
+            true_labels.append(labels.numpy())
+    return np.concatenate(predictions), np.concatenate(true_labels)
+
+
+def scenario_predictions(model, features, labels, scenario, mean, std, window_size=64, step=32, repeats=1,
+                         batch_size=256, order=None):
+    """
+    Misaligns the test set, windows it and runs the model over every window.
+
+    Args:
+        model (callable): ConvLSTM matching the number of channels.
+        features (np.ndarray): Raw (frames, channels) test features, may be memory-mapped.
+        labels (np.ndarray): (frames,) labels.
+        scenario (Scenario): Distortions to apply.
+        mean (np.ndarray): Training mean per channel.
+        std (np.ndarray): Training std per channel.
+        window_size (int): Frames per window.
+        step (int): Window stride.
+        repeats (int): Misalign the test set tiled this many times.
+        batch_size (int): Windows per forward pass.
+        order (np.ndarray | None): Optional frame order of the test set (e.g. from
+            windowing.activity_order), applied before the distortions.
+
+    Returns:
+        tuple: (1-based predictions, true labels, number of misaligned frames)
+    """
+    from windowedDataset import WindowedDataset
+
+    if scenario.distortions:
+        if order is not None:
+            features, labels = features[order], labels[order]
+            order = None
+        features, labels = apply_scenario(features, labels, scenario, repeats=repeats)
+        repeats = 1
+    # Without distortions the windows read the (memory-mapped) test set directly
+    dataset = WindowedDataset(features, labels, window_size, step, mean=mean, std=std, order=order, repeats=repeats)
+    predictions, true_labels = predict_windows(model, dataset, batch_size=batch_size)
+    return predictions, true_labels, dataset.n_virtual
+
+
+def evaluate_scenario(scenario):
+    """Worker task: misalign, window, predict and score one scenario."""
+    predictions, true_labels, frames = scenario_predictions(
+        _worker["model"], _worker["features"], _worker["labels"], scenario, _worker["mean"], _worker["std"],
+        _worker["window_size"], _worker["step"], _worker["repeats"])
+    return {"scenario": scenario.name, "frames": frames, "windows": len(predictions),
+            **classification_metrics(true_labels, predictions)}
+
+
+def run_sweep(frames_path, labels_path, checkpoint_path, scenarios, mean, std, window_size=64, step=32,
+              repeats=1, workers=None, threads_per_worker=1):
+    """
+    Evaluates a grid of misalignment scenarios across a process pool.
+
+    Each worker memory-maps the test set and loads the model once; scenarios are
+    streamed to the pool from the (lazy) `scenarios` iterable.
+
+    Args:
+        frames_path (str): Test features .npy (frames, channels), raw (un-normalized).
+        labels_path (str): Test labels .npy (frames,).
+        checkpoint_path (str): ConvLSTM checkpoint matching the number of channels.
+        scenarios (iterable): Scenario objects, e.g. from iter_scenarios.
+        mean (np.ndarray): Training mean per channel.
+        std (np.ndarray): Training std per channel.
+        window_size (int): Frames per window.
+        step (int): Window stride.
+        repeats (int): Misalign the test set tiled this many times (as the notebooks do).
+        workers (int | None): Number of processes.
+        threads_per_worker (int): Torch threads per process.
+
+    Returns:
+        pandas.DataFrame: One row per scenario with accuracy and F1 scores.
+    """
+    import pandas as pd
+
+    init_args = (frames_path, labels_path, checkpoint_path, mean, std, window_size, step, repeats,
+                 threads_per_worker)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+        rows = list(pool.map(evaluate_scenario, scenarios))
+    return pd.DataFrame(rows)
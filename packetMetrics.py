@@ -0,0 +1,252 @@
+import json
+import math
+
+import numpy as np
+
+from sensorAlignment import ClockFit
+
+
+class IntervalHistogram:
+    def __init__(self, sub_bucket_bits=6, max_value_us=1 << 27):
+        """
+        Log-linear (HDR-style) histogram of packet inter-arrival times in microseconds.
+
+        Values below 2^sub_bucket_bits get one bucket each; above that every power of two
+        is split into 2^(sub_bucket_bits - 1) equal buckets, so the relative error of any
+        recorded value is below 2^-(sub_bucket_bits - 1) (~3 % with the default) while the
+        bucket count stays fixed (737 buckets up to 134 s). Values above `max_value_us`
+        fall into the last bucket.
+
+        Args:
+            sub_bucket_bits (int): Precision of the buckets.
+            max_value_us (int): Largest value with its own bucket.
+        """
+        self.sub_bucket_bits = sub_bucket_bits
+        self.half = 1 << (sub_bucket_bits - 1)
+        self.max_value_us = max_value_us
+        self.counts = [0] * (self.index(max_value_us) + 1)
+        self.total = 0
+
+    def index(self, value_us):
+        """Bucket of a non-negative integer value (O(1), no search)."""
+        shift = value_us.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value_us
+        return shift * self.half + (value_us >> shift)
+
+    def lower_bound(self, index):
+        """Smallest value that falls into bucket `index`."""
+        if index < 2 * self.half:
+            return index
+        shift = index // self.half - 1
+        return (index % self.half + self.half) << shift
+
+    def record(self, value_us):
+        self.counts[self.index(min(value_us, self.max_value_us))] += 1
+        self.total += 1
+
+    def percentile(self, q):
+        """Value (lower bucket bound, in microseconds) below which `q` percent of the values fall."""
+        if self.total == 0:
+            return None
+        cumulative = np.cumsum(self.counts)
+        index = int(np.searchsorted(cumulative, math.ceil(self.total * q / 100)))
+        return self.lower_bound(index)
+
+    def buckets(self):
+        """Non-empty buckets as [[lower bound us, upper bound us, count], ...]."""
+        return [[self.lower_bound(i), self.lower_bound(i + 1), count]
+                for i, count in enumerate(self.counts) if count]
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.total = 0
+
+
+class SensorMetrics:
+    def __init__(self, nominal_interval_ms=20.0, rate_time_constant_ms=1000.0):
+        """
+        Streaming packet statistics of one sensor in constant memory.
+
+        Every packet updates the counters, a running mean/variance of the inter-arrival
+        time (Welford), an exponentially weighted recent packet interval, the longest gap
+        and the inter-arrival histogram - all O(1).
+
+        Args:
+            nominal_interval_ms (float): Expected time between samples; used to estimate
+                loss for packets without sequence numbers.
+            rate_time_constant_ms (float): Time constant of the recent packet rate.
+        """
+        self.nominal_interval_ms = nominal_interval_ms
+        self.rate_time_constant_ms = rate_time_constant_ms
+        self.histogram = IntervalHistogram()
+        self.clock = ClockFit()  # Device -> host clock (offset/drift) for timestamped packets
+        self.packets = 0
+        self.samples = 0
+        self.sequence_lost = None  # Packets lost according to sequence numbers (None: not available)
+        self.first_time = None
+        self.last_time = None
+        self.mean_interval = 0.0
+        self.m2_interval = 0.0
+        self.recent_interval = None
+        self.max_gap = 0.0
+        self.max_gap_at = None
+
+    def record(self, t_received, samples=1, lost=None):
+        """
+        Adds one packet.
+
+        Args:
+            t_received (float): Host receive time in ms.
+            samples (int): Samples carried by the packet.
+            lost (int | None): Total packets lost so far according to sequence numbers.
+        """
+        self.packets += 1
+        self.samples += samples
+        if lost is not None:
+            self.sequence_lost = lost
+        last = self.last_time
+        self.last_time = t_received
+        if last is None:
+            self.first_time = t_received
+            return
+
+        interval = t_received - last
+        self.histogram.record(max(int(interval * 1000), 0))
+        n = self.packets - 1  # Number of intervals
+        delta = interval - self.mean_interval
+        self.mean_interval += delta / n
+        self.m2_interval += delta * (interval - self.mean_interval)
+        if self.recent_interval is None:
+            self.recent_interval = interval
+        else:
+            weight = min(max(interval, 0) / self.rate_time_constant_ms, 1.0)
+            self.recent_interval += weight * (interval - self.recent_interval)
+        if interval > self.max_gap:
+            self.max_gap = interval
+            self.max_gap_at = last
+
+    @property
+    def jitter(self):
+        """Standard deviation of the inter-arrival time in ms."""
+        return math.sqrt(self.m2_interval / (self.packets - 2)) if self.packets > 2 else 0.0
+
+    @property
+    def lost(self):
+        """Lost packets: from the sequence numbers if available, otherwise estimated from the timing."""
+        if self.sequence_lost is not None:
+            return self.sequence_lost
+        if self.packets < 2:
+            return 0
+        expected = round((self.last_time - self.first_time) / self.nominal_interval_ms) + 1
+        return max(expected - self.samples, 0)
+
+    def summary(self):
+        """Current statistics as a JSON-serializable dict (times in ms)."""
+        duration = (self.last_time - self.first_time) if self.packets > 1 else 0.0
+        percentiles = {f"p{q}": (self.histogram.percentile(q) / 1000 if self.histogram.total else None)
+                       for q in (50, 90, 99, 99.9)}
+        return {
+            "packets": self.packets,
+            "samples": self.samples,
+            "lost": self.lost,
+            "loss_from_sequence": self.sequence_lost is not None,
+            "loss_rate": self.lost / (self.packets + self.lost) if self.packets else 0.0,
+            "first_ms": self.first_time,
+            "last_ms": self.last_time,
+            "duration_ms": duration,
+            "mean_rate_hz": 1000 * (self.packets - 1) / duration if duration > 0 else None,
+            "recent_rate_hz": 1000 / self.recent_interval if self.recent_interval else None,
+            "interval_mean_ms": self.mean_interval if self.packets > 1 else None,
+            "interval_jitter_ms": self.jitter,
+            "interval_percentiles_ms": percentiles,
+            "max_gap_ms": self.max_gap,
+            "max_gap_at_ms": self.max_gap_at,
+            "clock_offset_ms": self.clock.offset if self.clock.n else None,
+            "clock_drift_ppm": self.clock.drift * 1e6 if self.clock.n > 1 else None,
+        }
+
+
+class PacketMetrics:
+    def __init__(self, nominal_interval_ms=20.0):
+        """
+        Per-sensor packet statistics of a stream (see SensorMetrics).
+
+        Updated from the BLE handlers; the GUI may read `summary()` or single sensors at
+        any time. Readers see plain counters that are at most one packet behind, so no
+        locking is needed.
+
+        Args:
+            nominal_interval_ms (float): Expected time between samples.
+        """
+        self.nominal_interval_ms = nominal_interval_ms
+        self.sensors = {}  # Sensor name -> SensorMetrics
+
+    def sensor(self, sensor_name):
+        """Metrics of a sensor (created on first use)."""
+        metrics = self.sensors.get(sensor_name)
+        if metrics is None:
+            metrics = self.sensors[sensor_name] = SensorMetrics(self.nominal_interval_ms)
+        return metrics
+
+    def record(self, sensor_name, t_received, samples=1, lost=None):
+        """Adds one packet of a sensor (see SensorMetrics.record)."""
+        self.sensor(sensor_name).record(t_received, samples, lost)
+
+    @property
+    def clock_fits(self):
+        """Sensor name -> ClockFit of every sensor with clock data."""
+        return {name: metrics.clock for name, metrics in self.sensors.items() if metrics.clock.n}
+
+    def reset(self):
+        self.sensors = {}
+
+    def summary(self):
+        """Statistics of every sensor as {sensor name: dict}."""
+        return {name: metrics.summary() for name, metrics in list(self.sensors.items())}
+
+    def report(self):
+        """One line per sensor for the console."""
+        lines = []
+        for name, s in self.summary().items():
+            rate = f"{s['mean_rate_hz']:.1f} Hz" if s["mean_rate_hz"] else "- Hz"
+            p99 = s["interval_percentiles_ms"]["p99"]
+            lines.append(f"{name}: {s['packets']} packets, {s['lost']} lost, {rate}, "
+                         f"jitter {s['interval_jitter_ms']:.1f} ms, "
+                         f"p99 {p99 if p99 is not None else float('nan'):.1f} ms, max gap {s['max_gap_ms']:.0f} ms")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        """
+        The summary plus the non-empty histogram buckets of every sensor, as written by to_json.
+
+        Layout: {"nominal_interval_ms": ..., "sensors": {name: {...summary, "histogram_us":
+        [[lower, upper, count], ...]}}}
+        """
+        sensors = {}
+        for name, metrics in list(self.sensors.items()):
+            sensors[name] = metrics.summary()
+            sensors[name]["histogram_us"] = metrics.histogram.buckets()
+        return {"nominal_interval_ms": self.nominal_interval_ms, "sensors": sensors}
+
+    def to_json(self, path):
+        """Writes to_dict() to `path`."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_parquet(self, path):
+        """
+        Writes the inter-arrival histograms as one table (sensor, lower_us, upper_us, count).
+        Requires pandas with a Parquet engine (pyarrow or fastparquet).
+        """
+        import pandas as pd
+
+        rows = [(name, lower, upper, count) for name, metrics in list(self.sensors.items())
+                for lower, upper, count in metrics.histogram.buckets()]
+        pd.DataFrame(rows, columns=["sensor", "lower_us", "upper_us", "count"]).to_parquet(path, index=False)
+
+
+def load_metrics(path):
+    """Reads a metrics file written by PacketMetrics.to_json."""
+    with open(path) as f:
+        return json.load(f)
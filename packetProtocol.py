@@ -0,0 +1,152 @@
+import struct
+
+import numpy as np
+
+# Sample packet protocol v2 (see Arduino IDE code/rfduino_v1_packets.ino)
+#
+#   byte 0      header: bits 5-7 protocol version, bit 4 has-timestamp flag, bits 0-3 sample count
+#   byte 1      uint8 sequence number (increments per packet, wraps at 256)
+#   [4 bytes]   uint32 device time of the first sample in ms (only if the flag is set)
+#   N x 18      N samples of 9 x int16 (ax ay az gx gy gz mx my mz), little-endian
+#
+# RFduino notifications are limited to 20 bytes, which fits one sample without a timestamp;
+# stacks with a larger MTU can pack up to 15 samples per notification.
+PROTOCOL_VERSION = 2
+TIMESTAMP_FLAG = 0x10
+COUNT_MASK = 0x0F
+MAX_SAMPLES = COUNT_MASK
+
+HEADER = struct.Struct("<BB")
+TIMESTAMP = struct.Struct("<I")
+
+
+def encode_packet(samples, sequence, timestamp=None):
+    """
+    Builds a v2 packet (the firmware's encoding, used for replay and testing).
+
+    Args:
+        samples (array-like): (n, 9) int16 samples, 1 <= n <= 15.
+        sequence (int): Packet sequence number (taken modulo 256).
+        timestamp (int | None): Device time of the first sample in ms.
+
+    Returns:
+        bytes: The packet payload.
+    """
+    samples = np.asarray(samples, dtype="<i2").reshape(-1, 9)
+    header = (PROTOCOL_VERSION << 5) | len(samples)
+    if timestamp is not None:
+        header |= TIMESTAMP_FLAG
+    packet = HEADER.pack(header, sequence & 0xFF)
+    if timestamp is not None:
+        packet += TIMESTAMP.pack(int(timestamp) & 0xFFFFFFFF)
+    return packet + samples.tobytes()
+
+
+class PacketDecoder:
+    def __init__(self, period_ms=20.0, width=9, dtype="<i2"):
+        """
+        Decodes v2 sample packets and tracks lost packets per sensor.
+
+        The samples are returned as a NumPy view over the packet bytes (no per-value
+        unpacking). Gaps in the sequence numbers count as lost packets; the device sample
+        index keeps advancing across them, so device times stay continuous. The 8-bit
+        sequence number cannot tell n lost packets from n + 256, so gaps of 256 packets or
+        more are counted from the packet times instead (see decode).
+
+        Args:
+            period_ms (float): Nominal sample period, used for device times when a packet
+                carries no timestamp and to time the samples within a packet.
+            width (int): Values per sample.
+            dtype (str): NumPy dtype of a single value.
+        """
+        self.period_ms = period_ms
+        self.width = width
+        self.dtype = np.dtype(dtype)
+        self.sample_bytes = width * self.dtype.itemsize
+        # Sensor name -> [next sequence, next sample index, packets received, packets lost,
+        #                 last receive time, last device timestamp]
+        self.state = {}
+
+    def decode(self, sensor_name, data, received_ms=None):
+        """
+        Decodes one packet of a sensor.
+
+        Args:
+            sensor_name (str): Name of the sending sensor.
+            data (bytes | bytearray): Raw notification payload.
+            received_ms (float | None): Host receive time of the packet. When the time since
+                the previous packet spans 256 packets or more, the lost count is taken as the
+                sequence gap plus the multiple of 256 closest to round(dt / packet period).
+                The device timestamps are used for this instead when both packets carry one,
+                as they are not shifted by delivery delays on the host.
+
+        Returns:
+            tuple: (samples (n, width) view over `data`, device times (n,) float64 in ms)
+
+        Raises:
+            ValueError: On a wrong protocol version, an empty packet or a length that does not
+                match the header.
+        """
+        header, sequence = HEADER.unpack_from(data)
+        if header >> 5 != PROTOCOL_VERSION:
+            raise ValueError(f"Unsupported packet version {header >> 5}")
+        count = header & COUNT_MASK
+        offset = HEADER.size
+        timestamp = None
+        if header & TIMESTAMP_FLAG:
+            timestamp = TIMESTAMP.unpack_from(data, offset)[0]
+            offset += TIMESTAMP.size
+        if count == 0:
+            raise ValueError("Packet without samples")
+        if len(data) != offset + count * self.sample_bytes:
+            raise ValueError(f"Packet of {len(data)} bytes does not hold {count} samples")
+        samples = np.frombuffer(data, dtype=self.dtype, count=count * self.width, offset=offset)
+
+        state = self.state.get(sensor_name)
+        if state is None:
+            state = self.state[sensor_name] = [sequence, 0, 0, 0, None, None]
+        elif state[0] is None:  # First packet after a reconnect (see resync)
+            state[0] = sequence
+            state[4] = state[5] = None
+        lost = (sequence - state[0]) & 0xFF  # Packets skipped since the last one
+        if timestamp is not None and state[5] is not None:
+            elapsed = (timestamp - state[5]) & 0xFFFFFFFF
+        elif received_ms is not None and state[4] is not None:
+            elapsed = received_ms - state[4]
+        else:
+            elapsed = None
+        if elapsed is not None:
+            skipped = round(elapsed / (count * self.period_ms)) - 1  # Packets the time gap holds
+            if skipped >= 0xFF:  # The sequence number may have wrapped: add the missing multiples of 256
+                lost += max(round((skipped - lost) / 256), 0) * 256
+        first_index = state[1] + lost * count
+        state[0] = (sequence + 1) & 0xFF
+        state[1] = first_index + count
+        state[2] += 1
+        state[3] += lost
+        state[4] = received_ms
+        state[5] = timestamp
+
+        offsets = np.arange(count) * self.period_ms
+        device_times = offsets + (timestamp if timestamp is not None else first_index * self.period_ms)
+        return samples.reshape(count, self.width), device_times
+
+    def resync(self, sensor_name, gap_ms):
+        """
+        Prepares for a sensor that reconnected after `gap_ms`: the firmware restarts its
+        sequence numbers on connect, so the next packet starts a new sequence and the
+        sample index skips the samples of the gap.
+        """
+        state = self.state.get(sensor_name)
+        if state is not None:
+            state[0] = None
+            state[1] += int(round(gap_ms / self.period_ms))
+
+    def received(self, sensor_name):
+        return self.state[sensor_name][2] if sensor_name in self.state else 0
+
+    def lost(self, sensor_name):
+        return self.state[sensor_name][3] if sensor_name in self.state else 0
+
+    def reset(self):
+        self.state = {}
@@ -0,0 +1,372 @@
+import numpy as np
+
+SENSOR_WIDTH = 9  # Values per sample (ax ay az gx gy gz mx my mz), for sensors without samples
+
+
+class ClockFit:
+    def __init__(self):
+        """
+        Online least-squares fit of host receive time against a sensor's own clock:
+
+            host_time = offset + slope * device_time
+
+        The slope captures the clock drift of the sensor relative to the host
+        (drift = slope - 1) and the offset its start time plus mean transport delay.
+        Statistics are kept centred (Welford / Chan), so updates are O(1) per sample
+        and numerically stable over hour-long recordings.
+        """
+        self.n = 0
+        self.mean_device = 0.0
+        self.mean_host = 0.0
+        self.m2_device = 0.0   # Sum of squared deviations of device times
+        self.c_device_host = 0.0  # Sum of co-deviations of device and host times
+
+    def update(self, device_time, host_time):
+        """Adds one (device_time, host_time) pair to the fit."""
+        self.n += 1
+        d_device = device_time - self.mean_device
+        self.mean_device += d_device / self.n
+        self.mean_host += (host_time - self.mean_host) / self.n
+        self.c_device_host += d_device * (host_time - self.mean_host)
+        self.m2_device += d_device * (device_time - self.mean_device)
+
+    def update_batch(self, device_times, host_times):
+        """Adds a block of pairs at once (vectorized, equivalent to calling update per pair)."""
+        device_times = np.asarray(device_times, dtype=np.float64)
+        host_times = np.asarray(host_times, dtype=np.float64)
+        n_b = len(device_times)
+        if n_b == 0:
+            return
+        mean_device_b = device_times.mean()
+        mean_host_b = host_times.mean()
+        m2_device_b = np.sum((device_times - mean_device_b) ** 2)
+        c_b = np.sum((device_times - mean_device_b) * (host_times - mean_host_b))
+
+        # Merge the two sets of centred statistics
+        n = self.n + n_b
+        d_device = mean_device_b - self.mean_device
+        d_host = mean_host_b - self.mean_host
+        self.m2_device += m2_device_b + d_device ** 2 * self.n * n_b / n
+        self.c_device_host += c_b + d_device * d_host * self.n * n_b / n
+        self.mean_device += d_device * n_b / n
+        self.mean_host += d_host * n_b / n
+        self.n = n
+
+    @property
+    def slope(self):
+        if self.n < 2 or self.m2_device == 0:
+            return 1.0
+        return self.c_device_host / self.m2_device
+
+    @property
+    def drift(self):
+        """Relative clock drift of the sensor (e.g. 1e-4 = 0.1 ms per second)."""
+        return self.slope - 1.0
+
+    @property
+    def offset(self):
+        return self.mean_host - self.slope * self.mean_device
+
+    def to_host(self, device_times):
+        """Maps device times onto the host time axis."""
+        return self.offset + self.slope * np.asarray(device_times, dtype=np.float64)
+
+
+def resample(times, values, grid):
+    """
+    Linearly interpolates all columns of `values` onto `grid` in one pass.
+
+    Args:
+        times (np.ndarray): Increasing sample times, shape (n,).
+        values (np.ndarray): Samples, shape (n, width).
+        grid (np.ndarray): Increasing target times, shape (m,).
+
+    Returns:
+        np.ndarray: float32 array of shape (m, width). Grid points outside
+        [times[0], times[-1]] take the nearest edge sample.
+    """
+    index = np.clip(np.searchsorted(times, grid, side="right"), 1, len(times) - 1)
+    t0 = times[index - 1]
+    t1 = times[index]
+    span = np.where(t1 > t0, t1 - t0, 1.0)
+    weight = np.clip((grid - t0) / span, 0.0, 1.0).astype(np.float32)[:, None]
+    v0 = values[index - 1].astype(np.float32)
+    v1 = values[index].astype(np.float32)
+    return v0 + (v1 - v0) * weight
+
+
+def make_grid(start, stop, rate_hz):
+    """Common time grid in milliseconds covering [start, stop]."""
+    step = 1000.0 / rate_hz
+    return start + step * np.arange(int(np.floor((stop - start) / step)) + 1)
+
+
+def align_streams(streams, rate_hz=50.0, device_times=None, sensor_order=None, gaps=None):
+    """
+    Aligns several sensor streams on a common time grid.
+
+    For every sensor a ClockFit maps its device clock onto host time. If no device
+    timestamps are available the sample index (at the nominal rate) is used as the
+    device clock, so the fit still estimates each sensor's real rate and start offset
+    and smooths out BLE transport jitter.
+
+    Args:
+        streams (dict): Sensor name -> (samples (n, width), host receive times (n,) in ms).
+        rate_hz (float): Rate of the common grid (and nominal sensor rate).
+        device_times (dict | None): Optional sensor name -> device timestamps in ms.
+        sensor_order (list | None): Column order of the output (defaults to dict order).
+            Sensors without samples get an all-NaN column group.
+        gaps (dict | None): Sensor name -> [[start, end], ...] host ms spans in which the
+            sensor was disconnected (end None: it never came back). These spans are NaN
+            in the output, and a sensor lost for good does not cut the other sensors short.
+
+    Returns:
+        grid (np.ndarray): Common host times in ms, shape (m,).
+        aligned (np.ndarray): float32 array (m, n_sensors * width) in sensor order.
+        fits (dict): Sensor name -> ClockFit used for the mapping.
+    """
+    sensor_order = sensor_order or list(streams.keys())
+    recorded = [sensor for sensor in sensor_order if sensor in streams and len(streams[sensor][1])]
+    period = 1000.0 / rate_hz
+    gaps = {sensor: [(start, np.inf if end is None else end) for start, end in spans]
+            for sensor, spans in (gaps or {}).items()}
+
+    fits = {}
+    mapped = {}
+    for sensor in recorded:
+        samples, host_times = streams[sensor]
+        if device_times is not None and sensor in device_times:
+            clock = np.asarray(device_times[sensor], dtype=np.float64)
+        else:
+            clock = np.arange(len(samples), dtype=np.float64) * period
+            for start, end in gaps.get(sensor, []):
+                if np.isfinite(end):  # The device kept sampling while it was disconnected
+                    clock[np.asarray(host_times) >= end] += end - start
+        fit = ClockFit()
+        fit.update_batch(clock, host_times)
+        fits[sensor] = fit
+        mapped[sensor] = fit.to_host(clock)
+
+    # Only the span covered by every sensor is kept (sensors lost for good are not waited for)
+    lost = {sensor for sensor in recorded if any(np.isinf(end) for _, end in gaps.get(sensor, []))}
+    if recorded:
+        start = max(mapped[sensor][0] for sensor in recorded)
+        stop = min(mapped[sensor][-1] for sensor in recorded if sensor not in lost or len(lost) == len(recorded))
+        grid = make_grid(start, stop, rate_hz)
+    else:
+        grid = np.zeros(0)
+
+    width = np.shape(streams[recorded[0]][0])[1] if recorded else SENSOR_WIDTH
+    aligned = np.full((len(grid), len(sensor_order) * width), np.nan, dtype=np.float32)
+    for i, sensor in enumerate(sensor_order):
+        if sensor in mapped:
+            aligned[:, i * width:(i + 1) * width] = resample(mapped[sensor], streams[sensor][0], grid)
+        for gap_start, gap_end in gaps.get(sensor, []):
+            missing = (grid > gap_start) & (grid < gap_end)
+            aligned[missing, i * width:(i + 1) * width] = np.nan
+    return grid, aligned, fits
+
+
+def align_session(session_dir, rate_hz=50.0, sensor_order=None):
+    """
+    Offline alignment of a session written by sessionRecorder.SessionRecorder. Sensors
+    with recorded device times are aligned on their own clocks.
+    """
+    from sessionRecorder import load_device_times, load_gaps, load_session
+
+    return align_streams(load_session(session_dir), rate_hz=rate_hz, device_times=load_device_times(session_dir),
+                         sensor_order=sensor_order, gaps=load_gaps(session_dir))
+
+
+def _recorded_clock(host_times, device_times, period, gaps):
+    """
+    Device clock of a recorded stream (as in align_streams), evaluated per sample range
+    so the whole stream is never loaded.
+
+    Returns:
+        callable: clock(start, stop) -> float64 device times of samples [start, stop).
+    """
+    shifts = [(end, end - start) for start, end in gaps if np.isfinite(end)]
+
+    def clock(start, stop):
+        if device_times is not None:
+            return np.asarray(device_times[start:stop], dtype=np.float64)
+        stop = min(stop, len(host_times))
+        values = np.arange(start, stop, dtype=np.float64) * period
+        host = np.asarray(host_times[start:stop])
+        for end, length in shifts:  # The device kept sampling while it was disconnected
+            values[host >= end] += length
+        return values
+    return clock
+
+
+def _search_clock(clock, count, value):
+    """Number of samples with a device time <= value (binary search over a monotonic clock)."""
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if clock(middle, middle + 1)[0] <= value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def iter_aligned_session(session_dir, rate_hz=50.0, sensor_order=None, rows_per_block=65536, rows_per_read=1 << 18):
+    """
+    Block-wise align_session for sessions of any length: memory stays bounded by the
+    block size instead of the (rows, sensors * width) aligned matrix.
+
+    The clock fits are computed in one pass over the memory-mapped receive (and device)
+    times; every block of grid times is then located in each sensor's samples by binary
+    search and resampled from just that slice. The result is the same as align_session.
+
+    Args:
+        session_dir (str): Directory written by sessionRecorder.SessionRecorder.
+        rate_hz (float): Rate of the common grid (and nominal sensor rate).
+        sensor_order (list | None): Column order of the output; sensors that were not
+            recorded get an all-NaN column group.
+        rows_per_block (int): Grid rows per yielded block.
+        rows_per_read (int): Samples read at once while fitting the clocks.
+
+    Returns:
+        tuple: (fits: sensor name -> ClockFit, iterator of (grid block, aligned block))
+    """
+    from sessionRecorder import load_device_times, load_gaps, load_session
+
+    session = load_session(session_dir)
+    device_times = load_device_times(session_dir)
+    sensor_order = sensor_order or list(session.keys())
+    recorded = [sensor for sensor in sensor_order if sensor in session and len(session[sensor][1])]
+    period = 1000.0 / rate_hz
+    gaps = {sensor: [(start, np.inf if end is None else end) for start, end in spans]
+            for sensor, spans in load_gaps(session_dir).items()}
+
+    clocks, fits = {}, {}
+    for sensor in recorded:
+        host_times = session[sensor][1]
+        clock = clocks[sensor] = _recorded_clock(host_times, device_times.get(sensor), period, gaps.get(sensor, []))
+        fit = fits[sensor] = ClockFit()
+        for start in range(0, len(host_times), rows_per_read):
+            fit.update_batch(clock(start, start + rows_per_read), host_times[start:start + rows_per_read])
+
+    # Same span as align_streams: covered by every sensor, sensors lost for good are not waited for
+    count = {sensor: len(session[sensor][1]) for sensor in recorded}
+    first = {sensor: fits[sensor].to_host(clocks[sensor](0, 1))[0] for sensor in recorded}
+    last = {sensor: fits[sensor].to_host(clocks[sensor](count[sensor] - 1, count[sensor]))[0]
+            for sensor in recorded}
+    lost = {sensor for sensor in recorded if any(np.isinf(end) for _, end in gaps.get(sensor, []))}
+    rows = 0
+    if recorded:
+        start = max(first.values())
+        stop = min(last[sensor] for sensor in recorded if sensor not in lost or len(lost) == len(recorded))
+        rows = max(int(np.floor((stop - start) / period)) + 1, 0)
+    width = session[recorded[0]][0].shape[1] if recorded else SENSOR_WIDTH
+
+    def blocks():
+        for row in range(0, rows, rows_per_block):
+            grid = start + period * np.arange(row, min(row + rows_per_block, rows))
+            columns = []
+            for sensor in sensor_order:
+                if sensor not in fits:
+                    columns.append(np.full((len(grid), width), np.nan, dtype=np.float32))
+                    continue
+                fit, clock, n = fits[sensor], clocks[sensor], count[sensor]
+                # Samples from the last one at or before the block to the first one after it
+                # (plus one on each side against rounding in the inverse mapping)
+                lower = max(_search_clock(clock, n, (grid[0] - fit.offset) / fit.slope) - 2, 0)
+                upper = min(_search_clock(clock, n, (grid[-1] - fit.offset) / fit.slope) + 2, n)
+                upper = max(upper, min(lower + 2, n))
+                columns.append(resample(fit.to_host(clock(lower, upper)), session[sensor][0][lower:upper], grid))
+            aligned = np.hstack(columns)
+            for i, sensor in enumerate(sensor_order):
+                for gap_start, gap_end in gaps.get(sensor, []):
+                    missing = (grid > gap_start) & (grid < gap_end)
+                    aligned[missing, i * width:(i + 1) * width] = np.nan
+            yield grid, aligned
+
+    return fits, blocks()
+
+
+class StreamAligner:
+    def __init__(self, sensor_order, rate_hz=50.0, width=9, capacity=1024):
+        """
+        Incremental counterpart of align_streams for use while streaming.
+
+        Samples are fed per packet with observe(); pop_aligned() returns the grid frames
+        that every sensor has already covered and discards the consumed samples, so the
+        memory held is bounded by the slowest sensor's lag.
+
+        Args:
+            sensor_order (list): Sensor names, in output column order.
+            rate_hz (float): Rate of the common grid (and nominal sensor rate).
+            width (int): Values per sample.
+            capacity (int): Initial pending samples per sensor (grows if needed).
+        """
+        self.sensor_order = list(sensor_order)
+        self.rate_hz = rate_hz
+        self.period = 1000.0 / rate_hz
+        self.width = width
+        self.fits = {sensor: ClockFit() for sensor in self.sensor_order}
+        self.counts = {sensor: 0 for sensor in self.sensor_order}  # Samples ever observed
+        self.pending = {sensor: [np.empty(capacity), np.empty((capacity, width), dtype=np.float32), 0]
+                        for sensor in self.sensor_order}
+        self.next_time = None  # Next grid time to emit
+
+    def observe(self, sensor_name, values, host_time, device_time=None):
+        """
+        Adds one sample of a sensor.
+
+        Args:
+            sensor_name (str): Sensor the sample belongs to.
+            values (array-like): The `width` values of the sample.
+            host_time (float): Host receive time in ms.
+            device_time (float | None): Device timestamp in ms, if the packet carries one.
+        """
+        if device_time is None:
+            device_time = self.counts[sensor_name] * self.period
+        self.counts[sensor_name] += 1
+        self.fits[sensor_name].update(device_time, host_time)
+
+        pending = self.pending[sensor_name]
+        clock, samples, fill = pending
+        if fill == len(clock):
+            pending[0] = clock = np.concatenate([clock, np.empty(len(clock))])
+            pending[1] = samples = np.concatenate([samples, np.empty_like(samples)])
+        clock[fill] = device_time
+        samples[fill] = values
+        pending[2] = fill + 1
+
+    def pop_aligned(self):
+        """
+        Returns (grid, aligned) for all grid frames that can be interpolated for every
+        sensor, or None if no new frame is available yet.
+        """
+        mapped = {}
+        for sensor in self.sensor_order:
+            clock, _, fill = self.pending[sensor]
+            if fill < 2:
+                return None
+            mapped[sensor] = self.fits[sensor].to_host(clock[:fill])
+
+        if self.next_time is None:
+            self.next_time = max(mapped[sensor][0] for sensor in self.sensor_order)
+        stop = min(mapped[sensor][-1] for sensor in self.sensor_order)
+        if stop < self.next_time:
+            return None
+
+        grid = make_grid(self.next_time, stop, self.rate_hz)
+        aligned = np.hstack([resample(mapped[sensor], self.pending[sensor][1][:self.pending[sensor][2]], grid)
+                             for sensor in self.sensor_order])
+        self.next_time = grid[-1] + self.period
+
+        # Drop samples that no future grid point needs (keep one before next_time)
+        for sensor in self.sensor_order:
+            pending = self.pending[sensor]
+            keep_from = max(int(np.searchsorted(mapped[sensor], self.next_time, side="right")) - 1, 0)
+            if keep_from:
+                fill = pending[2] - keep_from
+                pending[0][:fill] = pending[0][keep_from:pending[2]]
+                pending[1][:fill] = pending[1][keep_from:pending[2]]
+                pending[2] = fill
+        return grid, aligned
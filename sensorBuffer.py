@@ -0,0 +1,123 @@
+import numpy as np
+
+
+class SensorBuffer:
+    def __init__(self, width=9, dtype="<i2", capacity=4096, ring=False):
+        """
+        Compact per-sensor sample store backed by a preallocated NumPy array.
+
+        Each row holds one decoded packet (e.g. 9 x int16 for Accel + Gyro + Mag) and a
+        matching host-receive timestamp (uint32 milliseconds since connection).
+        In normal mode the buffer doubles its capacity when full; in ring mode it keeps
+        only the latest `capacity` samples, which bounds memory for live sessions.
+
+        Args:
+            width (int): Number of values per sample.
+            dtype (str): NumPy dtype of a single value, matching the packet layout.
+            capacity (int): Initial (or, in ring mode, fixed) number of samples.
+            ring (bool): If True, overwrite the oldest samples instead of growing.
+        """
+        self.width = width
+        self.dtype = np.dtype(dtype)
+        self.ring = ring
+        self.samples = np.empty((capacity, width), dtype=self.dtype)
+        self.times = np.empty(capacity, dtype=np.uint32)
+        self.total = 0  # Number of samples ever appended (not capped by the ring)
+
+    def __len__(self):
+        return min(self.total, len(self.samples)) if self.ring else self.total
+
+    @property
+    def nbytes(self):
+        """Memory held by the sample and timestamp arrays."""
+        return self.samples.nbytes + self.times.nbytes
+
+    def _grow(self):
+        """Doubles the capacity, keeping the already stored samples."""
+        capacity = len(self.samples) * 2
+        samples = np.empty((capacity, self.width), dtype=self.dtype)
+        times = np.empty(capacity, dtype=np.uint32)
+        samples[:self.total] = self.samples[:self.total]
+        times[:self.total] = self.times[:self.total]
+        self.samples, self.times = samples, times
+
+    def append_packet(self, data, t_received):
+        """
+        Decodes one packet straight from its bytes into the next free row.
+
+        Args:
+            data (bytes | bytearray): Raw notification payload (width x dtype bytes).
+            t_received (float): Host receive time in milliseconds since connection.
+
+        Raises:
+            ValueError: If the packet is not exactly width x dtype bytes long.
+        """
+        if len(data) != self.width * self.dtype.itemsize:
+            raise ValueError(f"Expected a {self.width * self.dtype.itemsize}-byte packet, got {len(data)} bytes")
+        values = np.frombuffer(data, dtype=self.dtype, count=self.width)
+        if self.ring:
+            index = self.total % len(self.samples)
+        else:
+            if self.total == len(self.samples):
+                self._grow()
+            index = self.total
+        self.samples[index] = values
+        self.times[index] = t_received
+        self.total += 1
+
+    def extend(self, samples, times):
+        """
+        Appends a block of decoded samples (e.g. a multi-sample packet) in one copy.
+
+        Args:
+            samples (np.ndarray): (n, width) values.
+            times (array-like): (n,) host receive times in milliseconds since connection.
+        """
+        n = len(samples)
+        if self.ring:
+            capacity = len(self.samples)
+            if n > capacity:  # Only the newest `capacity` samples survive
+                self.total += n - capacity
+                samples, times, n = samples[-capacity:], times[-capacity:], capacity
+            start = self.total % capacity
+            first = min(n, capacity - start)
+            self.samples[start:start + first] = samples[:first]
+            self.times[start:start + first] = times[:first]
+            self.samples[:n - first] = samples[first:]
+            self.times[:n - first] = times[first:]
+        else:
+            while self.total + n > len(self.samples):
+                self._grow()
+            self.samples[self.total:self.total + n] = samples
+            self.times[self.total:self.total + n] = times
+        self.total += n
+
+    def view(self):
+        """
+        Returns (samples, times) in arrival order.
+
+        In growable mode, and in ring mode before the first wrap-around, these are views
+        into the buffer (no copy). After a ring wraps, the samples are returned re-ordered,
+        which requires a copy.
+        """
+        count = len(self)
+        if not self.ring or self.total <= len(self.samples):
+            return self.samples[:count], self.times[:count]
+        start = self.total % len(self.samples)
+        order = np.r_[start:len(self.samples), 0:start]
+        return self.samples[order], self.times[order]
+
+    def latest(self, n):
+        """Returns (samples, times) for the most recent `n` samples in arrival order."""
+        n = min(n, len(self))
+        if not self.ring:
+            return self.samples[self.total - n:self.total], self.times[self.total - n:self.total]
+        end = self.total % len(self.samples)
+        if end >= n:
+            return self.samples[end - n:end], self.times[end - n:end]
+        order = np.r_[len(self.samples) - (n - end):len(self.samples), 0:end]
+        return self.samples[order], self.times[order]
+
+    def clear(self):
+        """Drops all samples but keeps the allocated memory for reuse."""
+        self.total = 0
@@ -0,0 +1,369 @@
+"""
+Headless capture service: several independent sensor sessions (e.g. one per subject) on one
+host, controlled over a local HTTP API instead of the Tk window.
+
+Every session has its own sensor name -> UUID map, BLE state, buffers, packet metrics,
+label in the recordings catalog and optional live inference. The sessions share:
+    - the BLE service loops (connect, notify handlers and packet decoding; --loops)
+    - one chunk writer thread for all recordings
+    - one inference worker and model that runs the due windows of all sessions as a batch
+
+Run:
+    python server.py --config sessions.json --port 8765
+
+sessions.json is a list of session configs:
+    [{"id": "subject1", "sensors": {"RArm": "12340015-...", ...}, "inference": true},
+     {"id": "sim", "transport": {"type": "simulated", "sensors": 6, "speed": 1.0}}]
+"sensors" defaults to the six RFduinos of bleConnection.BLE; "sensor_order" sets the model
+input order (default liveInference.LIVE_SENSOR_ORDER).
+
+API (JSON):
+    GET    /sessions                 all sessions
+    POST   /sessions                 create a session from a config
+    GET    /sessions/<id>            status, connection report, packet metrics, last prediction
+    POST   /sessions/<id>/connect    scan and connect
+    POST   /sessions/<id>/start      start streaming and recording
+    POST   /sessions/<id>/stop       stop streaming
+    DELETE /sessions/<id>            disconnect and remove
+    GET    /recordings[?label=<id>]  recorded sessions in the session catalog (newest first)
+    GET    /recordings/<id>          one recorded session
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bleConnection import BLE
+from sessionCatalog import SessionCatalog
+from sessionRecorder import ChunkWriter
+from statusChannel import StatusChannel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATHS = ["models/convlstm_54_int8.pt", "models/convlstm_54.pt", "models/convlstm_54.pth"]
+DEFAULT_NORMALIZATION_PATH = "models/normalization_54.npz"
+
+
+def make_transport(config):
+    """
+    Transport of a session config: real Bluetooth by default, or
+    {"type": "simulated", "sensors": 6 | [names], "replay": "sensor_data2.csv", ...} with the
+    remaining keys passed to simulatedSensors.SimulatedTransport.
+
+    Returns:
+        tuple: (transport or None for the default, name -> UUID map or None)
+    """
+    transport = config.get("transport")
+    if transport is None or transport == "ble":
+        return None, config.get("sensors")
+
+    from simulatedSensors import CsvReplaySource, SimulatedTransport, SyntheticSource
+
+    options = dict(transport)
+    if options.pop("type", "simulated") != "simulated":
+        raise ValueError(f"Unknown transport {transport}")
+    sensors = options.pop("sensors", 6)
+    replay = options.pop("replay", None)
+    if replay is not None:
+        source = CsvReplaySource(replay)
+    elif isinstance(sensors, int):
+        source = SyntheticSource(sensors)
+    else:
+        source = SyntheticSource(sensor_names=sensors)
+    simulated = SimulatedTransport(source, **options)
+    return simulated, simulated.name_to_uuid
+
+
+class ServiceLoops:
+    def __init__(self, count=1):
+        """
+        Event loop threads shared by the BLE instances of all sessions; sessions are
+        assigned round-robin.
+        """
+        self.loops = []
+        self.threads = []
+        for i in range(count):
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name=f"ble-service-{i}", daemon=True)
+            thread.start()
+            self.loops.append(loop)
+            self.threads.append(thread)
+        self.cycle = itertools.cycle(self.loops)
+
+    def next(self):
+        return next(self.cycle)
+
+    def stop(self, timeout=5):
+        for loop, thread in zip(self.loops, self.threads):
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+
+
+class CaptureSession:
+    def __init__(self, session_id, config, loop, writer, pool=None, recordings_dir="recordings",
+                 normalization_path=DEFAULT_NORMALIZATION_PATH):
+        """
+        One subject's sensors: a BLE instance on a shared service loop with its own
+        configuration, buffers and metrics. Its recordings go to the shared recordings
+        directory, labelled with the session id in the catalog.
+
+        Args:
+            session_id (str): Unique name of the session.
+            config (dict): Session config (see the module docstring).
+            loop (asyncio.AbstractEventLoop): Shared BLE service loop.
+            writer (ChunkWriter): Shared writer of the recordings.
+            pool (liveInference.InferencePool | None): Shared inference; None disables inference.
+            recordings_dir (str): Recordings directory (see sessionCatalog).
+            normalization_path (str): Training normalization of the model.
+        """
+        self.session_id = session_id
+        self.config = config
+        self.status = StatusChannel()
+        transport, name_to_uuid = make_transport(config)
+        self.ble = BLE(self.status, name_to_uuid=name_to_uuid, transport=transport, loop=loop)
+        self.ble.recordings_dir = recordings_dir
+        self.ble.session_label = session_id
+        self.ble.chunk_writer = writer
+        if "packet_protocol" in config:
+            self.ble.packet_protocol = config["packet_protocol"]
+
+        self.live_inference = None
+        if pool is not None and config.get("inference", True):
+            from liveInference import LIVE_SENSOR_ORDER, LiveInference
+
+            self.live_inference = LiveInference(None, config.get("normalization", normalization_path),
+                                                self.on_prediction,
+                                                sensor_order=config.get("sensor_order", LIVE_SENSOR_ORDER),
+                                                step=config.get("step", 16), pool=pool)
+            self.ble.live_inference = self.live_inference
+        self.predictions = 0
+        self.latency_ms_total = 0.0
+
+    def on_prediction(self, label, name, latency_ms):
+        """Called by the inference worker."""
+        self.predictions += 1
+        self.latency_ms_total += latency_ms or 0.0
+        self.status.publish("prediction", {"label": label, "name": name, "latency_ms": latency_ms})
+
+    def connect(self):
+        self.ble.run()
+
+    def start(self):
+        self.ble.start_streaming()
+
+    def stop(self):
+        self.ble.stop_streaming()
+
+    def close(self, timeout=5):
+        """Stops streaming (the recording is handed to the writer) and disconnects the sensors."""
+        if self.ble.is_streaming:
+            self.ble.stop_streaming()
+        if self.ble.stream_future is not None:
+            try:
+                self.ble.stream_future.result(timeout)
+            except Exception as e:
+                logger.warning(f"Session {self.session_id} did not stop cleanly: {e}")
+        if self.live_inference is not None:
+            self.live_inference.stop()
+        self.ble.shutdown(timeout)
+
+    def describe(self, details=False):
+        """Session state as a JSON-serializable dict."""
+        state = {
+            "id": self.session_id,
+            "status": self.status.latest("status"),
+            "connected": list(self.ble.connected_devices_names),
+            "streaming": self.ble.is_streaming,
+            "prediction": self.status.latest("prediction"),
+            "predictions": self.predictions,
+            "mean_latency_ms": self.latency_ms_total / self.predictions if self.predictions else None,
+        }
+        if details:
+            manager = self.ble.connection_manager
+            state["connection"] = manager.report() if manager is not None else None
+            state["metrics"] = self.ble.metrics.summary()
+            state["recording"] = self.ble.session_id if self.ble.recorder is not None else None
+        return state
+
+
+class CaptureServer:
+    def __init__(self, recordings_dir="recordings", loops=1, model_path=None,
+                 normalization_path=DEFAULT_NORMALIZATION_PATH, num_threads=2, max_batch=32):
+        """
+        Owns the sessions and the resources they share.
+
+        Args:
+            recordings_dir (str): Recordings directory shared by all sessions (see sessionCatalog).
+            loops (int): Number of BLE service loop threads.
+            model_path (str | None): Model for live inference; None disables inference.
+            normalization_path (str): Training normalization of the model.
+            num_threads (int): Torch CPU threads of the inference worker.
+            max_batch (int): Largest number of windows per forward pass.
+        """
+        self.recordings_dir = recordings_dir
+        self.catalog = SessionCatalog(recordings_dir)
+        self.normalization_path = normalization_path
+        self.loops = ServiceLoops(loops)
+        self.writer = ChunkWriter()
+        self.pool = None
+        if model_path is not None:
+            from liveInference import InferencePool
+
+            self.pool = InferencePool(model_path, num_threads=num_threads, max_batch=max_batch)
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def create_session(self, config):
+        """
+        Adds a session.
+
+        Raises:
+            ValueError: If the config has no id.
+            KeyError: If the session id is already in use.
+        """
+        if "id" not in config:
+            raise ValueError("A session config needs an id")
+        session_id = str(config["id"])
+        with self.lock:
+            if session_id in self.sessions:
+                raise KeyError(f"Session {session_id} already exists")
+            session = CaptureSession(session_id, config, self.loops.next(), self.writer, self.pool,
+                                     self.recordings_dir, self.normalization_path)
+            self.sessions[session_id] = session
+        logger.info(f"Session {session_id} created")
+        return session
+
+    def get(self, session_id):
+        return self.sessions[session_id]
+
+    def remove(self, session_id):
+        with self.lock:
+            session = self.sessions.pop(session_id)
+        session.close()
+        logger.info(f"Session {session_id} removed")
+
+    def close(self):
+        for session_id in list(self.sessions):
+            self.remove(session_id)
+        self.writer.stop()
+        self.writer.join(5)
+        if self.pool is not None:
+            self.pool.stop()
+        self.loops.stop()
+
+
+def make_handler(server):
+    """HTTP request handler class bound to a CaptureServer."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _route(self):
+            parts = [part for part in urlsplit(self.path).path.split("/") if part]
+            if not parts or parts[0] not in ("sessions", "recordings") or len(parts) > 3:
+                raise LookupError(self.path)
+            return parts[0], parts[1:]
+
+        def _handle(self, method):
+            try:
+                resource, parts = self._route()
+                if resource == "recordings":
+                    if method == "GET" and not parts:
+                        label = parse_qs(urlsplit(self.path).query).get("label", [None])[0]
+                        return self._send(200, server.catalog.list(label=label))
+                    if method == "GET" and len(parts) == 1:
+                        return self._send(200, server.catalog.get(parts[0]))
+                    raise LookupError(self.path)
+                if method == "GET" and not parts:
+                    return self._send(200, [s.describe() for s in list(server.sessions.values())])
+                if method == "POST" and not parts:
+                    length = int(self.headers.get("Content-Length", 0))
+                    session = server.create_session(json.loads(self.rfile.read(length) or b"{}"))
+                    return self._send(201, session.describe())
+                session = server.get(parts[0])
+                if method == "GET" and len(parts) == 1:
+                    return self._send(200, session.describe(details=True))
+                if method == "DELETE" and len(parts) == 1:
+                    server.remove(parts[0])
+                    return self._send(200, {"id": parts[0], "removed": True})
+                if method == "POST" and len(parts) == 2 and parts[1] in ("connect", "start", "stop"):
+                    getattr(session, parts[1])()
+                    return self._send(202, session.describe())
+                raise LookupError(self.path)
+            except LookupError as e:  # Unknown route or session (KeyError is a LookupError)
+                code = 409 if method == "POST" and "already exists" in str(e) else 404
+                self._send(code, {"error": str(e)})
+            except (ValueError, TypeError, OSError) as e:
+                self._send(400, {"error": str(e)})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_DELETE(self):
+            self._handle("DELETE")
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless multi-session capture service.")
+    parser.add_argument("--config", help="JSON list of session configs to create at startup")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings", default="recordings")
+    parser.add_argument("--loops", type=int, default=1, help="BLE service loop threads")
+    parser.add_argument("--model", help="Model for live inference (default: first existing of the GUI's)")
+    parser.add_argument("--normalization", default=DEFAULT_NORMALIZATION_PATH)
+    parser.add_argument("--no-inference", action="store_true")
+    parser.add_argument("--connect", action="store_true", help="Connect the configured sessions at startup")
+    parser.add_argument("--debug", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO,
+                        format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+
+    model_path = None
+    if not args.no_inference and os.path.exists(args.normalization):
+        from exportModel import select_model_path
+
+        model_path = args.model or select_model_path(DEFAULT_MODEL_PATHS)
+    server = CaptureServer(args.recordings, loops=args.loops, model_path=model_path,
+                           normalization_path=args.normalization)
+    if args.config:
+        with open(args.config) as f:
+            for config in json.load(f):
+                session = server.create_session(config)
+                if args.connect:
+                    session.connect()
+
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(server))
+    logger.info(f"Listening on http://{args.host}:{args.port}/sessions "
+                f"(inference {'on' if model_path else 'off'})")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Post-session analysis and export of a BLE capture: plots and CSV files.
+
+Kept apart from the capture core (bleConnection) so that matplotlib and pandas are only
+imported when a session is analysed, not when the app starts. The BLE methods of the
+same names forward here.
+"""
+import csv
+from collections import Counter
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from sensorAlignment import align_streams
+
+
+def plot_data(ble):
+    """
+    Plots X, Y, and Z Euler angles over time for all connected sensors.
+    Each sensor's data is extracted from `ble.device_data`, which stores
+    timestamped angle readings per UUID.
+    """
+    plt.figure(figsize=(12, 8))
+
+    for uuid, values in ble.device_data.items():
+        name = ble.RFDUINO_UUID_TO_NAME[uuid]
+
+        # Extract timestamps and convert to seconds (relative to first reading)
+        timestamps = [int(item[0]) for item in values]
+        min_time = min(timestamps)
+        timestamps_in_seconds = [(t - min_time) / 1000 for t in timestamps]
+
+        # Extract X, Y, Z angles from data
+        x_angles = [int(item[1]) for item in values]
+        y_angles = [int(item[2]) for item in values]
+        z_angles = [int(item[3]) for item in values]
+
+        # Plot all three axes
+        plt.plot(timestamps_in_seconds, x_angles, label=f"{name} - X Angle")
+        plt.plot(timestamps_in_seconds, y_angles, label=f"{name} - Y Angle")
+        plt.plot(timestamps_in_seconds, z_angles, label=f"{name} - Z Angle")
+
+    plt.legend()
+    plt.title("Comparison of Device Euler Angles (X, Y, Z)")
+    plt.xlabel("Time (seconds)")
+    plt.ylabel("Angle (degrees)")
+    plt.grid(True)
+    plt.show()
+
+def plot_data2(ble):
+    """
+    Plots only the Y Euler angle over time for all connected sensors.
+    This is useful for focused analysis of a single axis, such as trunk rotation.
+    """
+    plt.figure(figsize=(12, 8))
+
+    for uuid, values in ble.device_data.items():
+        name = ble.RFDUINO_UUID_TO_NAME[uuid]
+
+        # Time normalization
+        timestamps = [int(item[0]) for item in values]
+        min_time = min(timestamps)
+        timestamps_in_seconds = [(t - min_time) / 1000 for t in timestamps]
+
+        # Only plot Y angle
+        y_angles = [int(item[2]) for item in values]
+        plt.plot(timestamps_in_seconds, y_angles, label=f"{name} - Y Angle")
+
+    plt.legend()
+    plt.title("Y Angle Over Time")
+    plt.xlabel("Time (seconds)")
+    plt.ylabel("Y Angle (degrees)")
+    plt.grid(True)
+    plt.savefig("_plot.png", dpi=300)  # Before show(): closing the window discards the figure
+    plt.show()
+
+def session_streams(ble):
+    """
+    Samples and receive times of every sensor of the last session, with the device clock
+    times and disconnection gaps needed to align them.
+
+    A finished recording is read back from disk: it holds the whole session and the
+    device times of the packets. Otherwise the sensor buffers are used, which only works
+    while they still hold the whole session (while recording they keep a live window of
+    BLE.live_capacity samples).
+
+    Returns:
+        tuple: (sensor name -> (samples (n, 9), times (n,)), sensor name -> device times
+        (or None), sensor name -> gap spans (or None))
+
+    Raises:
+        RuntimeError: If the buffers wrapped and the recording cannot be read (yet).
+    """
+    from sessionCatalog import SessionCatalog
+    from sessionRecorder import load_device_times, load_gaps, load_session
+
+    if ble.recorder is None and ble.session_id is not None:
+        catalog = SessionCatalog(ble.recordings_dir)
+        if catalog.get(ble.session_id)["state"] == "complete":
+            session_dir = catalog.session_dir(ble.session_id)
+            return load_session(session_dir), load_device_times(session_dir), load_gaps(session_dir)
+
+    wrapped = any(buffer.ring and buffer.total > len(buffer.samples) for buffer in ble.sensor_readings.values())
+    if wrapped and ble.recorder is not None:
+        raise RuntimeError("Only the last samples of a session are kept in memory; stop streaming first")
+    if wrapped and ble.session_id is None:
+        raise RuntimeError("Only the last samples of the session are in memory and it was not recorded")
+    if wrapped:
+        raise RuntimeError(f"Session {ble.session_id} is still being written to disk; try again in a moment")
+    gaps = ble.connection_manager.gaps if ble.connection_manager is not None else None
+    return {sensor_name: buffer.view() for sensor_name, buffer in ble.sensor_readings.items()}, None, gaps
+
+def plot_sensor_readings(ble, axis=2):
+    """
+    Plots one raw axis (default: az) over host receive time for every sensor.
+    Reads a finished recording from disk, otherwise the sensor buffers without copying
+    them (see session_streams).
+
+    Args:
+        axis (int): Column of the 9-axis sample to plot (0-2 accel, 3-5 gyro, 6-8 mag).
+    """
+    plt.figure(figsize=(12, 8))
+
+    for sensor_name, (samples, times) in session_streams(ble)[0].items():
+        plt.plot(times / 1000, samples[:, axis], label=f"{sensor_name} - axis {axis}")
+
+    plt.legend()
+    plt.title("Raw Sensor Readings Over Time")
+    plt.xlabel("Time since connection (seconds)")
+    plt.ylabel("Raw value (int16)")
+    plt.grid(True)
+    plt.show()
+
+def plot_recording(ble, session_id=None, axis=2, start_ms=None, end_ms=None, max_points=2000):
+    """
+    Plots one raw axis of a recorded session as a min/max envelope per sensor, read from
+    the session's downsampled levels (see sessionCatalog.read_overview), so even hour-long
+    recordings open without loading the samples.
+
+    Args:
+        session_id (str | None): Catalog id of the session (default: the last recording).
+        axis (int): Column of the 9-axis sample to plot (0-2 accel, 3-5 gyro, 6-8 mag).
+        start_ms (float | None): Start of the time range (host ms since connection).
+        end_ms (float | None): End of the time range.
+        max_points (int): Largest number of points per sensor.
+    """
+    from sessionCatalog import SessionCatalog
+
+    catalog = SessionCatalog(ble.recordings_dir)
+    session_id = session_id or ble.session_id
+    plt.figure(figsize=(12, 8))
+
+    for sensor_name in catalog.get(session_id)["sensors"]:
+        times, low, high, factor = catalog.read_overview(session_id, sensor_name, start_ms, end_ms, max_points)
+        line, = plt.plot(times / 1000, (low[:, axis] + high[:, axis].astype(float)) / 2,
+                         label=f"{sensor_name} - axis {axis} (1:{factor})", linewidth=0.8)
+        plt.fill_between(times / 1000, low[:, axis], high[:, axis], color=line.get_color(), alpha=0.3)
+
+    plt.legend()
+    plt.title(f"Recorded Session {session_id}")
+    plt.xlabel("Time since connection (seconds)")
+    plt.ylabel("Raw value (int16)")
+    plt.grid(True)
+    plt.show()
+
+def plot_data4(ble):
+    """
+    Analyzes timing intervals between consecutive sensor data packets for each device.
+    Useful for identifying sampling jitter and evaluating synchronization stability.
+    Outputs:
+        - Start and end times
+        - Number of frames received
+        - Max/min interval between packets
+        - Frequency count of interval durations
+    """
+    for uuid, values in ble.device_data.items():
+        print("\n" + "=" * 60)
+        print(f"Device: {uuid} ({ble.RFDUINO_UUID_TO_NAME[uuid]})")
+
+        # Extract timestamps from sensor data (assumes index 0 contains time)
+        timestamps = [int(item[0]) for item in values]
+
+        print(f"Starting time Sensor / Host: {timestamps[0]} / {int(ble.checkpoint)}")
+        print(f"Ending time   Sensor / Host: {timestamps[-1]} / {ble.stop_time}")
+        print(f"Number of frames received: {len(timestamps)}")
+
+        # Compute time intervals between consecutive packets
+        intervals = [timestamps[i + 1] - timestamps[i] for i in range(len(timestamps) - 1)]
+
+        print(f"Max interval: {max(intervals)} ms")
+        print(f"Min interval: {min(intervals)} ms")
+        print(f"Interval distribution: {Counter(intervals)}")
+
+def save_sensor_timestamps_as_csv(ble, filename="sensor_timestamps_9.csv"):
+    """
+    Saves the collected timestamp data from all sensors into a CSV file.
+
+    Args:
+        filename (str): Name of the output CSV file.
+
+    Output:
+        CSV file where each column contains timestamps from one sensor.
+    """
+    # Get list of sensor UUIDs (keys in the device_data dictionary)
+    sensor_names = list(ble.device_data.keys())
+
+    # Prepare column headers (human-readable sensor names)
+    header = [f"{sensor}" for sensor in sensor_names]
+
+    # Align data by transposing rows: zip() groups data from each sensor by index
+    rows = zip(*[ble.device_data[sensor] for sensor in sensor_names])
+
+    # Write data to CSV
+    with open(filename, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)  # Write the header row
+        writer.writerows(rows)  # Write each row of aligned sensor timestamps
+
+    print(f"CSV file saved: {filename}")
+
+def save_sensor_intervals_as_csv(ble, filename="sensor_intervals_morning.csv"):
+    """
+    Saves sensor interval data (e.g., time between AccelGyro and Magnetometer readings)
+    into a CSV file, aligning all sensors by the shortest list length.
+
+    Args:
+        filename (str): Output CSV file name.
+    """
+
+    #  Determine the shortest interval list length across all sensors
+    min_len = min(len(values) for values in ble.sensor_intervals.values())
+    print(f"Minimum common length: {min_len}")
+
+    #  Trim each sensor's interval list to match the shortest length
+    trimmed_intervals = {
+        sensor: values[:min_len] for sensor, values in ble.sensor_intervals.items()
+    }
+
+    #  Prepare the CSV header with sensor names
+    sensor_names = list(trimmed_intervals.keys())
+    header = [f"{sensor}" for sensor in sensor_names]
+
+    # Transpose data — each row represents one aligned time step across all sensors
+    rows = zip(*[trimmed_intervals[sensor] for sensor in sensor_names])
+
+    # Write to CSV
+    with open(filename, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)  # Column names
+        writer.writerows(rows)  # Sensor interval values
+
+    print(f"CSV file saved: {filename}")
+
+def save_sensor_intervals_grouped_as_csv(ble, filename="sensor_intervals_grouped.csv"):
+    """
+    Saves grouped sensor interval data (e.g., one interval per read cycle) to a CSV file.
+    Trims all sensors' data to the shortest length for alignment.
+
+    Args:
+        filename (str): Desired output CSV filename.
+    """
+
+    # Find the shortest interval list across all sensors
+    min_len = min(len(values) for values in ble.sensor_intervals.values())
+    print(f"Min Len: {min_len}")
+
+    # Trim each sensor's interval list to this minimum length for alignment
+    trimmed_intervals = {
+        sensor: values[:min_len] for sensor, values in ble.sensor_intervals.items()
+    }
+
+    #  Generate CSV headers using sensor names
+    sensor_names = list(trimmed_intervals.keys())
+    header = [f"{sensor}" for sensor in sensor_names]
+
+    #  Prepare aligned rows (each row is one timestamped interval per sensor)
+    rows = zip(*[trimmed_intervals[sensor] for sensor in sensor_names])
+
+    #  Save to CSV
+    with open(filename, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)  # Write header row
+        writer.writerows(rows)  # Write data rows
+
+    print(f"CSV file saved: {filename}")
+
+def save_sensor_readings_as_csv(ble, filename="sensor_data2.csv"):
+    """
+    Saves synchronized 9-axis IMU data (Accel, Gyro, Mag) from multiple sensors into a CSV file.
+    Sensors are aligned by time rather than by sample index: each stream is mapped onto the
+    host clock with its own offset/drift fit and resampled onto a common grid (see sensorAlignment).
+    Recorded sessions are read back from disk and aligned on the sensors' device clocks
+    (see session_streams).
+
+    Args:
+        filename (str): Output file name.
+    """
+
+    # Define the expected order of sensors (must match ble.sensor_readings structure)
+    sensor_order = ["RArm", "RShank", "LShank", "Back", "RThigh", "LArm"]
+
+    # Create column headers for each sensor (9 axes per sensor)
+    column_names = []
+    for sensor in sensor_order:
+        column_names.extend([
+            f"{sensor}_ax", f"{sensor}_ay", f"{sensor}_az",
+            f"{sensor}_gx", f"{sensor}_gy", f"{sensor}_gz",
+            f"{sensor}_mx", f"{sensor}_my", f"{sensor}_mz"
+        ])
+
+    #  Resample every sensor onto the common time grid
+    streams, device_times, gaps = session_streams(ble)
+    # Sensors that sent nothing (or are not configured) keep an empty (NaN) column group
+    _, data, fits = align_streams(streams, rate_hz=ble.sample_rate_hz, device_times=device_times,
+                                  sensor_order=sensor_order, gaps=gaps)
+    for sensor, fit in fits.items():
+        print(f"{sensor}: offset {fit.offset:.1f} ms, drift {fit.drift * 1e6:.1f} ppm")
+
+    #  Create and export DataFrame
+    df = pd.DataFrame(data, columns=column_names, copy=False)
+    df.to_csv(filename, index=False)
+
+    print(f"Sensor data saved to {filename}")
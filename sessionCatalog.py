@@ -0,0 +1,315 @@
+"""
+Catalog of the recorded sessions of a recordings directory.
+
+Every recording gets a unique id and its own directory (written by SessionRecorder); the
+catalog keeps a small SQLite index of the sessions (start/stop, label, state) and their
+sensors (samples, time span, rate and loss from the packet metrics), so sessions can be
+listed and filtered without opening them. Reads go through the recordings' time index
+and downsampled levels:
+
+    catalog = SessionCatalog("recordings")
+    for session in catalog.list(sensor="RArm"):
+        print(session["id"], session["started"], session["sensors"])
+    samples, times = catalog.read_range(session_id, "RArm", 60_000, 65_000)
+    times, low, high, factor = catalog.read_overview(session_id, "RArm", max_points=2000)
+
+Run from the repository root:
+    python sessionCatalog.py list --dir recordings
+    python sessionCatalog.py show <session id>
+    python sessionCatalog.py rebuild   (adds sessions recorded before the catalog existed)
+"""
+import json
+import os
+import secrets
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+
+from sessionRecorder import build_pyramids, load_pyramid, load_session
+
+CATALOG_FILE = "catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    label TEXT,
+    state TEXT NOT NULL,            -- 'recording' or 'complete'
+    started REAL,                   -- Unix time in s
+    stopped REAL,
+    connect_time REAL               -- Unix time in ms that the .times files count from
+);
+CREATE TABLE IF NOT EXISTS sensors (
+    session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    sensor TEXT NOT NULL,
+    samples INTEGER,
+    packets INTEGER,
+    lost INTEGER,
+    loss_rate REAL,
+    rate_hz REAL,
+    first_ms REAL,                  -- Host receive times (ms since connect_time)
+    last_ms REAL,
+    PRIMARY KEY (session_id, sensor)
+);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions(started);
+CREATE INDEX IF NOT EXISTS sensors_sensor ON sensors(sensor);
+"""
+
+
+def new_session_id():
+    """Readable, unique session id: session_<date>_<time>_<6 random hex digits>."""
+    return time.strftime("session_%Y%m%d_%H%M%S_") + secrets.token_hex(3)
+
+
+class SessionCatalog:
+    def __init__(self, root="recordings"):
+        """
+        Opens (or creates) the catalog of a recordings directory.
+
+        The index is opened per call, so one catalog may be used from the GUI thread, the
+        BLE service loops of several capture sessions and scripts at the same time.
+
+        Args:
+            root (str): Recordings directory; session directories are created inside it.
+        """
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.path = os.path.join(root, CATALOG_FILE)
+        with closing(self._connect()) as connection, connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    def create_session(self, label=None, connect_time=None):
+        """
+        Reserves a new session id and directory.
+
+        Args:
+            label (str | None): Free-form label (e.g. subject or capture session id).
+            connect_time (float | None): Unix time in ms the recorded times count from.
+
+        Returns:
+            tuple: (session id, session directory)
+        """
+        while True:
+            session_id = new_session_id()
+            session_dir = os.path.join(self.root, session_id)
+            try:
+                os.makedirs(session_dir)
+                break
+            except FileExistsError:  # Same second and same random suffix: draw again
+                continue
+        with closing(self._connect()) as connection, connection:
+            connection.execute("INSERT INTO sessions (id, path, label, state, started, connect_time) "
+                               "VALUES (?, ?, ?, 'recording', ?, ?)",
+                               (session_id, session_id, label, time.time(), connect_time))
+        return session_id, session_dir
+
+    def finish(self, session_id, metrics=None, stopped=None):
+        """
+        Marks a session as complete and stores its sensors.
+
+        Args:
+            session_id (str): Session id.
+            metrics (dict | None): PacketMetrics.summary() of the session.
+            stopped (float | None): Unix time in s (default: now).
+        """
+        rows = [(session_id, name, s["samples"], s["packets"], s["lost"], s["loss_rate"], s["mean_rate_hz"],
+                 s.get("first_ms"), s.get("last_ms"))
+                for name, s in (metrics or {}).items()]
+        with closing(self._connect()) as connection, connection:
+            connection.execute("UPDATE sessions SET state = 'complete', stopped = ? WHERE id = ?",
+                               (stopped if stopped is not None else time.time(), session_id))
+            connection.executemany("INSERT OR REPLACE INTO sensors VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def rebuild(self):
+        """
+        Adds the session directories that are not in the catalog yet (recordings made
+        before the catalog existed, or copied in), reading their index.json and
+        metrics.json, and writes their downsampled levels if they have none.
+
+        Returns:
+            list: Ids of the added sessions.
+        """
+        with closing(self._connect()) as connection, connection:
+            known = {row["id"] for row in connection.execute("SELECT id FROM sessions")}
+        added = []
+        for name in sorted(os.listdir(self.root)):
+            session_dir = os.path.join(self.root, name)
+            index_path = os.path.join(session_dir, "index.json")
+            if name in known or not os.path.isfile(index_path):
+                continue
+            with open(index_path) as f:
+                if not json.load(f).get("pyramid"):
+                    build_pyramids(session_dir)
+
+            metrics_path = os.path.join(session_dir, "metrics.json")
+            metrics = {}
+            if os.path.exists(metrics_path):
+                with open(metrics_path) as f:
+                    metrics = json.load(f)["sensors"]
+            rows = []
+            for sensor, (samples, times) in load_session(session_dir).items():
+                s = metrics.get(sensor, {})
+                rows.append((name, sensor, len(samples), s.get("packets"), s.get("lost"), s.get("loss_rate"),
+                             s.get("mean_rate_hz"), float(times[0]), float(times[-1])))
+            with closing(self._connect()) as connection, connection:
+                connection.execute("INSERT INTO sessions (id, path, state, started, stopped) "
+                                   "VALUES (?, ?, 'complete', ?, ?)",
+                                   (name, name, _started_from_name(name), os.path.getmtime(index_path)))
+                connection.executemany("INSERT INTO sensors VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            added.append(name)
+        return added
+
+    def remove(self, session_id):
+        """Removes a session from the catalog (its files are kept)."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def _describe(self, connection, row):
+        session = dict(row)
+        session["sensors"] = {sensor.pop("sensor"): sensor for sensor in (
+            dict(r) for r in connection.execute("SELECT * FROM sensors WHERE session_id = ? ORDER BY sensor",
+                                                (row["id"],)))}
+        for sensor in session["sensors"].values():
+            del sensor["session_id"]
+        return session
+
+    def list(self, sensor=None, label=None, since=None, until=None, state=None):
+        """
+        Sessions matching all given filters, newest first.
+
+        Args:
+            sensor (str | None): Only sessions with data of this sensor.
+            label (str | None): Only sessions with this label.
+            since (float | None): Only sessions started at or after this Unix time (s).
+            until (float | None): Only sessions started before this Unix time (s).
+            state (str | None): 'recording' or 'complete'.
+
+        Returns:
+            list: One dict per session (the sessions columns plus "sensors": {name: {...}}).
+        """
+        conditions, parameters = [], []
+        if sensor is not None:
+            conditions.append("id IN (SELECT session_id FROM sensors WHERE sensor = ?)")
+            parameters.append(sensor)
+        for column, operator, value in (("label", "=", label), ("started", ">=", since),
+                                        ("started", "<", until), ("state", "=", state)):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with closing(self._connect()) as connection, connection:
+            rows = connection.execute(f"SELECT * FROM sessions {where} ORDER BY started DESC", parameters)
+            return [self._describe(connection, row) for row in rows.fetchall()]
+
+    def get(self, session_id):
+        """
+        One session (see list).
+
+        Raises:
+            KeyError: If the session is not in the catalog.
+        """
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown session {session_id}")
+            return self._describe(connection, row)
+
+    def session_dir(self, session_id):
+        return os.path.join(self.root, self.get(session_id)["path"])
+
+    def read_range(self, session_id, sensor_name, start_ms=None, end_ms=None):
+        """
+        Samples of a sensor received in [start_ms, end_ms) (host ms since connection).
+
+        The range is found by binary search in the memory-mapped .times file, so only the
+        pages of the range (and a few of the search) are read, whatever the session length.
+        Receive times are non-decreasing up to packet jitter; a sample that arrived out of
+        order can fall just outside its range.
+
+        Returns:
+            tuple: (samples (n, width), times (n,)) read-only memmap slices.
+        """
+        session = load_session(self.session_dir(session_id))
+        if sensor_name not in session:
+            raise KeyError(f"No data of {sensor_name} in session {session_id}")
+        samples, times = session[sensor_name]
+        start, end = _time_slice(times, start_ms, end_ms)
+        return samples[start:end], times[start:end]
+
+    def read_overview(self, session_id, sensor_name, start_ms=None, end_ms=None, max_points=2000):
+        """
+        Min/max envelope of a time range for plotting, read from the finest downsampled
+        level that gives at most `max_points` buckets (the raw samples for short ranges,
+        where min and max are the samples themselves).
+
+        Returns:
+            tuple: (times (n,), min (n, width), max (n, width), samples per bucket)
+        """
+        session_dir = self.session_dir(session_id)
+        samples, times = self.read_range(session_id, sensor_name, start_ms, end_ms)
+        if len(samples) <= max_points:
+            return np.asarray(times), np.asarray(samples), np.asarray(samples), 1
+
+        with open(os.path.join(session_dir, "index.json")) as f:
+            factors = sorted(json.load(f).get("pyramid", []))
+        for factor in factors:
+            if len(samples) / factor > max_points and factor != factors[-1]:
+                continue
+            level = load_pyramid(session_dir, sensor_name, factor)
+            if level is None:
+                break
+            start, end = _time_slice(level["time"], start_ms, end_ms)
+            level = level[start:end]
+            return np.asarray(level["time"]), np.asarray(level["min"]), np.asarray(level["max"]), factor
+
+        # No downsampled levels (e.g. not rebuilt yet): decimate the samples instead
+        factor = -(-len(samples) // max_points)
+        return np.asarray(times[::factor]), np.asarray(samples[::factor]), np.asarray(samples[::factor]), factor
+
+
+def _started_from_name(name):
+    """Start time (Unix s) of a session_YYYYmmdd_HHMMSS[...] directory, None for other names."""
+    try:
+        return time.mktime(time.strptime(name[len("session_"):len("session_YYYYmmdd_HHMMSS")], "%Y%m%d_%H%M%S"))
+    except ValueError:
+        return None
+
+
+def _time_slice(times, start_ms, end_ms):
+    """Index range of [start_ms, end_ms) in a sorted time array (binary search)."""
+    start = 0 if start_ms is None else int(np.searchsorted(times, start_ms, side="left"))
+    end = len(times) if end_ms is None else int(np.searchsorted(times, end_ms, side="left"))
+    return start, max(start, end)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List and inspect recorded sessions.")
+    parser.add_argument("command", choices=["list", "show", "rebuild"])
+    parser.add_argument("session_id", nargs="?")
+    parser.add_argument("--dir", default="recordings", help="Recordings directory")
+    parser.add_argument("--sensor", help="Only sessions with this sensor")
+    parser.add_argument("--label", help="Only sessions with this label")
+    args = parser.parse_args()
+
+    catalog = SessionCatalog(args.dir)
+    if args.command == "rebuild":
+        print(f"Added {len(catalog.rebuild())} sessions")
+    elif args.command == "show":
+        print(json.dumps(catalog.get(args.session_id), indent=2))
+    else:
+        for session in catalog.list(sensor=args.sensor, label=args.label):
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(session["started"])) \
+                if session["started"] else "-"
+            loss = sum(s["lost"] or 0 for s in session["sensors"].values())
+            print(f"{session['id']}  {started}  {session['state']:<9}  {session['label'] or '':<12}  "
+                  f"{len(session['sensors'])} sensors  {loss} lost")
@@ -0,0 +1,407 @@
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+# Sensor order of the exported CSV (matches BLE.save_sensor_readings_as_csv)
+SENSOR_ORDER = ["RArm", "RShank", "LShank", "Back", "RThigh", "LArm"]
+AXES = ["ax", "ay", "az", "gx", "gy", "gz", "mx", "my", "mz"]
+PYRAMID_FACTORS = (16, 256, 4096)  # Samples per min/max bucket of the downsampled levels
+
+
+def pyramid_dtype(width, dtype):
+    """Record of one downsampled bucket: time of its first sample, per-axis min and max."""
+    return np.dtype([("time", "<u4"), ("min", dtype, (width,)), ("max", dtype, (width,))])
+
+
+def downsample(samples, times, factor):
+    """
+    Min/max of consecutive buckets of `factor` samples (the last bucket may be shorter).
+
+    Returns:
+        np.ndarray: Records of pyramid_dtype, one per bucket.
+    """
+    starts = np.arange(0, len(samples), factor)
+    records = np.empty(len(starts), dtype=pyramid_dtype(samples.shape[1], samples.dtype))
+    records["time"] = times[starts]
+    records["min"] = np.minimum.reduceat(samples, starts, axis=0)
+    records["max"] = np.maximum.reduceat(samples, starts, axis=0)
+    return records
+
+
+class ChunkWriter:
+    def __init__(self, name="session-writer"):
+        """
+        Background thread that writes the chunks of one or more SessionRecorders. Every
+        recorder gets its own writer by default; a capture host running several sessions
+        shares one so the number of threads does not grow with the sessions (see server.py).
+
+        Args:
+            name (str): Thread name.
+        """
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, recorder, item):
+        """Queues a chunk, gap record or the end-of-session marker (None) of a recorder."""
+        self.queue.put((recorder, item))
+
+    def stop(self):
+        """Ends the thread once everything queued so far has been written."""
+        self.queue.put(None)
+
+    def join(self, timeout=None):
+        self.thread.join(timeout)
+
+    def _run(self):
+        while True:
+            entry = self.queue.get()
+            if entry is None:
+                break
+            recorder, item = entry
+            try:
+                recorder._write(item)
+            except Exception as e:  # A failing session must not stop the others
+                print(f"Error writing session {recorder.session_dir}: {e}")
+                if item is None:
+                    recorder.done.set()
+
+
+class SessionRecorder:
+    def __init__(self, session_dir, chunk_size=4096, width=9, dtype="<i2", writer=None,
+                 pyramid_factors=PYRAMID_FACTORS):
+        """
+        Streams sensor samples to disk in fixed-size chunks from a background thread.
+
+        Every sensor gets two appendable raw files inside `session_dir`:
+            <name>.samples  - chunk after chunk of (n, width) values in `dtype`
+            <name>.times    - matching uint32 host-receive times in milliseconds
+            <name>.device_times - matching float64 device clock times in milliseconds (only
+                                for packets that provide them, see append_samples)
+            <name>.pyramid<F> - min/max of every F samples (see downsample), one file per
+                                level, so long sessions can be plotted without reading
+                                the samples
+        `index.json` records how many samples of each sensor are safely on disk, so a
+        session can be recovered up to the last flushed chunk after a crash.
+
+        Args:
+            session_dir (str): Output directory (created if missing).
+            chunk_size (int): Samples per sensor collected before a chunk is written.
+            width (int): Values per sample.
+            dtype (str): NumPy dtype of a single value.
+            writer (ChunkWriter | None): Shared writer thread; a private one is started if None.
+            pyramid_factors (tuple): Bucket sizes of the downsampled levels; only factors
+                that divide `chunk_size` are used, so buckets never span two chunks.
+        """
+        os.makedirs(session_dir, exist_ok=True)
+        self.session_dir = session_dir
+        self.chunk_size = chunk_size
+        self.width = width
+        self.dtype = np.dtype(dtype)
+        self.staging = {}  # Sensor name -> [samples, times, fill, device times or None] of the chunk being filled
+        self.pyramid_factors = [factor for factor in pyramid_factors if chunk_size % factor == 0]
+        self.index = {"chunk_size": chunk_size, "width": width, "dtype": self.dtype.str,
+                      "pyramid": self.pyramid_factors, "sensors": {}}
+        self.closed = False
+        self.files = {}  # Sensor name -> [sample file, time file, pyramid files...], used by the writer thread only
+        self.device_time_files = {}  # Sensor name -> device time file, used by the writer thread only
+        self.done = threading.Event()  # Set once every queued chunk has been written
+        self.on_done = None  # Called by the writer thread after the last chunk (see close)
+        self.owns_writer = writer is None
+        self.writer = writer if writer is not None else ChunkWriter()
+
+    def _new_chunk(self):
+        return [np.empty((self.chunk_size, self.width), dtype=self.dtype),
+                np.empty(self.chunk_size, dtype=np.uint32), 0, None]
+
+    def append_packet(self, sensor_name, data, t_received):
+        """
+        Copies one raw packet into the sensor's current chunk; hands the chunk to the
+        writer thread once it is full. Must be called from a single (streaming) thread.
+
+        Args:
+            sensor_name (str): Name of the sending sensor.
+            data (bytes | bytearray): Raw notification payload.
+            t_received (float): Host receive time in milliseconds since connection.
+        """
+        chunk = self.staging.get(sensor_name)
+        if chunk is None:
+            chunk = self.staging[sensor_name] = self._new_chunk()
+        samples, times, fill, _ = chunk
+        samples[fill] = np.frombuffer(data, dtype=self.dtype, count=self.width)
+        times[fill] = t_received
+        chunk[2] = fill + 1
+        if chunk[2] == self.chunk_size:
+            self.writer.submit(self, (sensor_name, samples, times, None))
+            self.staging[sensor_name] = self._new_chunk()
+
+    def append_samples(self, sensor_name, samples, times, device_times=None):
+        """
+        Copies a block of decoded samples (e.g. a multi-sample packet) into the sensor's
+        chunks, handing every filled chunk to the writer thread.
+
+        Args:
+            sensor_name (str): Name of the sending sensor.
+            samples (np.ndarray): (n, width) values.
+            times (array-like): (n,) host receive times in milliseconds since connection.
+            device_times (array-like | None): (n,) device clock times in ms (see
+                packetProtocol.PacketDecoder.decode); stored so offline alignment can
+                use the sensor clocks.
+        """
+        start = 0
+        while start < len(samples):
+            chunk = self.staging.get(sensor_name)
+            if chunk is None:
+                chunk = self.staging[sensor_name] = self._new_chunk()
+            chunk_samples, chunk_times, fill, chunk_device_times = chunk
+            n = min(len(samples) - start, self.chunk_size - fill)
+            chunk_samples[fill:fill + n] = samples[start:start + n]
+            chunk_times[fill:fill + n] = times[start:start + n]
+            if device_times is not None:
+                if chunk_device_times is None:  # NaN for the samples before, which had no device time
+                    chunk_device_times = chunk[3] = np.full(self.chunk_size, np.nan)
+                chunk_device_times[fill:fill + n] = device_times[start:start + n]
+            chunk[2] = fill + n
+            start += n
+            if chunk[2] == self.chunk_size:
+                self.writer.submit(self, (sensor_name, chunk_samples, chunk_times, chunk_device_times))
+                self.staging[sensor_name] = self._new_chunk()
+
+    def record_gap(self, sensor_name, start, end):
+        """
+        Stores a span in which a sensor was disconnected (host ms since connection) in
+        index.json. `end` is None if the sensor never came back.
+        """
+        self.writer.submit(self, (sensor_name, None, (start, end), None))
+
+    def close(self, on_done=None):
+        """
+        Flushes partially filled chunks and stops the writer once the queue is drained.
+
+        Args:
+            on_done (callable | None): Called without arguments on the writer thread once
+                every chunk of the session is on disk, e.g. to mark it complete in the
+                catalog without blocking the caller.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.on_done = on_done
+        for sensor_name, (samples, times, fill, device_times) in self.staging.items():
+            if fill:
+                self.writer.submit(self, (sensor_name, samples[:fill], times[:fill],
+                                          None if device_times is None else device_times[:fill]))
+        self.staging = {}
+        self.writer.submit(self, None)
+        if self.owns_writer:
+            self.writer.stop()
+
+    def join(self, timeout=None):
+        """Blocks until every queued chunk has been written."""
+        self.done.wait(timeout)
+
+    def _write(self, item):
+        """Writes one queued item (called in the writer thread)."""
+        if item is None:  # End of the session
+            for files in self.files.values():
+                for f in files:
+                    f.close()
+            for f in self.device_time_files.values():
+                f.close()
+            self.files = {}
+            self.device_time_files = {}
+            if self.on_done is not None:
+                self.on_done()
+            self.done.set()
+            return
+
+        sensor_name, samples, times, device_times = item
+        if samples is None:  # A gap record (see record_gap)
+            self.index.setdefault("gaps", {}).setdefault(sensor_name, []).append(list(times))
+            self._write_index()
+            return
+        if sensor_name not in self.files:
+            names = ["samples", "times"] + [f"pyramid{factor}" for factor in self.pyramid_factors]
+            self.files[sensor_name] = [open(os.path.join(self.session_dir, f"{sensor_name}.{name}"), "ab")
+                                       for name in names]
+            self.index["sensors"][sensor_name] = {"samples": 0, "chunks": 0}
+
+        # Write the chunk and its downsampled levels and make sure they hit the disk before
+        # advertising them in the index
+        files = list(self.files[sensor_name])
+        blocks = [samples, times] + [downsample(samples, times, factor) for factor in self.pyramid_factors]
+        entry = self.index["sensors"][sensor_name]
+        if device_times is not None:
+            if sensor_name not in self.device_time_files:
+                self.device_time_files[sensor_name] = open(
+                    os.path.join(self.session_dir, f"{sensor_name}.device_times"), "ab")
+                entry["device_times"] = True
+            files.append(self.device_time_files[sensor_name])
+            blocks.append(np.asarray(device_times, dtype="<f8"))
+        for f, block in zip(files, blocks):
+            f.write(block.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        entry["samples"] += len(samples)
+        entry["chunks"] += 1
+        self._write_index()
+
+    def _write_index(self):
+        path = os.path.join(self.session_dir, "index.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(path + ".tmp", path)  # Atomic, so a crash never leaves a half-written index
+
+
+def load_session(session_dir):
+    """
+    Opens a recorded session as memory-mapped arrays.
+
+    Only samples that are complete in both the sample and time files are returned,
+    which makes this safe to use on sessions that were interrupted mid-write.
+
+    Args:
+        session_dir (str): Directory written by SessionRecorder.
+
+    Returns:
+        dict: Sensor name -> (samples (n, width), times (n,)) read-only memmaps.
+    """
+    with open(os.path.join(session_dir, "index.json")) as f:
+        index = json.load(f)
+    dtype = np.dtype(index["dtype"])
+    width = index["width"]
+
+    session = {}
+    for sensor_name in index["sensors"]:
+        sample_path = os.path.join(session_dir, f"{sensor_name}.samples")
+        time_path = os.path.join(session_dir, f"{sensor_name}.times")
+        count = min(os.path.getsize(sample_path) // (width * dtype.itemsize),
+                    os.path.getsize(time_path) // 4)
+        if count == 0:
+            continue
+        samples = np.memmap(sample_path, dtype=dtype, mode="r", shape=(count, width))
+        times = np.memmap(time_path, dtype=np.uint32, mode="r", shape=(count,))
+        session[sensor_name] = (samples, times)
+    return session
+
+
+def load_device_times(session_dir):
+    """
+    Opens the device clock times of a recorded session (sensors whose packets carried
+    them, see SessionRecorder.append_samples).
+
+    Returns:
+        dict: Sensor name -> (n,) float64 read-only memmap in ms, with n matching load_session.
+    """
+    with open(os.path.join(session_dir, "index.json")) as f:
+        index = json.load(f)
+    session = load_session(session_dir)
+
+    device_times = {}
+    for sensor_name, entry in index["sensors"].items():
+        path = os.path.join(session_dir, f"{sensor_name}.device_times")
+        if not entry.get("device_times") or sensor_name not in session or not os.path.exists(path):
+            continue
+        count = os.path.getsize(path) // 8
+        if count < len(session[sensor_name][1]):  # Interrupted mid-write: fall back to the index clock
+            continue
+        times = np.memmap(path, dtype="<f8", mode="r", shape=(len(session[sensor_name][1]),))
+        if np.isnan(times).any():  # Some packets had no timestamp: the clock is incomplete
+            continue
+        device_times[sensor_name] = times
+    return device_times
+
+
+def load_pyramid(session_dir, sensor_name, factor):
+    """
+    Opens one downsampled level of a sensor as a memory-mapped record array with the
+    fields time, min and max (see downsample).
+
+    Returns:
+        np.memmap | None: The buckets that are complete on disk, or None if the session
+        has no such level.
+    """
+    with open(os.path.join(session_dir, "index.json")) as f:
+        index = json.load(f)
+    path = os.path.join(session_dir, f"{sensor_name}.pyramid{factor}")
+    if factor not in index.get("pyramid", []) or not os.path.exists(path):
+        return None
+    dtype = pyramid_dtype(index["width"], np.dtype(index["dtype"]))
+    samples = index["sensors"].get(sensor_name, {}).get("samples", 0)
+    count = min(os.path.getsize(path) // dtype.itemsize, -(-samples // factor))
+    if count == 0:
+        return None
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+def build_pyramids(session_dir, factors=PYRAMID_FACTORS, rows_per_read=1 << 20):
+    """
+    Writes the downsampled levels of a session that was recorded without them (offline,
+    reading the samples block by block).
+    """
+    index_path = os.path.join(session_dir, "index.json")
+    with open(index_path) as f:
+        index = json.load(f)
+    rows_per_read -= rows_per_read % max(factors)  # Buckets must not span two blocks
+    for sensor_name, (samples, times) in load_session(session_dir).items():
+        for factor in factors:
+            with open(os.path.join(session_dir, f"{sensor_name}.pyramid{factor}"), "wb") as f:
+                for start in range(0, len(samples), rows_per_read):
+                    f.write(downsample(np.asarray(samples[start:start + rows_per_read]),
+                                       np.asarray(times[start:start + rows_per_read]), factor).tobytes())
+    index["pyramid"] = list(factors)
+    with open(index_path + ".tmp", "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(index_path + ".tmp", index_path)
+
+
+def load_gaps(session_dir):
+    """
+    Returns the disconnection spans of a session as {sensor name: [[start, end], ...]}
+    in host ms since connection (end is None if the sensor did not come back).
+    """
+    with open(os.path.join(session_dir, "index.json")) as f:
+        return json.load(f).get("gaps", {})
+
+
+def export_session_csv(session_dir, filename="sensor_data2.csv", sensor_order=SENSOR_ORDER, rows_per_write=65536):
+    """
+    Offline conversion of a recorded session into the sensor_data2.csv layout.
+    Sensors are aligned on a common time grid block by block (see
+    sensorAlignment.iter_aligned_session), so memory stays flat whatever the session
+    length. Spans in which a sensor was disconnected, and sensors of `sensor_order` that
+    were not recorded, are left empty.
+
+    Args:
+        session_dir (str): Directory written by SessionRecorder.
+        filename (str): Output CSV file name.
+        sensor_order (list): Order of the sensor column groups.
+        rows_per_write (int): Number of rows written per block.
+    """
+    import pandas as pd
+    from sensorAlignment import iter_aligned_session
+
+    column_names = [f"{sensor}_{axis}" for sensor in sensor_order for axis in AXES]
+    _, blocks = iter_aligned_session(session_dir, sensor_order=sensor_order, rows_per_block=rows_per_write)
+
+    pd.DataFrame(columns=column_names).to_csv(filename, index=False)  # Header (also for an empty session)
+    for _, block in blocks:
+        pd.DataFrame(block, columns=column_names, copy=False).to_csv(filename, mode="a", header=False, index=False)
+
+    print(f"Sensor data saved to {filename}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert a recorded session to CSV.")
+    parser.add_argument("session_dir")
+    parser.add_argument("--output", default="sensor_data2.csv")
+    parser.add_argument("--sensors", nargs="+", default=SENSOR_ORDER,
+                        help="Column groups in order (default: the six app sensors; missing ones stay empty)")
+    args = parser.parse_args()
+    export_session_csv(args.session_dir, args.output, sensor_order=args.sensors)
@@ -0,0 +1,253 @@
+import asyncio
+import math
+import random
+import time
+import types
+
+import numpy as np
+
+from calibration import ACCEL_SCALE, GYRO_SCALE
+from packetProtocol import MAX_SAMPLES, encode_packet
+
+# REALDISP sensor positions in log column order
+REALDISP_SENSORS = ["RLA", "RUA", "BACK", "LUA", "LLA", "RC", "RT", "LT", "LC"]
+# Approximate REALDISP units (acc m/s^2, gyro rad/s, normalised mag) -> raw MPU6050/HMC int16
+REALDISP_TO_RAW = np.array([ACCEL_SCALE / 9.81] * 3 + [GYRO_SCALE * 180 / math.pi] * 3 + [45.0] * 3)
+
+
+def simulated_uuids(sensor_names):
+    """Characteristic UUIDs for simulated sensors, in the style of the RFduino UUIDs."""
+    return {name: f"12340015-cbed-76db-9423-{i:012x}" for i, name in enumerate(sensor_names)}
+
+
+class SyntheticSource:
+    def __init__(self, sensor_count=6, sensor_names=None, length=3000, seed=0):
+        """
+        Random-walk 9-axis int16 signals, one per sensor, looped while streaming.
+
+        Args:
+            sensor_count (int): Number of sensors (ignored if `sensor_names` is given).
+            sensor_names (list | None): Sensor names; defaults to Sim00, Sim01, ...
+            length (int): Samples generated per sensor before the signal repeats.
+            seed (int): Random seed.
+        """
+        rng = np.random.default_rng(seed)
+        self.sensor_names = list(sensor_names or [f"Sim{i:02d}" for i in range(sensor_count)])
+        self.data = {}
+        for name in self.sensor_names:
+            walk = np.cumsum(rng.integers(-50, 51, (length, 9)), axis=0)
+            self.data[name] = np.ascontiguousarray(walk.clip(-32768, 32767), dtype="<i2")
+
+    def samples(self, sensor_name):
+        """(n, 9) int16 samples of a sensor."""
+        return self.data[sensor_name]
+
+
+class CsvReplaySource:
+    def __init__(self, path):
+        """
+        Replays a recording in the sensor_data2.csv layout (columns <sensor>_<axis>).
+        Rows a sensor has no data for (empty cells) are skipped for that sensor.
+
+        Args:
+            path (str): CSV written by BLE.save_sensor_readings_as_csv or export_session_csv.
+        """
+        import pandas as pd
+
+        df = pd.read_csv(path)
+        self.sensor_names = list(dict.fromkeys(column.rsplit("_", 1)[0] for column in df.columns))
+        self.data = {}
+        for name in self.sensor_names:
+            block = df[[column for column in df.columns if column.rsplit("_", 1)[0] == name]].to_numpy()
+            block = block[~np.isnan(block).any(axis=1)]
+            self.data[name] = np.ascontiguousarray(block.clip(-32768, 32767), dtype="<i2")
+
+    def samples(self, sensor_name):
+        return self.data[sensor_name]
+
+
+class RealdispReplaySource:
+    def __init__(self, log_path, sensors=None):
+        """
+        Replays a REALDISP subjectN_ideal.log as raw int16 sensor streams (units converted
+        approximately with REALDISP_TO_RAW).
+
+        Args:
+            log_path (str): Path of the log file.
+            sensors (list | None): Subset of REALDISP_SENSORS to replay.
+        """
+        from datasetBuilder import parse_log
+
+        features, _ = parse_log(log_path)
+        self.sensor_names = list(sensors or REALDISP_SENSORS)
+        self.data = {}
+        for name in self.sensor_names:
+            i = REALDISP_SENSORS.index(name)
+            block = features[:, i * 9:(i + 1) * 9] * REALDISP_TO_RAW
+            self.data[name] = np.ascontiguousarray(block.clip(-32768, 32767), dtype="<i2")
+
+    def samples(self, sensor_name):
+        return self.data[sensor_name]
+
+
+class SimulatedTransport:
+    def __init__(self, source, rate_hz=50, jitter_ms=2.0, drift_ppm=50, loss=0.0, samples_per_packet=1,
+                 protocol=2, timestamps=False, speed=1.0, seed=0):
+        """
+        In-process sensor fleet with the interface of bleTransport.BleakTransport.
+
+        Each sensor advertises shortly after scanning starts, connects instantly and, once
+        subscribed, calls the notify handler with packets of its source signal: protocol v2
+        packets (packetProtocol) or legacy 18-byte <9h samples. Every sensor runs on its own
+        clock with a random drift of up to +-`drift_ppm`; delivery is delayed by an
+        exponentially distributed jitter and packets are dropped with probability `loss`
+        (their sequence numbers are skipped, like lost notifications).
+
+        Args:
+            source: SyntheticSource, CsvReplaySource or RealdispReplaySource.
+            rate_hz (float): Sample rate of every sensor.
+            jitter_ms (float): Mean delivery delay added to a packet.
+            drift_ppm (float): Largest clock drift of a sensor.
+            loss (float): Probability that a packet is lost.
+            samples_per_packet (int): Samples per v2 packet.
+            protocol (int): 2 for sample packets, 1 for legacy single-sample packets.
+            timestamps (bool): Whether v2 packets carry the device time.
+            speed (float | None): Replay speed relative to real time; None streams as fast
+                as the handlers can take it.
+            seed (int): Random seed of jitter, drift and loss.
+        """
+        if protocol == 1 and samples_per_packet != 1:
+            raise ValueError("Legacy packets carry exactly one sample")
+        if not 1 <= samples_per_packet <= MAX_SAMPLES:
+            raise ValueError(f"samples_per_packet must be 1..{MAX_SAMPLES}")
+        self.source = source
+        self.rate_hz = rate_hz
+        self.jitter_ms = jitter_ms
+        self.loss = loss
+        self.samples_per_packet = samples_per_packet
+        self.protocol = protocol
+        self.timestamps = timestamps
+        self.speed = speed
+        self.random = random.Random(seed)
+        self.name_to_uuid = simulated_uuids(source.sensor_names)
+        self.drift = {name: self.random.uniform(-drift_ppm, drift_ppm) * 1e-6 for name in source.sensor_names}
+        self.devices = [types.SimpleNamespace(name=name, address=f"SIM:{i:04X}")
+                        for i, name in enumerate(source.sensor_names)]
+        self.clients = {}         # Sensor name -> SimulatedClient
+        self.packets_sent = 0
+        self.packets_lost = 0
+        self.handler_time = 0.0   # Seconds spent inside notify handlers
+
+    def scanner(self, detection_callback):
+        return SimulatedScanner(self, detection_callback)
+
+    def client(self, device, disconnected_callback):
+        client = self.clients[device.name] = SimulatedClient(self, device, disconnected_callback)
+        return client
+
+    def drop(self, sensor_name):
+        """Simulates a link loss of a connected sensor (it can reconnect right away)."""
+        self.clients[sensor_name].drop()
+
+
+class SimulatedScanner:
+    def __init__(self, transport, detection_callback):
+        self.transport = transport
+        self.detection_callback = detection_callback
+        self.handles = []
+
+    async def start(self):
+        # Sensors advertise at random moments within the first 100 ms
+        loop = asyncio.get_running_loop()
+        for device in self.transport.devices:
+            advertisement = types.SimpleNamespace(local_name=device.name)
+            self.handles.append(loop.call_later(self.transport.random.uniform(0, 0.1),
+                                                self.detection_callback, device, advertisement))
+
+    async def stop(self):
+        for handle in self.handles:
+            handle.cancel()
+        self.handles = []
+
+
+class SimulatedClient:
+    def __init__(self, transport, device, disconnected_callback):
+        self.transport = transport
+        self.name = device.name
+        self.address = device.address
+        self.disconnected_callback = disconnected_callback
+        self.is_connected = False
+        self.task = None
+        self.origin = None   # Loop time at which the device clock started
+        self.index = 0       # Next sample index of the device (keeps counting while disconnected)
+
+    async def connect(self):
+        await asyncio.sleep(0)
+        self.is_connected = True
+
+    async def disconnect(self):
+        self._stop()
+        self.is_connected = False
+
+    async def start_notify(self, uuid, handler):
+        if not self.is_connected:
+            raise ConnectionError(f"{self.name} is not connected")
+        self._stop()
+        characteristic = types.SimpleNamespace(uuid=uuid)
+        self.task = asyncio.get_running_loop().create_task(self._emit(characteristic, handler))
+
+    async def stop_notify(self, uuid):
+        self._stop()
+
+    def _stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def drop(self):
+        self._stop()
+        self.is_connected = False
+        self.disconnected_callback(self)
+
+    async def _emit(self, characteristic, handler):
+        """Sends packets on the device's (drifting) clock until notifications are stopped."""
+        transport = self.transport
+        signal = transport.source.samples(self.name)
+        count = transport.samples_per_packet
+        clock = (1 + transport.drift[self.name]) / transport.speed if transport.speed else 0  # Loop s per device s
+        jitter = transport.jitter_ms / 1000 / transport.speed if transport.speed else 0
+        rng = transport.random
+        loop = asyncio.get_running_loop()
+        if self.origin is None:
+            self.origin = loop.time()
+        elif clock:
+            # The device kept sampling while it was not streaming
+            elapsed = (loop.time() - self.origin) / clock * transport.rate_hz
+            self.index = max(self.index, math.ceil(elapsed / count) * count)
+        sequence = 0    # The firmware restarts its sequence numbers on every connection
+
+        while True:
+            index = self.index
+            if clock:
+                due = self.origin + index / transport.rate_hz * clock + (rng.expovariate(1 / jitter) if jitter else 0)
+                await asyncio.sleep(max(due - loop.time(), 0))
+            elif sequence % 16 == 0:
+                await asyncio.sleep(0)  # Let the other sensors and the stop request through
+
+            block = signal.take(range(index, index + count), axis=0, mode="wrap") if count > 1 \
+                else signal[index % len(signal)]
+            lost = transport.loss and rng.random() < transport.loss
+            if lost:
+                transport.packets_lost += 1
+            else:
+                if transport.protocol == 2:
+                    timestamp = int(index * 1000 / transport.rate_hz) if transport.timestamps else None
+                    data = encode_packet(block, sequence, timestamp)
+                else:
+                    data = block.tobytes()
+                t0 = time.perf_counter()
+                handler(characteristic, bytearray(data))
+                transport.handler_time += time.perf_counter() - t0
+                transport.packets_sent += 1
+            self.index = index + count
+            sequence += 1
@@ -0,0 +1,53 @@
+import itertools
+
+
+class StatusChannel:
+    def __init__(self):
+        """
+        Thread-safe hand-off of status and telemetry values from worker threads to the GUI.
+
+        Workers publish into a latest-value slot per topic (a single dict assignment, no
+        locks, never blocks). The GUI polls the slots on a Tk after() timer and only sees
+        the newest value, so bursts of updates (e.g. one per packet) are coalesced into
+        at most one widget update per poll interval.
+
+        It also offers `set`, so it can stand in for the tk.StringVar that BLE used to
+        receive: BLE.status_var.set(...) then publishes to the "status" topic.
+        """
+        self._slots = {}  # Topic -> (version, value)
+        self._versions = itertools.count(1)
+
+    def publish(self, topic, value):
+        """Stores the newest value of a topic (safe to call from any thread)."""
+        self._slots[topic] = (next(self._versions), value)
+
+    def set(self, value):
+        """tk.StringVar-compatible: publishes to the "status" topic."""
+        self.publish("status", value)
+
+    def latest(self, topic="status", default=None):
+        """Returns the newest value of a topic."""
+        return self._slots.get(topic, (0, default))[1]
+
+    def bind(self, widget, topic, callback, interval_ms=100):
+        """
+        Polls a topic from the GUI thread and calls `callback(value)` whenever a newer
+        value was published since the last poll.
+
+        Args:
+            widget: Any Tk widget; its after() timer runs the polling.
+            topic (str): Topic to watch.
+            callback (callable): Called in the GUI thread with the newest value.
+            interval_ms (int): Poll interval, i.e. the maximum update rate of the widget.
+        """
+        last_version = 0
+
+        def poll():
+            nonlocal last_version
+            version, value = self._slots.get(topic, (0, None))
+            if version != last_version:
+                last_version = version
+                callback(value)
+            widget.after(interval_ms, poll)
+
+        widget.after(interval_ms, poll)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from packetProtocol import PacketDecoder, encode_packet
+
+PERIOD_MS = 20.0
+
+
+def sample(value):
+    return np.full((1, 9), value, dtype=np.int16)
+
+
+def feed(decoder, packets, name="s1"):
+    """Decodes (packet index, receive time or None, device timestamp or None) tuples in order."""
+    return [decoder.decode(name, encode_packet(sample(index), index, timestamp), received_ms)
+            for index, received_ms, timestamp in packets]
+
+
+def test_plain_gap_counts_lost_packets_and_keeps_device_times():
+    decoder = PacketDecoder(PERIOD_MS)
+    results = feed(decoder, [(0, None, None), (1, None, None), (5, None, None)])
+
+    assert decoder.received("s1") == 3
+    assert decoder.lost("s1") == 3
+    assert results[-1][1][0] == 5 * PERIOD_MS
+
+
+@pytest.mark.parametrize("gap", [256, 300, 700])
+def test_gap_of_256_or_more_from_device_timestamps(gap):
+    decoder = PacketDecoder(PERIOD_MS)
+    # Receive times are delayed arbitrarily; only the device clock tells the gap
+    feed(decoder, [(0, 1000.0, 0), (1, 1020.0, 20), (gap + 2, 1500.0, (gap + 2) * 20)])
+
+    assert decoder.lost("s1") == gap
+
+
+@pytest.mark.parametrize("gap", [256, 300, 700])
+def test_gap_of_256_or_more_from_receive_times(gap):
+    decoder = PacketDecoder(PERIOD_MS)
+    results = feed(decoder, [(0, 0.0, None), (1, 20.0, None), (gap + 2, (gap + 2) * 20.0 + 7, None)])
+
+    assert decoder.lost("s1") == gap
+    assert results[-1][1][0] == (gap + 2) * PERIOD_MS
+
+
+def test_short_gap_is_not_inflated_by_a_late_packet():
+    decoder = PacketDecoder(PERIOD_MS)
+    feed(decoder, [(0, 0.0, None), (3, 2000.0, None)])  # 2 s of delivery delay, 2 lost
+
+    assert decoder.lost("s1") == 2
+
+
+def test_resync_after_reconnect_starts_a_new_sequence():
+    decoder = PacketDecoder(PERIOD_MS)
+    feed(decoder, [(0, 0.0, None), (1, 20.0, None), (2, 40.0, None)])
+    decoder.resync("s1", gap_ms=1000.0)
+    # The firmware restarts at sequence 0; the receive clock jumped by the reconnect
+    results = feed(decoder, [(0, 9000.0, None), (1, 9020.0, None)])
+
+    assert decoder.lost("s1") == 0
+    assert decoder.received("s1") == 5
+    assert results[0][1][0] == (3 + 1000.0 / PERIOD_MS) * PERIOD_MS
+
+
+def test_packet_without_samples_is_rejected():
+    decoder = PacketDecoder(PERIOD_MS)
+    feed(decoder, [(0, 0.0, None)])
+    empty = encode_packet(np.zeros((0, 9)), 1)
+
+    with pytest.raises(ValueError):
+        decoder.decode("s1", empty, 20.0)
+    feed(decoder, [(1, 20.0, None)])
+    assert decoder.received("s1") == 2
@@ -0,0 +1,191 @@
+import os
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+# variable_size_order lives in windowing; imported here for the existing `from windowedDataset import ...` callers
+from windowing import sliding_windows, variable_size_order, window_count, window_indices, window_labels
+
+
+def compute_normalization(frames, chunk_rows=65536):
+    """
+    Per-channel mean and standard deviation of a (possibly memory-mapped) frame array,
+    accumulated chunk by chunk so the whole matrix is never loaded at once.
+
+    Returns:
+        tuple: (mean, std) float32 arrays of shape (channels,).
+    """
+    total = np.zeros(frames.shape[1])
+    total_sq = np.zeros(frames.shape[1])
+    for start in range(0, len(frames), chunk_rows):
+        chunk = np.asarray(frames[start:start + chunk_rows], dtype=np.float64)
+        total += chunk.sum(axis=0)
+        total_sq += np.square(chunk).sum(axis=0)
+    mean = total / len(frames)
+    std = np.sqrt(np.maximum(total_sq / len(frames) - mean ** 2, 0))
+    return mean.astype(np.float32), std.astype(np.float32)
+
+
+class WindowedDataset(Dataset):
+    def __init__(self, frames, labels, window_size=64, step=32, mean=None, std=None,
+                 order=None, repeats=1, label_mode="last"):
+        """
+        Sliding windows over a frame matrix, produced lazily by index.
+
+        Frames are read from a memory-mapped .npy (or an in-memory array) only when a
+        window is requested, and normalization is applied to each fetched batch, so peak
+        memory is bounded by the batch size rather than the dataset size.
+
+        Args:
+            frames (str | np.ndarray): Path to a (frames, channels) .npy file, or an array.
+                Paths are opened lazily in every DataLoader worker.
+            labels (str | np.ndarray): Path to a (frames,) .npy file, or an array.
+            window_size (int): Frames per window.
+            step (int): Stride between window starts.
+            mean (np.ndarray | None): Per-channel normalization mean (no normalization if None).
+            std (np.ndarray | None): Per-channel normalization std.
+            order (np.ndarray | None): Optional frame order (e.g. from variable_size_order).
+            repeats (int): Virtually tile the frames this many times (like np.tile(X, (repeats, 1))).
+            label_mode (str): 'last' (label of the last frame), 'mode' (majority label) or
+                'frame' (labels of every frame, shape (batch, window_size)).
+        """
+        self.frames_source = frames
+        self.labels_source = labels
+        self._frames = None if isinstance(frames, str) else frames
+        self._labels = None if isinstance(labels, str) else labels
+        self.window_size = window_size
+        self.step = step
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+        self.std = None if std is None else np.asarray(std, dtype=np.float32)
+        self.order = order
+        self.repeats = repeats
+        self.label_mode = label_mode
+
+        n_frames = len(order) if order is not None else self._shape(frames)[0]
+        self.n_frames = n_frames
+        self.n_virtual = n_frames * repeats
+        self.n_windows = window_count(self.n_virtual, window_size, step)
+
+    @staticmethod
+    def _shape(source):
+        if isinstance(source, str):
+            return np.load(source, mmap_mode="r").shape
+        return source.shape
+
+    @property
+    def frames(self):
+        if self._frames is None:
+            self._frames = np.load(self.frames_source, mmap_mode="r")
+        return self._frames
+
+    @property
+    def labels(self):
+        if self._labels is None:
+            self._labels = np.load(self.labels_source, mmap_mode="r")
+        return self._labels
+
+    def __getstate__(self):
+        # Never pickle memory-mapped data into DataLoader workers; they reopen the files
+        state = self.__dict__.copy()
+        if isinstance(self.frames_source, str):
+            state["_frames"] = None
+        if isinstance(self.labels_source, str):
+            state["_labels"] = None
+        return state
+
+    def __len__(self):
+        return self.n_windows
+
+    def _frame_indices(self, indices):
+        """(batch, window_size) indices into the stored frames for the given windows."""
+        positions = window_indices(np.asarray(indices) * self.step, self.window_size)
+        positions %= self.n_frames
+        return positions if self.order is None else self.order[positions]
+
+    def _window_slice(self, indices):
+        """
+        Windows `indices` as a slice of zero-copy sliding_windows views, when they are
+        consecutive and the frames are read in order without tiling; None otherwise.
+        """
+        if self.order is not None or self.repeats != 1 or not isinstance(indices, range) or indices.step != 1:
+            return None
+        frames = sliding_windows(self.frames, self.window_size, self.step)[indices.start:indices.stop]
+        labels = sliding_windows(self.labels, self.window_size, self.step)[indices.start:indices.stop]
+        return frames, labels
+
+    def __getitems__(self, indices):
+        """
+        Fetches and normalizes a whole batch of windows in one gather (one copy of a
+        strided view for consecutive windows, e.g. sequential evaluation).
+        """
+        views = self._window_slice(indices)
+        if views is None:
+            rows = self._frame_indices(indices)
+            batch = np.asarray(self.frames[rows], dtype=np.float32)
+            labels = np.asarray(self.labels[rows.ravel()]).reshape(rows.shape)
+        else:
+            batch = np.array(views[0], dtype=np.float32)
+            labels = views[1]
+        if self.mean is not None:
+            batch -= self.mean
+            batch /= self.std
+
+        labels = labels.astype(np.int64)
+        return torch.from_numpy(batch), torch.from_numpy(window_labels(labels, self.label_mode))
+
+    def __getitem__(self, index):
+        batch, labels = self.__getitems__([index])
+        return batch[0], labels[0]
+
+
+def collate_batch(batch):
+    """DataLoader collate_fn for batches already assembled by WindowedDataset.__getitems__."""
+    return batch
+
+
+def make_loader(dataset, batch_size=32, shuffle=False, num_workers=None):
+    """
+    DataLoader that fetches whole batches through WindowedDataset.__getitems__.
+
+    Args:
+        dataset (WindowedDataset): The windowed dataset.
+        batch_size (int): Windows per batch.
+        shuffle (bool): Shuffle window order.
+        num_workers (int | None): Loader processes (default: CPU count - 1).
+    """
+    if num_workers is None:
+        num_workers = max((os.cpu_count() or 1) - 1, 0)
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, num_workers=num_workers,
+                      collate_fn=collate_batch, persistent_workers=num_workers > 0)
+
+
+def convert_mat(mat_path, out_dir, keys=("trainData", "trainLabels", "valData", "valLabels",
+                                         "testData", "testLabels")):
+    """
+    One-time conversion of a REALDISP_*.mat file into .npy files that can be memory-mapped.
+    (.mat files cannot be memory-mapped, so this is the only step that loads the full matrix.)
+
+    Returns:
+        dict: Key -> written .npy path.
+
+    Raises:
+        KeyError: If one of `keys` is not in the .mat file.
+    """
+    from scipy.io import loadmat
+
+    data = loadmat(mat_path)
+    missing = [key for key in keys if key not in data]
+    if missing:
+        available = sorted(key for key in data if not key.startswith("__"))
+        raise KeyError(f"{mat_path} has no {', '.join(missing)} (available: {', '.join(available)})")
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for key in keys:
+        values = data[key]
+        values = values.reshape(-1) if key.endswith("Labels") else values.astype(np.float32)
+        paths[key] = os.path.join(out_dir, f"{key}.npy")
+        np.save(paths[key], values)
+        del data[key]
+    return paths
@@ -0,0 +1,203 @@
+"""
+Label segmentation and windowing shared by the dataset code (windowedDataset), the
+misalignment evaluation and the scripts.
+
+Everything works on index arrays or zero-copy strided views, so the cost is a few NumPy
+passes over the frames instead of a Python loop per frame, run or window:
+
+    segment_runs            contiguous runs of equal labels (np.diff/nonzero)
+    activity_order          frame order of the notebooks' group_activity_chunks
+    variable_size_order     frame order of the notebooks' create_variable_size_windows
+    sliding_windows         (windows, window_size, ...) view, like the notebooks' sliding_window
+    window_labels           last / majority / framewise label of every window
+    majority_labels         row-wise majority of a label matrix (vectorized bincount)
+"""
+import numpy as np
+
+
+def segment_runs(labels):
+    """
+    Run-length segmentation of a label array.
+
+    Args:
+        labels (np.ndarray): (frames,) labels.
+
+    Returns:
+        tuple: (starts, lengths, values) of the contiguous runs of equal labels, in order.
+    """
+    labels = np.asarray(labels)
+    if len(labels) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), labels[:0]
+    starts = np.concatenate(([0], np.flatnonzero(labels[1:] != labels[:-1]) + 1))
+    lengths = np.diff(np.append(starts, len(labels)))
+    return starts, lengths, labels[starts]
+
+
+def concat_ranges(starts, lengths):
+    """
+    Indices of the ranges [start, start + length) one after the other, without a loop.
+
+    Returns:
+        np.ndarray: int64 indices of length lengths.sum().
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    new_starts = np.cumsum(lengths) - lengths
+    return np.arange(lengths.sum()) + np.repeat(starts - new_starts, lengths)
+
+
+def activity_order(labels, label_order):
+    """
+    Index-array version of the notebooks' group_activity_chunks.
+
+    Splits the labels into contiguous runs and orders the runs by `label_order` (runs of
+    the same label keep their original order); runs of labels not in `label_order` are
+    dropped. features[order] and labels[order] give the grouped arrays.
+
+    Args:
+        labels (np.ndarray): (frames,) labels.
+        label_order (list): Labels in the order their runs should appear.
+
+    Returns:
+        np.ndarray: int64 frame indices.
+    """
+    starts, lengths, values = segment_runs(labels)
+    label_order = np.asarray(label_order)
+    rank = np.full(len(values), len(label_order))
+    matches = values[:, None] == label_order[None, :]
+    rank[matches.any(axis=1)] = matches.argmax(axis=1)[matches.any(axis=1)]
+    runs = np.argsort(rank, kind="stable")
+    runs = runs[rank[runs] < len(label_order)]
+    return concat_ranges(starts[runs], lengths[runs])
+
+
+def variable_windows(n_frames, min_size=96, max_size=128, rng=None):
+    """
+    Cuts the frames into consecutive windows of random length in [min_size, max_size],
+    like the notebooks' create_variable_size_windows (which stops at the first window
+    that does not fit and never starts one in the last `min_size` frames).
+
+    Returns:
+        tuple: (starts, sizes) int64 arrays of the windows, in frame order.
+    """
+    rng = rng or np.random.default_rng()
+    sizes = rng.integers(min_size, max_size + 1, size=n_frames // min_size + 1)
+    starts = np.cumsum(sizes) - sizes
+    valid = (starts < n_frames - min_size) & (starts + sizes <= n_frames)
+    count = np.argmin(valid) if not valid.all() else len(valid)  # Stop at the first window that does not fit
+    return starts[:count], sizes[:count]
+
+
+def variable_size_order(n_frames, min_size=96, max_size=128, rng=None):
+    """
+    Index-array version of the notebooks' create_variable_size_windows.
+
+    Cuts the frames into consecutive windows of random length in [min_size, max_size],
+    shuffles the windows and returns the frame order of the shuffled sequence, instead
+    of materialising the reordered feature matrix.
+
+    Returns:
+        np.ndarray: int64 frame indices (frames past the last full window are dropped).
+    """
+    rng = rng or np.random.default_rng()
+    starts, sizes = variable_windows(n_frames, min_size, max_size, rng)
+    permutation = rng.permutation(len(starts))
+    return concat_ranges(starts[permutation], sizes[permutation])
+
+
+def window_count(n_frames, window_size, step):
+    """Number of full windows of `window_size` frames every `step` frames."""
+    return max((n_frames - window_size) // step + 1, 0)
+
+
+def window_starts(n_frames, window_size, step):
+    """First frame of every full window."""
+    return np.arange(window_count(n_frames, window_size, step), dtype=np.int64) * step
+
+
+def window_indices(starts, window_size):
+    """(windows, window_size) frame indices of the windows starting at `starts`."""
+    return np.asarray(starts, dtype=np.int64)[:, None] + np.arange(window_size)
+
+
+def sliding_windows(a, window_size, step=None):
+    """
+    Zero-copy sliding windows along the first axis (the notebooks' sliding_window with
+    flatten=True, for (frames,) or (frames, channels) arrays).
+
+    Args:
+        a (np.ndarray): Array of shape (frames, ...); memory-mapped arrays stay on disk.
+        window_size (int): Frames per window.
+        step (int | None): Stride between window starts (default: window_size).
+
+    Returns:
+        np.ndarray: Read-only view of shape (windows, window_size, ...).
+    """
+    a = np.asarray(a)
+    step = step or window_size
+    count = window_count(len(a), window_size, step)
+    return np.lib.stride_tricks.as_strided(a, shape=(count, window_size) + a.shape[1:],
+                                           strides=(a.strides[0] * step,) + a.strides, writeable=False)
+
+
+def majority_labels(label_rows, num_classes=None, chunk_rows=1 << 16):
+    """
+    Majority label of every row of a label matrix, with ties resolved to the smallest
+    label (like np.bincount(row).argmax()).
+
+    Rows are counted together: label + row * num_classes gives every (row, label) pair
+    its own bin, so one bincount replaces a bincount per row. Rows are processed in
+    chunks to bound the (rows, num_classes) count matrix.
+
+    Args:
+        label_rows (np.ndarray): (rows, k) non-negative integer labels.
+        num_classes (int | None): Number of classes (default: largest label + 1).
+        chunk_rows (int): Rows counted at once.
+
+    Returns:
+        np.ndarray: (rows,) int64 labels.
+    """
+    label_rows = np.asarray(label_rows)
+    if label_rows.size == 0:
+        return np.zeros(len(label_rows), dtype=np.int64)
+    num_classes = num_classes or int(label_rows.max()) + 1
+    result = np.empty(len(label_rows), dtype=np.int64)
+    for start in range(0, len(label_rows), chunk_rows):
+        chunk = label_rows[start:start + chunk_rows].astype(np.int64)
+        bins = chunk + (np.arange(len(chunk)) * num_classes)[:, None]
+        counts = np.bincount(bins.ravel(), minlength=len(chunk) * num_classes)
+        result[start:start + len(chunk)] = counts.reshape(len(chunk), num_classes).argmax(axis=1)
+    return result
+
+
+def window_labels(label_windows, mode="last"):
+    """
+    Labels of a batch of windows.
+
+    Args:
+        label_windows (np.ndarray): (windows, window_size) labels, e.g. sliding_windows(labels, ...).
+        mode (str): 'last' (label of the last frame), 'mode' (majority label, ties to the
+            smallest) or 'frame' (every frame's label).
+
+    Returns:
+        np.ndarray: (windows,) labels, or (windows, window_size) for 'frame'.
+    """
+    label_windows = np.asarray(label_windows)
+    if mode == "last":
+        return label_windows[:, -1]
+    if mode == "mode":
+        return majority_labels(label_windows)
+    if mode == "frame":
+        return label_windows
+    raise ValueError(f"Unknown label mode {mode!r}")
+
+
+def windowed(features, labels, window_size, step, label_mode="last"):
+    """
+    Windows of a whole recording, like the notebooks' data_sliding_window.
+
+    Returns:
+        tuple: (features view (windows, window_size, channels), window labels)
+    """
+    return (sliding_windows(features, window_size, step),
+            window_labels(sliding_windows(labels, window_size, step), label_mode))